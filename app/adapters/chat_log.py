@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import os
+import shutil
+import time
+from collections import deque
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import app.metrics
+from app.logging import Ansi
+from app.logging import get_timestamp
+from app.logging import log
+
+GMT = ZoneInfo("GMT")
+
+
+class ChatLog:
+    """\
+    Writes chat messages to disk in batches, off of the event loop.
+
+    Messages are timestamped & added to an in-memory ring buffer of
+    up to `buffer_size` lines, which a background task flushes to the
+    file every `flush_interval` seconds (or sooner, once half full).
+    If the disk can't keep up, the oldest buffered lines are dropped.
+
+    The file is rotated once it exceeds `max_bytes`, or every
+    `rotate_interval` seconds; rotated files may be gzipped.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int,
+        rotate_interval: int,
+        compress: bool,
+        buffer_size: int = 65536,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+
+        self._buffer: deque[str] = deque(maxlen=buffer_size)
+        self._flush_soon = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._writer_task: asyncio.Task[None] | None = None
+        self._period_start = time.time()
+
+    def write(self, sender: object, target: object, msg: str) -> None:
+        """Add a message sent by `sender` to `target` to the log."""
+        if len(self._buffer) == self.buffer_size:
+            app.metrics.increment("ex_chat_log_dropped")
+
+        timestamp = get_timestamp(full=True, tz=GMT)
+        self._buffer.append(f"[{timestamp}] {sender} @ {target}: {msg}\n")
+
+        if len(self._buffer) >= self.buffer_size // 2:
+            self._flush_soon.set()
+
+    def start(self) -> None:
+        """Start the background writer task."""
+        self._writer_task = asyncio.create_task(self._writer())
+
+    async def stop(self) -> None:
+        """Stop the background writer task, flushing any buffered messages."""
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+
+            self._writer_task = None
+
+        await self.flush()
+
+    async def _writer(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._flush_soon.wait(),
+                    timeout=self.flush_interval,
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                await self.flush()
+            except OSError as exc:
+                log(f"Failed to write to chat log: {exc}", Ansi.LRED)
+
+    async def flush(self) -> None:
+        """Write all buffered messages to disk."""
+        async with self._flush_lock:
+            self._flush_soon.clear()
+            if not self._buffer:
+                return
+
+            lines = list(self._buffer)
+            self._buffer.clear()
+
+            app.metrics.histrogram("ex_chat_log_batch_lines", len(lines))
+            await asyncio.to_thread(self._write_lines, lines)
+
+    def _write_lines(self, lines: list[str]) -> None:
+        data = "".join(lines).encode()
+
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+
+        if size and (
+            size + len(data) > self.max_bytes
+            or time.time() - self._period_start >= self.rotate_interval
+        ):
+            self._rotate()
+
+        with self.path.open("ab") as f:
+            f.write(data)
+
+    def _rotate(self) -> None:
+        suffix = time.strftime("%Y-%m-%dT%H-%M-%S", time.gmtime())
+        rotated_path = self.path.with_name(f"{self.path.name}.{suffix}")
+
+        n = 1
+        while rotated_path.exists() or Path(f"{rotated_path}.gz").exists():
+            rotated_path = self.path.with_name(f"{self.path.name}.{suffix}.{n}")
+            n += 1
+
+        os.replace(self.path, rotated_path)
+        self._period_start = time.time()
+
+        if self.compress:
+            with (
+                rotated_path.open("rb") as src,
+                gzip.open(f"{rotated_path}.gz", "wb") as dst,
+            ):
+                shutil.copyfileobj(src, dst)
+
+            rotated_path.unlink()
@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+import re
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Any
+from typing import TypeAlias
 from typing import cast
 
+from aiomysql import SSDictCursor
 from databases import Database as _Database
+from databases.core import Connection
 from databases.core import Transaction
 from sqlalchemy.dialects.mysql.mysqldb import MySQLDialect_mysqldb
 from sqlalchemy.sql.compiler import Compiled
 from sqlalchemy.sql.expression import ClauseElement
+from sqlalchemy.sql.expression import text
 
+import app.metrics
 from app import settings
+from app.caching import LRUCache
+from app.logging import Ansi
 from app.logging import log
 from app.timer import Timer
 
@@ -20,14 +30,63 @@ class MySQLDialect(MySQLDialect_mysqldb):
 
 DIALECT = MySQLDialect()
 
+# the paramstyle of the underlying driver, for queries sent to it directly
+DRIVER_DIALECT = MySQLDialect_mysqldb(paramstyle="pyformat")
+
 MySQLRow = dict[str, Any]
 MySQLParams = dict[str, Any] | None
-MySQLQuery = ClauseElement | str
+MySQLQuery: TypeAlias = ClauseElement | str
+
+MAX_FINGERPRINT_LENGTH = 256
+
+STRING_LITERAL_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+NUMBER_LITERAL_RE = re.compile(r"(?<![\w:])\d+(?:\.\d+)?\b")
+VALUES_LIST_RE = re.compile(r"\((?:\s*(?:\?|:\w+)\s*,)+\s*(?:\?|:\w+)\s*\)")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(query: str) -> str:
+    """\
+    Normalize a query into the shape shared by all of its executions,
+    with literals replaced by placeholders & value lists collapsed.
+    """
+    query = STRING_LITERAL_RE.sub("?", query)
+    query = NUMBER_LITERAL_RE.sub("?", query)
+    query = VALUES_LIST_RE.sub("(...)", query)
+    query = WHITESPACE_RE.sub(" ", query).strip()
+    return query[:MAX_FINGERPRINT_LENGTH]
 
 
 class Database:
-    def __init__(self, url: str) -> None:
-        self._database = _Database(url)
+    """\
+    A thin wrapper around `databases.Database`.
+
+    Compiled SQLAlchemy statements are cached by their shape, so each
+    statement is only compiled once; further executions only need their
+    parameters extracted. The latency of every query is recorded in
+    `app.metrics` by its fingerprint, and queries slower than
+    `settings.DB_SLOW_QUERY_THRESHOLD_MS` are logged.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        min_pool_size: int = 1,
+        max_pool_size: int = 10,
+        statement_cache_size: int = 1024,
+    ) -> None:
+        self._database = _Database(url, min_size=min_pool_size, max_size=max_pool_size)
+
+        # {statement cache key: compiled statement, ...}
+        self._statements: LRUCache[Any, Compiled] = LRUCache(
+            maxsize=statement_cache_size,
+            hits_metric="ex_db_statement_cache_hits",
+            misses_metric="ex_db_statement_cache_misses",
+        )
+        # {query: fingerprint, ...}
+        self._fingerprints: LRUCache[str, str] = LRUCache(
+            maxsize=statement_cache_size,
+        )
 
     async def connect(self) -> None:
         await self._database.connect()
@@ -36,25 +95,65 @@ class Database:
         await self._database.disconnect()
 
     def _compile(self, clause_element: ClauseElement) -> tuple[str, MySQLParams]:
-        compiled: Compiled = clause_element.compile(
-            dialect=DIALECT,
-            compile_kwargs={"render_postcompile": True},
-        )
-        return str(compiled), compiled.params
+        cache_key = clause_element._generate_cache_key()
 
-    async def fetch_one(
-        self,
-        query: MySQLQuery,
-        params: MySQLParams = None,
-    ) -> MySQLRow | None:
-        if isinstance(query, ClauseElement):
-            query, params = self._compile(query)
+        if cache_key is None:
+            # the statement can't be cached
+            compiled: Compiled = clause_element.compile(
+                dialect=DIALECT,
+                compile_kwargs={"render_postcompile": True},
+            )
+            return str(compiled), compiled.params
+
+        cached = self._statements.get(cache_key.key)
+        if cached is None:
+            cached = clause_element.compile(dialect=DIALECT, cache_key=cache_key)
+            self._statements[cache_key.key] = cached
+
+        params = cached.construct_params(extracted_parameters=cache_key.bindparams)
+
+        if cached.post_compile_params:
+            # expand parameters which are only known at execution,
+            # e.g. `IN` lists, as `render_postcompile` would have.
+            # NOTE: a private api of sqlalchemy 1.4 (as pinned in pyproject);
+            #       check it still exists when upgrading.
+            expanded = cached._process_parameters_for_postcompile(params)
+            return expanded.statement, params
+
+        return cached.string, params
 
-        with Timer() as timer:
-            row = await self._database.fetch_one(query, params)
+    def _fingerprint(self, query: str) -> str:
+        query_fingerprint = self._fingerprints.get(query)
+        if query_fingerprint is None:
+            query_fingerprint = fingerprint(query)
+            self._fingerprints[query] = query_fingerprint
 
-        if settings.DEBUG:
-            time_elapsed = timer.elapsed()
+        return query_fingerprint
+
+    def _record_query(
+        self,
+        query: str,
+        params: MySQLParams | list[MySQLParams],
+        time_elapsed: float,
+    ) -> None:
+        query_fingerprint = self._fingerprint(query)
+
+        app.metrics.histrogram(
+            "ex_db_query_time",
+            time_elapsed,
+            labels={"query": query_fingerprint},
+        )
+
+        if time_elapsed * 1000 >= settings.DB_SLOW_QUERY_THRESHOLD_MS:
+            log(
+                f"Slow SQL query: {query_fingerprint} in {time_elapsed * 1000:.2f} msec.",
+                Ansi.LYELLOW,
+                extra={
+                    "query": query,
+                    "time_elapsed": time_elapsed,
+                },
+            )
+        elif settings.DEBUG:
             log(
                 f"Executed SQL query: {query} {params} in {time_elapsed * 1000:.2f} msec.",
                 extra={
@@ -64,6 +163,44 @@ class Database:
                 },
             )
 
+    @asynccontextmanager
+    async def _pool_wait(self) -> AsyncIterator[None]:
+        """Record the time spent waiting to acquire a connection from the pool."""
+        app.metrics.increment("ex_db_pool_waiting")
+        try:
+            with Timer() as timer:
+                yield
+        finally:
+            app.metrics.decrement("ex_db_pool_waiting")
+
+        app.metrics.histrogram("ex_db_pool_wait_time", timer.elapsed())
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[Connection]:
+        connection = self._database.connection()
+
+        async with self._pool_wait():
+            await connection.__aenter__()
+
+        try:
+            yield connection
+        finally:
+            await connection.__aexit__()
+
+    async def fetch_one(
+        self,
+        query: MySQLQuery,
+        params: MySQLParams = None,
+    ) -> MySQLRow | None:
+        if isinstance(query, ClauseElement):
+            query, params = self._compile(query)
+
+        async with self._connection() as connection:
+            with Timer() as timer:
+                row = await connection.fetch_one(query, params)
+
+        self._record_query(query, params, timer.elapsed())
+
         return dict(row._mapping) if row is not None else None
 
     async def fetch_all(
@@ -74,19 +211,11 @@ class Database:
         if isinstance(query, ClauseElement):
             query, params = self._compile(query)
 
-        with Timer() as timer:
-            rows = await self._database.fetch_all(query, params)
+        async with self._connection() as connection:
+            with Timer() as timer:
+                rows = await connection.fetch_all(query, params)
 
-        if settings.DEBUG:
-            time_elapsed = timer.elapsed()
-            log(
-                f"Executed SQL query: {query} {params} in {time_elapsed * 1000:.2f} msec.",
-                extra={
-                    "query": query,
-                    "params": params,
-                    "time_elapsed": time_elapsed,
-                },
-            )
+        self._record_query(query, params, timer.elapsed())
 
         return [dict(row._mapping) for row in rows]
 
@@ -99,39 +228,88 @@ class Database:
         if isinstance(query, ClauseElement):
             query, params = self._compile(query)
 
-        with Timer() as timer:
-            val = await self._database.fetch_val(query, params, column)
+        async with self._connection() as connection:
+            with Timer() as timer:
+                val = await connection.fetch_val(query, params, column)
 
-        if settings.DEBUG:
-            time_elapsed = timer.elapsed()
-            log(
-                f"Executed SQL query: {query} {params} in {time_elapsed * 1000:.2f} msec.",
-                extra={
-                    "query": query,
-                    "params": params,
-                    "time_elapsed": time_elapsed,
-                },
-            )
+        self._record_query(query, params, timer.elapsed())
 
         return val
 
+    async def fetch_stream(
+        self,
+        query: MySQLQuery,
+        params: MySQLParams = None,
+        write_timeout: int | None = None,
+    ) -> AsyncIterator[MySQLRow]:
+        """\
+        Iterate over the rows of a query as they're read from the server,
+        rather than loading the whole result set into memory.
+
+        The server aborts the stream if it's left unread for longer than
+        `net_write_timeout` seconds; `write_timeout` raises it (for this
+        stream's session only) for callers which may block between rows.
+        """
+        if isinstance(query, ClauseElement):
+            query, params = self._compile(query)
+
+        # the driver is used directly, so translate the query to its paramstyle
+        compiled = (
+            text(query)
+            .bindparams(**(params or {}))
+            .compile(
+                dialect=DRIVER_DIALECT,
+                compile_kwargs={"render_postcompile": True},
+            )
+        )
+
+        # use a connection of our own, rather than the task's; so that
+        # other queries may be made while iterating over the results.
+        # NOTE: `_backend` & the backend connection's `raw_connection` (the
+        #       aiomysql connection) are internals of databases 0.8 (as
+        #       pinned in pyproject); check them when upgrading.
+        connection = self._database._backend.connection()
+
+        async with self._pool_wait():
+            await connection.acquire()
+
+        try:
+            cursor = await connection.raw_connection.cursor(SSDictCursor)
+            try:
+                if write_timeout is not None:
+                    await cursor.execute(
+                        "SET SESSION net_write_timeout = %s",
+                        (write_timeout,),
+                    )
+
+                with Timer() as timer:
+                    await cursor.execute(str(compiled), compiled.params)
+
+                self._record_query(query, params, timer.elapsed())
+
+                async for row in cursor:
+                    yield row
+            finally:
+                await cursor.close()
+
+            if write_timeout is not None:
+                # the connection returns to the pool; restore the default
+                async with connection.raw_connection.cursor() as cursor:
+                    await cursor.execute(
+                        "SET SESSION net_write_timeout = @@GLOBAL.net_write_timeout",
+                    )
+        finally:
+            await connection.release()
+
     async def execute(self, query: MySQLQuery, params: MySQLParams = None) -> int:
         if isinstance(query, ClauseElement):
             query, params = self._compile(query)
 
-        with Timer() as timer:
-            rec_id = await self._database.execute(query, params)
+        async with self._connection() as connection:
+            with Timer() as timer:
+                rec_id = await connection.execute(query, params)
 
-        if settings.DEBUG:
-            time_elapsed = timer.elapsed()
-            log(
-                f"Executed SQL query: {query} {params} in {time_elapsed * 1000:.2f} msec.",
-                extra={
-                    "query": query,
-                    "params": params,
-                    "time_elapsed": time_elapsed,
-                },
-            )
+        self._record_query(query, params, timer.elapsed())
 
         return cast(int, rec_id)
 
@@ -141,19 +319,11 @@ class Database:
         if isinstance(query, ClauseElement):
             query, _ = self._compile(query)
 
-        with Timer() as timer:
-            await self._database.execute_many(query, params)
+        async with self._connection() as connection:
+            with Timer() as timer:
+                await connection.execute_many(query, params)
 
-        if settings.DEBUG:
-            time_elapsed = timer.elapsed()
-            log(
-                f"Executed SQL query: {query} {params} in {time_elapsed * 1000:.2f} msec.",
-                extra={
-                    "query": query,
-                    "params": params,
-                    "time_elapsed": time_elapsed,
-                },
-            )
+        self._record_query(query, params, timer.elapsed())
 
     def transaction(
         self,
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import cast
+
+
+def hash_osu_file(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "md5").hexdigest()
+
+
+def _hash_osu_file_if_present(path: Path) -> str | None:
+    try:
+        return hash_osu_file(path)
+    except FileNotFoundError:
+        return None
+
+
+@dataclass
+class VerifyResult:
+    files: int = 0  # .osu files found
+    rehashed: int = 0  # of which were (re)hashed
+    removed: int = 0  # index entries of files no longer present
+
+
+class OsuFileIndex:
+    """\
+    A persistent index of the md5s of the .osu files in `directory`.
+
+    Each file's md5 is stored in a sqlite database at `path`, along with
+    the file's size & modification time; a file is only rehashed once
+    these change (or it's written through the index).
+
+    The database is opened on first use.
+    """
+
+    def __init__(self, directory: Path, path: Path) -> None:
+        self.directory = directory
+        self.path = path
+
+        self._connection: sqlite3.Connection | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS osu_files ("
+                "beatmap_id INTEGER PRIMARY KEY, "
+                "md5 TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "mtime_ns INTEGER NOT NULL"
+                ")",
+            )
+
+        return self._connection
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _file_path(self, beatmap_id: int) -> Path:
+        return self.directory / f"{beatmap_id}.osu"
+
+    def _save(self, entries: list[tuple[int, str, os.stat_result]]) -> None:
+        self.connection.executemany(
+            "REPLACE INTO osu_files (beatmap_id, md5, size, mtime_ns) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (beatmap_id, md5, stat.st_size, stat.st_mtime_ns)
+                for beatmap_id, md5, stat in entries
+            ],
+        )
+
+    def _forget(self, beatmap_ids: list[int]) -> None:
+        self.connection.executemany(
+            "DELETE FROM osu_files WHERE beatmap_id = ?",
+            [(beatmap_id,) for beatmap_id in beatmap_ids],
+        )
+
+    def _indexed_stat(self, beatmap_id: int) -> tuple[str, int, int] | None:
+        row = self.connection.execute(
+            "SELECT md5, size, mtime_ns FROM osu_files WHERE beatmap_id = ?",
+            (beatmap_id,),
+        ).fetchone()
+        return cast(tuple[str, int, int] | None, row)
+
+    def md5(self, beatmap_id: int) -> str | None:
+        """Get the md5 of a beatmap's .osu file, or None if it's not on disk."""
+        file_path = self._file_path(beatmap_id)
+
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            self._forget([beatmap_id])
+            return None
+
+        indexed = self._indexed_stat(beatmap_id)
+        if indexed is not None:
+            md5, size, mtime_ns = indexed
+            if (size, mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                return md5
+
+        # new, or changed since indexed
+        md5 = hash_osu_file(file_path)
+        self._save([(beatmap_id, md5, stat)])
+        return md5
+
+    def write(self, beatmap_id: int, data: bytes) -> None:
+        """Write a beatmap's .osu file to disk, & index it."""
+        file_path = self._file_path(beatmap_id)
+        file_path.write_bytes(data)
+
+        self._save([(beatmap_id, hashlib.md5(data).hexdigest(), file_path.stat())])
+
+    def verify(self, max_workers: int, rehash_all: bool = False) -> VerifyResult:
+        """\
+        Bring the index up to date with all .osu files in the directory,
+        hashing any new or changed files (or all, if `rehash_all`) in
+        `max_workers` threads, and removing entries of deleted files.
+        """
+        result = VerifyResult()
+
+        indexed = {
+            beatmap_id: (size, mtime_ns)
+            for beatmap_id, size, mtime_ns in self.connection.execute(
+                "SELECT beatmap_id, size, mtime_ns FROM osu_files",
+            )
+        }
+
+        to_hash: list[tuple[int, os.stat_result]] = []
+        for file_path in self.directory.glob("*.osu"):
+            if not file_path.stem.isdecimal():
+                continue
+
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                continue  # deleted since listed
+
+            beatmap_id = int(file_path.stem)
+            result.files += 1
+
+            indexed_stat = indexed.pop(beatmap_id, None)
+            if rehash_all or indexed_stat != (stat.st_size, stat.st_mtime_ns):
+                to_hash.append((beatmap_id, stat))
+
+        # (hashlib releases the gil while hashing)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            md5s = executor.map(
+                _hash_osu_file_if_present,
+                [self._file_path(beatmap_id) for beatmap_id, _ in to_hash],
+            )
+
+            self.connection.execute("BEGIN")
+            try:
+                batch: list[tuple[int, str, os.stat_result]] = []
+                for (beatmap_id, stat), md5 in zip(to_hash, md5s):
+                    if md5 is None:
+                        continue  # deleted since listed
+
+                    batch.append((beatmap_id, md5, stat))
+                    if len(batch) == 1000:
+                        self._save(batch)
+                        batch.clear()
+
+                self._save(batch)
+
+                # (any remaining were not found on disk)
+                self._forget(list(indexed))
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            else:
+                self.connection.execute("COMMIT")
+
+        result.rehashed = len(to_hash)
+        result.removed = len(indexed)
+        return result
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+import bcrypt
+
+import app.metrics
+from app._typing import IPAddress
+
+T = TypeVar("T")
+
+
+class PasswordHasherOverloaded(Exception):
+    """Raised when a bcrypt operation is rejected due to load."""
+
+
+class PasswordHasher:
+    """\
+    Runs bcrypt operations on a thread pool, off of the event loop.
+
+    bcrypt releases the GIL while hashing, so the operations run in
+    parallel with the event loop (and each other) on `max_workers`
+    threads. To keep a burst of logins (e.g. everyone reconnecting
+    after a restart) from queueing up minutes of work, at most
+    `max_queued` operations may wait for a thread, and at most
+    `max_in_flight_per_ip` may be in flight for a single ip; past
+    those limits `PasswordHasherOverloaded` is raised immediately.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queued: int,
+        max_in_flight_per_ip: int,
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_in_flight_per_ip = max_in_flight_per_ip
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="bcrypt",
+        )
+        self._in_flight = 0
+        self._in_flight_by_ip: defaultdict[IPAddress, int] = defaultdict(int)
+
+    @property
+    def in_flight(self) -> int:
+        """The number of operations currently queued or running."""
+        return self._in_flight
+
+    async def checkpw(
+        self,
+        password: bytes,
+        hashed_password: bytes,
+        ip: IPAddress | None = None,
+    ) -> bool:
+        """Check `password` against `hashed_password` (~200ms of work)."""
+        return await self._run(bcrypt.checkpw, password, hashed_password, ip=ip)
+
+    async def hashpw(self, password: bytes, ip: IPAddress | None = None) -> bytes:
+        """Hash `password` with a newly generated salt (~200ms of work)."""
+        return await self._run(
+            bcrypt.hashpw,
+            password,
+            bcrypt.gensalt(),
+            ip=ip,
+        )
+
+    async def _run(
+        self,
+        func: Callable[..., T],
+        *args: bytes,
+        ip: IPAddress | None,
+    ) -> T:
+        if self._in_flight >= self.max_workers + self.max_queued:
+            app.metrics.increment("ex_bcrypt_rejected")
+            raise PasswordHasherOverloaded("Too many bcrypt operations queued")
+
+        if ip is not None:
+            if self._in_flight_by_ip[ip] >= self.max_in_flight_per_ip:
+                app.metrics.increment("ex_bcrypt_rejected")
+                raise PasswordHasherOverloaded(f"Too many bcrypt operations for {ip}")
+
+            self._in_flight_by_ip[ip] += 1
+
+        self._in_flight += 1
+        app.metrics.increment("ex_bcrypt_queue_depth")
+
+        start_time = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._in_flight -= 1
+            app.metrics.decrement("ex_bcrypt_queue_depth")
+            app.metrics.histrogram("ex_bcrypt_time", time.perf_counter() - start_time)
+
+            if ip is not None:
+                self._in_flight_by_ip[ip] -= 1
+                if self._in_flight_by_ip[ip] == 0:
+                    del self._in_flight_by_ip[ip]
+
+    def shutdown(self) -> None:
+        """Shut down the thread pool, cancelling any queued operations."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
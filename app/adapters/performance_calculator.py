@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import time
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import app.metrics
+import app.usecases.performance
+from app.usecases.performance import PerformanceResult
+from app.usecases.performance import ScoreParams
+
+BEATMAPS_PATH = Path.cwd() / ".data/osu"
+
+
+class PerformanceCalculator:
+    """\
+    Runs performance calculations in worker processes, off of the event loop.
+
+    Each of the `max_workers` processes holds its own cache of parsed
+    beatmaps & difficulty attributes, and calculations for a beatmap are
+    always sent to the same process; so repeated calculations on a map
+    (with the same mods) only pay for the performance step.
+
+    The processes are started on first use.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max_workers
+
+        self._executors: list[ProcessPoolExecutor | None] = [None] * max_workers
+
+    def _executor_for(self, beatmap_id: int) -> ProcessPoolExecutor:
+        idx = beatmap_id % self.max_workers
+
+        executor = self._executors[idx]
+        if executor is None:
+            # spawn, rather than fork the server's threads & event loop
+            executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            self._executors[idx] = executor
+
+        return executor
+
+    async def calculate(
+        self,
+        beatmap_id: int,
+        beatmap_md5: str,
+        scores: Sequence[ScoreParams],
+    ) -> list[PerformanceResult]:
+        """Calculate performance for multiple scores on a single beatmap."""
+        start_time = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor_for(beatmap_id),
+                app.usecases.performance.calculate_performances_cached,
+                beatmap_id,
+                beatmap_md5,
+                str(BEATMAPS_PATH / f"{beatmap_id}.osu"),
+                scores,
+            )
+        finally:
+            app.metrics.histrogram(
+                "ex_performance_calc_time",
+                time.perf_counter() - start_time,
+            )
+
+    def shutdown(self) -> None:
+        """Shut down the worker processes, cancelling any queued calculations."""
+        for executor in self._executors:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        self._executors = [None] * self.max_workers
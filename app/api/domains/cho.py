@@ -8,15 +8,13 @@ import re
 import struct
 import time
 from collections.abc import Callable
+from collections.abc import Iterable
 from collections.abc import Mapping
 from datetime import date
 from datetime import datetime
-from pathlib import Path
 from typing import Literal
 from typing import TypedDict
-from zoneinfo import ZoneInfo
 
-import bcrypt
 import app.metrics
 import databases.core
 from fastapi import APIRouter
@@ -28,10 +26,10 @@ from fastapi.responses import HTMLResponse
 import app.packets
 import app.settings
 import app.state
-import app.usecases.performance
 import app.utils
 from app import commands
 from app._typing import IPAddress
+from app.adapters.password_hasher import PasswordHasherOverloaded
 from app.constants import regexes
 from app.constants.gamemodes import GameMode
 from app.constants.mods import SPEED_CHANGING_MODS
@@ -40,7 +38,6 @@ from app.constants.privileges import ClanPrivileges
 from app.constants.privileges import ClientPrivileges
 from app.constants.privileges import Privileges
 from app.logging import Ansi
-from app.logging import get_timestamp
 from app.logging import log
 from app.logging import magnitude_fmt_time
 from app.objects.beatmap import Beatmap
@@ -59,6 +56,7 @@ from app.objects.player import OsuStream
 from app.objects.player import OsuVersion
 from app.objects.player import Player
 from app.objects.player import PresenceFilter
+from app.objects.player import Status
 from app.packets import BanchoPacketReader
 from app.packets import BasePacket
 from app.packets import ClientPackets
@@ -72,9 +70,6 @@ from app.usecases.performance import ScoreParams
 
 OSU_API_V2_CHANGELOG_URL = "https://osu.ppy.sh/api/v2/changelog"
 
-BEATMAPS_PATH = Path.cwd() / ".data/osu"
-DISK_CHAT_LOG_FILE = ".data/logs/chat.log"
-
 BASE_DOMAIN = app.settings.DOMAIN
 
 # TODO: dear god
@@ -285,17 +280,24 @@ class ChangeAction(BasePacket):
         self.map_id = reader.read_i32()
 
     async def handle(self, player: Player) -> None:
-        # update the user's status.
-        player.status.action = Action(self.action)
-        player.status.info_text = self.info_text
-        player.status.map_md5 = self.map_md5
-        player.status.mods = Mods(self.mods)
-        player.status.mode = GameMode(self.mode)
-        player.status.map_id = self.map_id
+        status = Status(
+            action=Action(self.action),
+            info_text=self.info_text,
+            map_md5=self.map_md5,
+            mods=Mods(self.mods),
+            mode=GameMode(self.mode),
+            map_id=self.map_id,
+        )
+
+        # the client re-sends its status quite often; only
+        # re-encode their packets if something actually changed.
+        if status != player.status:
+            player.status = status
+            player.invalidate_packet_cache()
 
         # broadcast it to all online players.
         if not player.restricted:
-            app.state.sessions.players.enqueue(app.packets.user_stats(player))
+            app.state.sessions.players.enqueue_stats(player)
 
 
 IGNORED_CHANNELS: list[str] = ["#highlight", "#userlog"]
@@ -434,11 +436,7 @@ class SendMessage(BasePacket):
             app.metrics.increment("ex_chat_messages")
 
         log(f"{player} @ {t_chan}: {msg}", Ansi.LCYAN)
-
-        with open(DISK_CHAT_LOG_FILE, "a+") as f:
-            f.write(
-                f"[{get_timestamp(full=True, tz=ZoneInfo('GMT'))}] {player} @ {t_chan}: {msg}\n",
-            )
+        app.state.services.chat_log.write(player, t_chan, msg)
 
 
 @register(ClientPackets.LOGOUT, restricted=True)
@@ -461,7 +459,7 @@ class Logout(BasePacket):
 @register(ClientPackets.REQUEST_STATUS_UPDATE, restricted=True)
 class StatsUpdateRequest(BasePacket):
     async def handle(self, player: Player) -> None:
-        player.enqueue(app.packets.user_stats(player))
+        player.enqueue_stats(player)
 
 
 # Some messages to send on welcome/restricted/etc.
@@ -611,7 +609,14 @@ def parse_adapters_string(adapters_string: str) -> tuple[list[str], bool]:
 async def authenticate(
     username: str,
     untrusted_password: bytes,
+    ip: IPAddress,
 ) -> users_repo.User | None:
+    """\
+    Authenticate a user by their username & password md5.
+
+    Raises `PasswordHasherOverloaded` if the bcrypt
+    check could not be queued due to load.
+    """
     user_info = await users_repo.fetch_one(
         name=username,
         fetch_all_fields=True,
@@ -622,11 +627,16 @@ async def authenticate(
     trusted_hashword = user_info["pw_bcrypt"].encode()
 
     # in-memory bcrypt lookup cache for performance
-    if trusted_hashword in app.state.cache.bcrypt:  # ~0.01 ms
-        if untrusted_password != app.state.cache.bcrypt[trusted_hashword]:
+    cached_password = app.state.cache.bcrypt.get(trusted_hashword)
+    if cached_password is not None:  # ~0.01 ms
+        if untrusted_password != cached_password:
             return None
-    else:  # ~200ms
-        if not bcrypt.checkpw(untrusted_password, trusted_hashword):
+    else:  # ~200ms, off of the event loop
+        if not await app.state.services.password_hasher.checkpw(
+            untrusted_password,
+            trusted_hashword,
+            ip=ip,
+        ):
             return None
 
         app.state.cache.bcrypt[trusted_hashword] = untrusted_password
@@ -723,7 +733,21 @@ async def handle_osu_login_request(
             player.logout()
             del player
 
-    user_info = await authenticate(login_data["username"], login_data["password_md5"])
+    try:
+        user_info = await authenticate(
+            login_data["username"],
+            login_data["password_md5"],
+            ip,
+        )
+    except PasswordHasherOverloaded:
+        # the client will retry the login after a few seconds.
+        return {
+            "osu_token": "server-busy",
+            "response_body": app.packets.login_reply(
+                LoginFailureReason.ERROR_OCCURRED,
+            ),
+        }
+
     if user_info is None:
         return {
             "osu_token": "incorrect-credentials",
@@ -933,7 +957,7 @@ async def handle_osu_login_request(
     data += app.packets.silence_end(player.remaining_silence)
 
     # update our new player's stats, and broadcast them.
-    user_data = app.packets.user_presence(player) + app.packets.user_stats(player)
+    user_data = player.presence_packet + player.stats_packet
 
     data += user_data
 
@@ -951,8 +975,8 @@ async def handle_osu_login_request(
                     data += app.packets.bot_presence(o)
                     data += app.packets.bot_stats(o)
                 else:
-                    data += app.packets.user_presence(o)
-                    data += app.packets.user_stats(o)
+                    data += o.presence_packet
+                    data += o.stats_packet
 
         # the player may have been sent mail while offline,
         # enqueue any messages from their respective authors.
@@ -1018,8 +1042,8 @@ async def handle_osu_login_request(
                 data += app.packets.bot_presence(o)
                 data += app.packets.bot_stats(o)
             else:
-                data += app.packets.user_presence(o)
-                data += app.packets.user_stats(o)
+                data += o.presence_packet
+                data += o.stats_packet
 
         data += app.packets.account_restricted()
         data += app.packets.send_message(
@@ -1308,8 +1332,9 @@ class SendPrivateMessage(BasePacket):
                                 for acc in app.settings.PP_CACHED_ACCURACIES
                             ]
 
-                            results = app.usecases.performance.calculate_performances(
-                                osu_file_path=str(BEATMAPS_PATH / f"{bmap.id}.osu"),
+                            results = await app.state.services.performance_calculator.calculate(
+                                bmap.id,
+                                bmap.md5,
                                 scores=scores,
                             )
 
@@ -1334,10 +1359,7 @@ class SendPrivateMessage(BasePacket):
         player.update_latest_activity_soon()
 
         log(f"{player} @ {target}: {msg}", Ansi.LCYAN)
-        with open(DISK_CHAT_LOG_FILE, "a+") as f:
-            f.write(
-                f"[{get_timestamp(full=True, tz=ZoneInfo('GMT'))}] {player} @ {target}: {msg}\n",
-            )
+        app.state.services.chat_log.write(player, target, msg)
 
 
 @register(ClientPackets.PART_LOBBY)
@@ -1969,7 +1991,10 @@ class TourneyMatchInfoRequest(BasePacket):
         if not match:
             return  # match not found
 
-        player.enqueue(app.packets.update_match(match, send_pw=False))
+        player.enqueue(
+            app.packets.update_match(match, send_pw=False),
+            key=(app.packets.ServerPackets.UPDATE_MATCH, match.id, False),
+        )
 
 
 @register(ClientPackets.TOURNAMENT_JOIN_MATCH_CHANNEL)
@@ -2110,6 +2135,7 @@ class ReceiveUpdates(BasePacket):
             return
 
         player.pres_filter = PresenceFilter(self.value)
+        app.state.sessions.players.update_pres_filter_views(player)
 
 
 @register(ClientPackets.SET_AWAY_MESSAGE)
@@ -2121,28 +2147,44 @@ class SetAwayMessage(BasePacket):
         player.away_msg = self.msg.text
 
 
+def stats_packets(players: Iterable[Player]) -> bytes:
+    """Join the USER_STATS packets of `players` into a single buffer."""
+    bot = app.state.sessions.bot
+    return b"".join(
+        [
+            # the bot is the most frequently requested user
+            app.packets.bot_stats(p) if p is bot else p.stats_packet
+            for p in players
+        ],
+    )
+
+
+def presence_packets(players: Iterable[Player]) -> bytes:
+    """Join the USER_PRESENCE packets of `players` into a single buffer."""
+    bot = app.state.sessions.bot
+    return b"".join(
+        [
+            # the bot is the most frequently requested user
+            app.packets.bot_presence(p) if p is bot else p.presence_packet
+            for p in players
+        ],
+    )
+
+
 @register(ClientPackets.USER_STATS_REQUEST, restricted=True)
 class StatsRequest(BasePacket):
     def __init__(self, reader: BanchoPacketReader) -> None:
         self.user_ids = reader.read_i32_list_i16l()
 
     async def handle(self, player: Player) -> None:
-        unrestrcted_ids = [p.id for p in app.state.sessions.players.unrestricted]
-
-        def is_online(o: int) -> bool:
-            return o in unrestrcted_ids and o != player.id
-
-        for online in filter(is_online, self.user_ids):
-            target = app.state.sessions.players.get(id=online)
-            if target:
-                if target is app.state.sessions.bot:
-                    # optimization for bot since it's
-                    # the most frequently requested user
-                    packet = app.packets.bot_stats(target)
-                else:
-                    packet = app.packets.user_stats(target)
+        targets = app.state.sessions.players.get_many(
+            self.user_ids,
+            unrestricted_only=True,
+        )
 
-                player.enqueue(packet)
+        data = stats_packets(target for target in targets if target is not player)
+        if data:
+            player.enqueue(data)
 
 
 @register(ClientPackets.MATCH_INVITE)
@@ -2199,17 +2241,11 @@ class UserPresenceRequest(BasePacket):
         self.user_ids = reader.read_i32_list_i16l()
 
     async def handle(self, player: Player) -> None:
-        for pid in self.user_ids:
-            target = app.state.sessions.players.get(id=pid)
-            if target:
-                if target is app.state.sessions.bot:
-                    # optimization for bot since it's
-                    # the most frequently requested user
-                    packet = app.packets.bot_presence(target)
-                else:
-                    packet = app.packets.user_presence(target)
+        targets = app.state.sessions.players.get_many(self.user_ids)
 
-                player.enqueue(packet)
+        data = presence_packets(targets)
+        if data:
+            player.enqueue(data)
 
 
 @register(ClientPackets.USER_PRESENCE_REQUEST_ALL)
@@ -2220,13 +2256,9 @@ class UserPresenceRequestAll(BasePacket):
     async def handle(self, player: Player) -> None:
         # NOTE: this packet is only used when there
         # are >256 players visible to the client.
-
-        buffer = bytearray()
-
-        for player in app.state.sessions.players.unrestricted:
-            buffer += app.packets.user_presence(player)
-
-        player.enqueue(bytes(buffer))
+        data = presence_packets(app.state.sessions.players.unrestricted)
+        if data:
+            player.enqueue(data)
 
 
 @register(ClientPackets.TOGGLE_BLOCK_NON_FRIEND_DMS)
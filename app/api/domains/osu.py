@@ -10,6 +10,7 @@ import hashlib
 import os
 import random
 import secrets
+import time
 from collections import defaultdict
 from collections.abc import Awaitable
 from collections.abc import Callable
@@ -23,7 +24,6 @@ from typing import Literal
 from urllib.parse import unquote
 from urllib.parse import unquote_plus
 
-import bcrypt
 from app.api.v2.common import json
 from app.discord import Embed, Webhook
 import app.metrics
@@ -52,6 +52,7 @@ import app.state
 import app.utils
 from app import encryption
 from app._typing import UNSET
+from app.adapters.password_hasher import PasswordHasherOverloaded
 from app.constants import regexes
 from app.constants.clientflags import LastFMFlags
 from app.constants.gamemodes import GameMode
@@ -63,10 +64,13 @@ from app.objects import models
 from app.objects.beatmap import Beatmap
 from app.objects.beatmap import RankedStatus
 from app.objects.beatmap import ensure_osu_file_is_available
+from app.objects.leaderboard import add_submitted_score
+from app.objects.leaderboard import fetch_leaderboard
 from app.objects.player import Player
 from app.objects.score import Grade
 from app.objects.score import Score
 from app.objects.score import SubmissionStatus
+from app.objects.top_scores import add_best_score
 from app.repositories import clans as clans_repo
 from app.repositories import comments as comments_repo
 from app.repositories import favourites as favourites_repo
@@ -302,36 +306,42 @@ async def osuGetBeatmapInfo(
 
     response_lines: list[str] = []
 
-    for idx, map_filename in enumerate(form_data.Filenames):
-        # try getting the map from sql
-
-        beatmap = await maps_repo.fetch_one(filename=map_filename)
-
-        if not beatmap:
-            continue
-
-        # try to get the user's grades on the map
-        # NOTE: osu! only allows us to send back one per gamemode,
-        #       so we've decided to send back *vanilla* grades.
-        #       (in theory we could make this user-customizable)
-        grades = ["N", "N", "N", "N"]
-
+    # fetch all of the requested maps, and the user's best
+    # scores on them, at once (rather than per filename).
+    # NOTE: filenames are compared case-insensitively by sql.
+    beatmaps: dict[str, maps_repo.Map] = {}  # {filename: map, ...}
+    if form_data.Filenames:
+        for beatmap in await maps_repo.fetch_many(filenames=form_data.Filenames):
+            beatmaps.setdefault(beatmap["filename"].lower(), beatmap)
+
+    # try to get the user's grades on the maps
+    # NOTE: osu! only allows us to send back one per gamemode,
+    #       so we've decided to send back *vanilla* grades.
+    #       (in theory we could make this user-customizable)
+    grades: defaultdict[str, list[str]] = defaultdict(lambda: ["N", "N", "N", "N"])
+    if beatmaps:
         for score in await scores_repo.fetch_many(
-            map_md5=beatmap["md5"],
+            map_md5s=[beatmap["md5"] for beatmap in beatmaps.values()],
             user_id=player.id,
             mode=player.status.mode.as_vanilla,
             status=SubmissionStatus.BEST,
         ):
-            grades[score["mode"]] = score["grade"]
+            grades[score["map_md5"]][score["mode"]] = score["grade"]
+
+    for idx, map_filename in enumerate(form_data.Filenames):
+        bmap = beatmaps.get(map_filename.lower())
+
+        if not bmap:
+            continue
 
         response_lines.append(
             "{i}|{id}|{set_id}|{md5}|{status}|{grades}".format(
                 i=idx,
-                id=beatmap["id"],
-                set_id=beatmap["set_id"],
-                md5=beatmap["md5"],
-                status=bancho_to_osuapi_status(beatmap["status"]),
-                grades="|".join(grades),
+                id=bmap["id"],
+                set_id=bmap["set_id"],
+                md5=bmap["md5"],
+                status=bancho_to_osuapi_status(bmap["status"]),
+                grades="|".join(grades[bmap["md5"]]),
             ),
         )
 
@@ -473,19 +483,20 @@ DIRECT_MAP_INFO_FMTSTR = (
 )
 
 
-@router.get("/web/osu-search.php")
-async def osuSearchHandler(
-    player: Player = Depends(authenticate_player_session(Query, "u", "h")),
-    ranked_status: int = Query(..., alias="r", ge=0, le=8),
-    query: str = Query(..., alias="q"),
-    mode: int = Query(..., alias="m", ge=-1, le=3),  # -1 for all
-    page_num: int = Query(..., alias="p"),
-) -> Response:
+# the "queries" of osu!direct's sorting tabs, which list all maps
+DIRECT_LISTING_QUERIES = ("newest", "top+rated", "most+played")
+
+
+async def fetch_direct_search(
+    query: str,
+    mode: int,
+    ranked_status: int,
+    page_num: int,
+) -> bytes | None:
+    """Search the beatmap mirror, & format the results for osu!direct."""
     params: dict[str, Any] = {"amount": 100, "offset": page_num * 100}
 
-    # eventually we could try supporting these,
-    # but it mostly depends on the mirror.
-    if query not in ("Newest", "Top+Rated", "Most+Played"):
+    if query:  # (empty for osu!direct's tabs)
         params["query"] = query
 
     if mode != -1:  # -1 for all
@@ -495,12 +506,17 @@ async def osuSearchHandler(
         # convert to osu!api status
         params["status"] = RankedStatus.from_osudirect(ranked_status).osu_api
 
+    start_time = time.perf_counter()
     response = await app.state.services.http_client.get(
         app.settings.MIRROR_SEARCH_ENDPOINT,
         params=params,
     )
+    app.metrics.histrogram(
+        "ex_direct_search_upstream_time",
+        time.perf_counter() - start_time,
+    )
     if response.status_code != status.HTTP_200_OK:
-        return Response(b"-1\nFailed to retrieve data from the beatmap mirror.")
+        return None
 
     result = response.json()
 
@@ -555,7 +571,33 @@ async def osuSearchHandler(
             ),
         )
 
-    return Response("\n".join(ret).encode())
+    return "\n".join(ret).encode()
+
+
+@router.get("/web/osu-search.php")
+async def osuSearchHandler(
+    player: Player = Depends(authenticate_player_session(Query, "u", "h")),
+    ranked_status: int = Query(..., alias="r", ge=0, le=8),
+    query: str = Query(..., alias="q"),
+    mode: int = Query(..., alias="m", ge=-1, le=3),  # -1 for all
+    page_num: int = Query(..., alias="p"),
+) -> Response:
+    # the most common searches (osu!direct's tabs, by ranked status)
+    # are the same for everyone, so responses are cached & shared.
+    query = " ".join(query.lower().split())
+    if query in DIRECT_LISTING_QUERIES:
+        # eventually we could try supporting these,
+        # but it mostly depends on the mirror.
+        query = ""
+
+    response = await app.state.cache.direct_search.get_or_fetch(
+        (query, mode, ranked_status, page_num),
+        lambda: fetch_direct_search(query, mode, ranked_status, page_num),
+    )
+    if response is None:
+        return Response(b"-1\nFailed to retrieve data from the beatmap mirror.")
+
+    return Response(response)
 
 
 # TODO: video support (needs db change)
@@ -759,9 +801,10 @@ if(not app.settings.DISALLOW_OLD_CLIENTS):
         if score.mode != score.player.status.mode:
             score.player.status.mods = score.mods
             score.player.status.mode = score.mode
+            score.player.invalidate_packet_cache()
 
             if not score.player.restricted:
-                app.state.sessions.players.enqueue(app.packets.user_stats(score.player))
+                app.state.sessions.players.enqueue_stats(score.player)
 
         # hold a lock around (check if submitted, submission) to ensure no duplicates
         # are submitted to the database, and potentially award duplicate score/pp/etc.
@@ -783,7 +826,7 @@ if(not app.settings.DISALLOW_OLD_CLIENTS):
                 expected_md5=bmap.md5,
             )
             if osu_file_available:
-                score.pp, score.sr = score.calculate_performance(bmap.id)
+                score.pp, score.sr = await score.calculate_performance(bmap.id)
 
                 if score.passed:
                     await score.calculate_status()
@@ -964,6 +1007,9 @@ if(not app.settings.DISALLOW_OLD_CLIENTS):
                 },
             )
 
+            if score.status == SubmissionStatus.BEST and not score.player.restricted:
+                await add_submitted_score(score)
+
             pubsub = app.state.services.redis.pubsub()
             await pubsub.execute_command("PUBLISH", "ex:submit", score.toJSON())
             
@@ -1036,37 +1082,18 @@ if(not app.settings.DISALLOW_OLD_CLIENTS):
                 stats.rscore += additional_rscore
                 stats_updates["rscore"] = stats.rscore
 
-                # fetch scores sorted by pp for total acc/pp calc
-                # NOTE: we select all plays (and not just top100)
-                # because bonus pp counts the total amount of ranked
-                # scores. I'm aware this scales horribly, and it'll
-                # likely be split into two queries in the future.
-                best_scores = await app.state.services.database.fetch_all(
-                    "SELECT s.pp, s.acc FROM scores s "
-                    "INNER JOIN maps m ON s.map_md5 = m.md5 "
-                    "WHERE s.userid = :user_id AND s.mode = :mode "
-                    "AND s.status = 2 AND m.status IN (2, 3) "  # ranked, approved
-                    "ORDER BY s.pp DESC",
-                    {"user_id": score.player.id, "mode": score.mode},
-                )
-
-                # calculate new total weighted accuracy
-                weighted_acc = sum(
-                    row["acc"] * 0.95**i for i, row in enumerate(best_scores)
-                )
-                bonus_acc = 100.0 / (20 * (1 - 0.95 ** len(best_scores)))
-                stats.acc = (weighted_acc * bonus_acc) / 100
+                # calculate new total weighted acc & pp from the player's
+                # top scores (kept up to date as best scores are submitted)
+                top_scores = await add_best_score(score)
+                stats.acc, stats.pp = top_scores.totals()
                 stats_updates["acc"] = stats.acc
-
-                # calculate new total weighted pp
-                weighted_pp = sum(row["pp"] * 0.95**i for i, row in enumerate(best_scores))
-                bonus_pp = 416.6667 * (1 - 0.9994 ** len(best_scores))
-                stats.pp = round(weighted_pp + bonus_pp)
                 stats_updates["pp"] = stats.pp
 
                 # update global & country ranking
                 stats.rank = await score.player.update_rank(score.mode)
 
+        score.player.invalidate_packet_cache()
+
         await stats_repo.partial_update(
             score.player.id,
             score.mode.value,
@@ -1087,7 +1114,7 @@ if(not app.settings.DISALLOW_OLD_CLIENTS):
 
         if not score.player.restricted:
             # enqueue new stats info to all other users
-            app.state.sessions.players.enqueue(app.packets.user_stats(score.player))
+            app.state.sessions.players.enqueue_stats(score.player)
 
             # update beatmap with new stats
             score.bmap.plays += 1
@@ -1106,6 +1133,10 @@ if(not app.settings.DISALLOW_OLD_CLIENTS):
         # update their recent score
         score.player.recent_scores[score.mode] = score
 
+        if score.player.match is not None:
+            # the match may be awaiting this score
+            score.player.match.submit_score(score)
+
         """ score submission charts """
 
         # charts are only displayed for passes vanilla gamemodes.
@@ -1355,9 +1386,10 @@ async def osuSubmitModularSelector(
     if score.mode != score.player.status.mode:
         score.player.status.mods = score.mods
         score.player.status.mode = score.mode
+        score.player.invalidate_packet_cache()
 
         if not score.player.restricted:
-            app.state.sessions.players.enqueue(app.packets.user_stats(score.player))
+            app.state.sessions.players.enqueue_stats(score.player)
 
     # hold a lock around (check if submitted, submission) to ensure no duplicates
     # are submitted to the database, and potentially award duplicate score/pp/etc.
@@ -1387,7 +1419,7 @@ async def osuSubmitModularSelector(
             expected_md5=bmap.md5,
         )
         if osu_file_available:
-            score.pp, score.sr = score.calculate_performance(bmap.id)
+            score.pp, score.sr = await score.calculate_performance(bmap.id)
 
             if score.passed:
                 await score.calculate_status()
@@ -1597,6 +1629,9 @@ async def osuSubmitModularSelector(
             },
         )
 
+        if score.status == SubmissionStatus.BEST and not score.player.restricted:
+            await add_submitted_score(score)
+
         pubsub = app.state.services.redis.pubsub()
         await pubsub.execute_command("PUBLISH", "ex:submit", score.toJSON())
         
@@ -1668,37 +1703,18 @@ async def osuSubmitModularSelector(
             stats.rscore += additional_rscore
             stats_updates["rscore"] = stats.rscore
 
-            # fetch scores sorted by pp for total acc/pp calc
-            # NOTE: we select all plays (and not just top100)
-            # because bonus pp counts the total amount of ranked
-            # scores. I'm aware this scales horribly, and it'll
-            # likely be split into two queries in the future.
-            best_scores = await app.state.services.database.fetch_all(
-                "SELECT s.pp, s.acc FROM scores s "
-                "INNER JOIN maps m ON s.map_md5 = m.md5 "
-                "WHERE s.userid = :user_id AND s.mode = :mode "
-                "AND s.status = 2 AND m.status IN (2, 3) "  # ranked, approved
-                "ORDER BY s.pp DESC",
-                {"user_id": score.player.id, "mode": score.mode},
-            )
-
-            # calculate new total weighted accuracy
-            weighted_acc = sum(
-                row["acc"] * 0.95**i for i, row in enumerate(best_scores)
-            )
-            bonus_acc = 100.0 / (20 * (1 - 0.95 ** len(best_scores)))
-            stats.acc = (weighted_acc * bonus_acc) / 100
+            # calculate new total weighted acc & pp from the player's
+            # top scores (kept up to date as best scores are submitted)
+            top_scores = await add_best_score(score)
+            stats.acc, stats.pp = top_scores.totals()
             stats_updates["acc"] = stats.acc
-
-            # calculate new total weighted pp
-            weighted_pp = sum(row["pp"] * 0.95**i for i, row in enumerate(best_scores))
-            bonus_pp = 416.6667 * (1 - 0.9994 ** len(best_scores))
-            stats.pp = round(weighted_pp + bonus_pp)
             stats_updates["pp"] = stats.pp
 
             # update global & country ranking
             stats.rank = await score.player.update_rank(score.mode)
 
+    score.player.invalidate_packet_cache()
+
     await stats_repo.partial_update(
         score.player.id,
         score.mode.value,
@@ -1719,7 +1735,7 @@ async def osuSubmitModularSelector(
 
     if not score.player.restricted:
         # enqueue new stats info to all other users
-        app.state.sessions.players.enqueue(app.packets.user_stats(score.player))
+        app.state.sessions.players.enqueue_stats(score.player)
 
         # update beatmap with new stats
         score.bmap.plays += 1
@@ -1738,6 +1754,10 @@ async def osuSubmitModularSelector(
     # update their recent score
     score.player.recent_scores[score.mode] = score
 
+    if score.player.match is not None:
+        # the match may be awaiting this score
+        score.player.match.submit_score(score)
+
     """ score submission charts """
 
     # charts are only displayed for passes vanilla gamemodes.
@@ -1871,11 +1891,10 @@ async def osuRate(
     if rating is None:
         # check if we have the map in our cache;
         # if not, the map probably doesn't exist.
-        if map_md5 not in app.state.cache.beatmap:
+        cached = app.state.cache.beatmaps.get_by_md5(map_md5)
+        if cached is None:
             return Response(b"no exist")
 
-        cached = app.state.cache.beatmap[map_md5]
-
         # only allow rating on maps with a leaderboard.
         if cached.status < RankedStatus.Ranked:
             return Response(b"not ranked")
@@ -1911,6 +1930,53 @@ async def get_leaderboard_scores(
     mods: Mods,
     player: Player,
     scoring_metric: Literal["pp", "score"],
+) -> tuple[list[dict[str, Any]], dict[str, Any] | None]:
+    if player.restricted:
+        # restricted players can see their own scores on
+        # leaderboards, which aren't held in the cache.
+        return await get_leaderboard_scores_from_sql(
+            leaderboard_type,
+            map_md5,
+            mode,
+            mods,
+            player,
+            scoring_metric,
+        )
+
+    leaderboard = await fetch_leaderboard(map_md5, GameMode(mode), scoring_metric)
+
+    if leaderboard_type == LeaderboardType.Mods:
+        scores = leaderboard.top(mods=mods)
+    elif leaderboard_type == LeaderboardType.Friends:
+        scores = leaderboard.top(user_ids=player.friends | {player.id})
+    elif leaderboard_type == LeaderboardType.Country:
+        scores = leaderboard.top(country=player.geoloc["country"]["acronym"])
+    else:
+        scores = leaderboard.top()
+
+    if not scores:
+        return [], None
+
+    score_rows = [score.to_row() for score in scores]
+
+    # fetch player's personal best score
+    personal_best_score = leaderboard.personal_best(player.id)
+    if personal_best_score is None:
+        return score_rows, None
+
+    personal_best_score_row = personal_best_score.to_row(include_user=False)
+    personal_best_score_row["rank"] = leaderboard.rank_of(personal_best_score.score)
+
+    return score_rows, personal_best_score_row
+
+
+async def get_leaderboard_scores_from_sql(
+    leaderboard_type: LeaderboardType | int,
+    map_md5: str,
+    mode: int,
+    mods: Mods,
+    player: Player,
+    scoring_metric: Literal["pp", "score"],
 ) -> tuple[list[dict[str, Any]], dict[str, Any] | None]:
     query = [
         f"SELECT s.id, s.{scoring_metric} AS _score, "
@@ -2039,9 +2105,10 @@ async def getScores(
     if mode != player.status.mode:
         player.status.mods = mods
         player.status.mode = mode
+        player.invalidate_packet_cache()
 
         if not player.restricted:
-            app.state.sessions.players.enqueue(app.packets.user_stats(player))
+            app.state.sessions.players.enqueue_stats(player)
 
     scoring_metric: Literal["pp", "score"] = (
         "pp" if mode >= GameMode.RELAX_OSU else "score"
@@ -2054,7 +2121,10 @@ async def getScores(
         # map not found, figure out whether it needs an
         # update or isn't submitted using its filename.
 
-        if has_set_id and map_set_id not in app.state.cache.beatmapset:
+        # (the set will have been cached by Beatmap.from_md5, if it exists)
+        bmap_set = app.state.cache.beatmaps.peek_set(map_set_id) if has_set_id else None
+
+        if has_set_id and bmap_set is None:
             # set not cached, it doesn't exist
             app.state.cache.unsubmitted.add(map_md5)
             return Response(b"-1|false")
@@ -2062,9 +2132,9 @@ async def getScores(
         map_filename = unquote_plus(map_filename)  # TODO: is unquote needed?
 
         map_exists = False
-        if has_set_id:
+        if bmap_set is not None:
             # we can look it up in the specific set from cache
-            for bmap in app.state.cache.beatmapset[map_set_id].maps:
+            for bmap in bmap_set.maps:
                 if map_filename == bmap.filename:
                     map_exists = True
                     break
@@ -2106,7 +2176,6 @@ async def getScores(
         return Response(f"{int(bmap.status)}|false".encode())
 
     # fetch scores & personal best
-    # TODO: create a leaderboard cache
     if not requesting_from_editor_song_select:
         score_rows, personal_best_score_row = await get_leaderboard_scores(
             leaderboard_type,
@@ -2544,11 +2613,19 @@ async def register_account(
         # they want to register the account now.
         # make the md5 & bcrypt the md5 for sql.
         pw_md5 = hashlib.md5(pw_plaintext.encode()).hexdigest().encode()
-        pw_bcrypt = bcrypt.hashpw(pw_md5, bcrypt.gensalt())
-        app.state.cache.bcrypt[pw_bcrypt] = pw_md5  # cache result for login
 
         ip = app.state.services.ip_resolver.get_ip(request.headers)
 
+        try:
+            pw_bcrypt = await app.state.services.password_hasher.hashpw(pw_md5, ip=ip)
+        except PasswordHasherOverloaded:
+            return Response(
+                content=b"Server is busy, please try again later.",
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        app.state.cache.bcrypt[pw_bcrypt] = pw_md5  # cache result for login
+
         geoloc = await app.state.services.fetch_geoloc(ip, request.headers)
         country = geoloc["country"]["acronym"] if geoloc is not None else "XX"
 
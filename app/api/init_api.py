@@ -119,6 +119,8 @@ async def lifespan(asgi_app: BanchoAPI) -> AsyncIterator[None]:
 
     await app.bg_loops.initialize_housekeeping_tasks()
 
+    app.state.services.chat_log.start()
+
     log("Startup process complete.", Ansi.LGREEN)
     log(
         f"Listening @ {app.settings.APP_HOST}:{app.settings.APP_PORT}",
@@ -136,6 +138,10 @@ async def lifespan(asgi_app: BanchoAPI) -> AsyncIterator[None]:
     await app.state.services.http_client.aclose()
     await app.state.services.database.disconnect()
     await app.state.services.redis.aclose()
+    app.state.services.password_hasher.shutdown()
+    app.state.services.performance_calculator.shutdown()
+    app.state.services.osu_file_index.close()
+    await app.state.services.chat_log.stop()
 
     if app.state.services.datadog is not None:
         app.state.services.datadog.stop()  # type: ignore[no-untyped-call]
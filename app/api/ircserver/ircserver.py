@@ -111,8 +111,9 @@ class IRCClient:
         await player.stats_from_sql_full()
  
         player.geoloc = await app.state.services.fetch_geoloc(self.ip_obj)
+        player.invalidate_packet_cache()
 
-        user_data = app.packets.user_presence(player) 
+        user_data = player.presence_packet
 
         app.state.sessions.players.append(player)
         app.state.sessions.players.enqueue(user_data)
@@ -504,11 +505,8 @@ class IRCClient:
                         )
             else:
                 await channel.send(message, fro)
-                log(
-                    f"{fro} @ {channel}: {message}",
-                    Ansi.LCYAN,
-                    file=".data/logs/chat.log",
-                )
+                log(f"{fro} @ {channel}: {message}", Ansi.LCYAN)
+                app.state.services.chat_log.write(fro, channel, message)
         else:
             recipient = await app.state.sessions.players.from_cache_or_sql(
                 name=make_safe_name(to),
@@ -526,11 +524,8 @@ class IRCClient:
                         await fro.send_bot(cmd["resp"])
             else:
                 await recipient.send(message, fro)
-                log(
-                    f"{fro} @ {recipient}: {message}",
-                    Ansi.LCYAN,
-                    file=".data/logs/chat.log",
-                )
+                log(f"{fro} @ {recipient}: {message}", Ansi.LCYAN)
+                app.state.services.chat_log.write(fro, recipient, message)
 
             return 1
  
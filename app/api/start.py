@@ -25,6 +25,30 @@ async def start_pubsub_recievers():
     asyncio.create_task(channel_wipe_reciever())
     asyncio.create_task(channel_country_change_reciever())
     asyncio.create_task(channel_name_change_reciever())
+    asyncio.create_task(channel_password_change_reciever())  # type: ignore[unused-awaitable]
+
+async def channel_password_change_reciever() -> None:
+    pubsub = app.state.services.redis.pubsub()
+    await pubsub.subscribe("password_change")
+
+    log("Subscribed to 'password_change' channel.", Ansi.LGREEN)
+
+    try:
+        async for message in pubsub.listen():
+            if message["type"] == "message":
+                data = orjson.loads(message["data"])
+
+                id = data["id"]
+
+                log(f"Received message on 'password_change'", Ansi.LBLUE)
+                log(f"EX | Password Change | ID: {id}", Ansi.LBLUE)
+                response = await change_user_password(id)
+                log(f"EX | " + response, Ansi.LBLUE)
+    except asyncio.CancelledError:
+        log("Channel password_change receiver task cancelled.", Ansi.LYELLOW)
+    finally:
+        await pubsub.unsubscribe("password_change")
+        log("Unsubscribed from 'password_change'.", Ansi.LRED)
 
 async def channel_name_change_reciever():
     pubsub = app.state.services.redis.pubsub()
@@ -3,6 +3,7 @@ import app
 from app.constants.gamemodes import GameMode
 from app.constants.privileges import Privileges
 from app.objects.beatmap import Beatmap, ensure_osu_file_is_available
+from app.objects.top_scores import invalidate_user_top_scores
 from app.repositories import maps as maps_repo
 from pytimeparse.timeparse import timeparse
 
@@ -27,6 +28,8 @@ async def wipe_user(id: int, mode: GameMode) -> str:
     
     await app.state.services.database.execute("DELETE FROM scores WHERE userid = :user_id AND mode = :mode",
         {"user_id": id, "mode": mode},)
+    app.state.cache.leaderboards.clear()
+    invalidate_user_top_scores(id)
     
     await app.state.services.database.execute(
         """
@@ -130,13 +133,30 @@ async def change_user_name(id: int, name: str) -> str:
         {"name": name, "user_id": id},
     )
 
-    target.name = name
+    app.state.sessions.players.rename(target, name)
 
     if target.is_online:
         target.logout()
 
     return "success"
 
+async def change_user_password(id: int) -> str:
+    # the old password's credentials are cached by their bcrypt hash;
+    # drop them & end any sessions logged in with the old password.
+    target = app.state.sessions.players.get(id=id)
+    if target is None:
+        return "user not online"
+
+    # (logging out removes the session from the id index)
+    while target is not None:
+        if target.pw_bcrypt is not None:
+            app.state.cache.bcrypt.invalidate(target.pw_bcrypt)
+
+        target.logout()
+        target = app.state.sessions.players.get(id=id)
+
+    return "success"
+
 async def change_bm_status(beatmap_id: int, status: int, frozen: bool) -> str:
     beatmap = await Beatmap.from_bid(beatmap_id)
 
@@ -155,6 +175,9 @@ async def change_bm_status(beatmap_id: int, status: int, frozen: bool) -> str:
     beatmap.status = status
     beatmap.frozen = frozen
 
+    # which scores award pp has changed
+    app.state.cache.top_scores.clear()
+
     return "success"
 
 async def restrict(id: int, userId: int, reason: str) -> str:
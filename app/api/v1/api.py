@@ -19,7 +19,6 @@ from fastapi.security import HTTPBearer
 
 import app.packets
 import app.state
-import app.usecases.performance
 from app.constants import regexes
 from app.constants.gamemodes import GameMode
 from app.constants.mods import Mods
@@ -34,7 +33,6 @@ from app.repositories import users as users_repo
 from app.usecases.performance import ScoreParams
 
 AVATARS_PATH = SystemPath.cwd() / ".data/avatars"
-BEATMAPS_PATH = SystemPath.cwd() / ".data/osu"
 REPLAYS_PATH = SystemPath.cwd() / ".data/osr"
 SCREENSHOTS_PATH = SystemPath.cwd() / ".data/ss"
 
@@ -125,8 +123,9 @@ async def api_calculate_pp(
             ),
         )
 
-    results = app.usecases.performance.calculate_performances(
-        str(BEATMAPS_PATH / f"{beatmap.id}.osu"),
+    results = await app.state.services.performance_calculator.calculate(
+        beatmap.id,
+        beatmap.md5,
         scores,
     )
 
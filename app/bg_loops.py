@@ -12,6 +12,7 @@ import app.state
 from app.constants.privileges import Privileges
 from app.logging import Ansi
 from app.logging import log
+from app.objects.top_scores import reconcile_top_scores
 
 OSU_CLIENT_MIN_PING_INTERVAL = 300000 // 1000  # defined by osu!
 
@@ -29,6 +30,9 @@ async def initialize_housekeeping_tasks() -> None:
                 _remove_expired_donation_privileges(interval=30 * 60),
                 _update_bot_status(interval=5 * 60),
                 _disconnect_ghosts(interval=OSU_CLIENT_MIN_PING_INTERVAL // 3),
+                _reconcile_top_scores(
+                    interval=app.settings.TOP_SCORES_RECONCILE_INTERVAL,
+                ),
                 daily_challenge_loop(),
             )
         },
@@ -81,11 +85,25 @@ async def _disconnect_ghosts(interval: int) -> None:
         current_time = time.time()
 
         for player in app.state.sessions.players:
-            if current_time - player.last_recv_time > OSU_CLIENT_MIN_PING_INTERVAL:
+            if (
+                current_time - player.last_recv_time > OSU_CLIENT_MIN_PING_INTERVAL
+                or player.packet_queue_overflowed
+            ):
                 log(f"Auto-dced {player}.", Ansi.LMAGENTA)
                 player.logout()
 
 
+async def _reconcile_top_scores(interval: int) -> None:
+    """Verify the cached top scores of users against sql."""
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            await reconcile_top_scores()
+        except Exception as exc:
+            log(f"Failed to reconcile top scores: {exc}", Ansi.LRED)
+
+
 async def _update_bot_status(interval: int) -> None:
     """Re roll the bot status, every `interval`."""
     while True:
@@ -0,0 +1,426 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Hashable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Generic
+from typing import TypeVar
+from typing import cast
+
+import app.metrics
+
+if TYPE_CHECKING:
+    from app.objects.beatmap import Beatmap
+    from app.objects.beatmap import BeatmapSet
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """\
+    A bounded mapping which evicts its least recently used entries.
+
+    Entries may optionally expire `ttl` seconds after being set, and
+    hits & misses may be exported through `app.metrics` counters.
+
+    Intended Usage:
+    >>> cache: LRUCache[bytes, bytes] = LRUCache(maxsize=2, ttl=60.0)
+    >>> cache[b"a"] = b"1"
+    >>> cache.get(b"a")
+    b'1'
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float | None = None,
+        hits_metric: str | None = None,
+        misses_metric: str | None = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits_metric = hits_metric
+        self.misses_metric = misses_metric
+
+        self.hits = 0
+        self.misses = 0
+
+        # {key: (value, expires_at), ...}, in order of least to most recently used
+        self._entries: OrderedDict[K, tuple[V, float | None]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._entries.get(cast(K, key))
+        return entry is not None and not self._expired(entry)
+
+    def _expired(self, entry: tuple[V, float | None]) -> bool:
+        expires_at = entry[1]
+        return expires_at is not None and expires_at <= time.monotonic()
+
+    def get(self, key: K) -> V | None:
+        """Get the value for `key`, marking it as recently used."""
+        entry = self._entries.get(key)
+
+        if entry is None or self._expired(entry):
+            if entry is not None:
+                del self._entries[key]
+
+            self.misses += 1
+            if self.misses_metric is not None:
+                app.metrics.increment(self.misses_metric)
+            return None
+
+        self._entries.move_to_end(key)
+
+        self.hits += 1
+        if self.hits_metric is not None:
+            app.metrics.increment(self.hits_metric)
+        return entry[0]
+
+    def peek(self, key: K) -> V | None:
+        """Get the value for `key`, without marking it as used or counting it."""
+        entry = self._entries.get(key)
+        if entry is None or self._expired(entry):
+            return None
+
+        return entry[0]
+
+    def keys(self) -> list[K]:
+        """Return a snapshot of the (unexpired) keys in the cache."""
+        return [key for key, entry in self._entries.items() if not self._expired(entry)]
+
+    def __setitem__(self, key: K, value: V) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        """Remove `key` from the cache, if present."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class SingleFlight(Generic[K, V]):
+    """\
+    Coalesces concurrent calls for the same key into one in-flight call,
+    whose result (or exception) is shared between all of its callers.
+
+    The call runs in its own task, so it isn't cancelled along with any
+    one of its callers. Falsy results (e.g. None, for things which don't
+    exist) may be remembered for `negative_ttl` seconds.
+
+    Intended Usage:
+    >>> lookups: SingleFlight[str, Beatmap | None] = SingleFlight(negative_ttl=60.0)
+    >>> await lookups.do(md5, lambda: fetch_beatmap(md5))
+    """
+
+    def __init__(self, negative_ttl: float = 0.0, max_negative: int = 10_000) -> None:
+        self.negative_ttl = negative_ttl
+
+        self._in_flight: dict[K, asyncio.Task[V]] = {}
+        self._negative: LRUCache[K, V] = LRUCache(
+            maxsize=max_negative,
+            ttl=negative_ttl,
+        )
+
+    def _on_done(self, key: K, task: asyncio.Task[V]) -> None:
+        del self._in_flight[key]
+
+        # (also marks any exception as retrieved, if all callers were cancelled)
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        if self.negative_ttl > 0 and not task.result():
+            self._negative[key] = task.result()
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[V]]) -> V:
+        """Call `fn`, unless a call for `key` is in flight, and share its result."""
+        if key in self._negative:
+            return cast(V, self._negative.peek(key))
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda task: self._on_done(key, task))
+            self._in_flight[key] = task
+
+        return await asyncio.shield(task)
+
+
+class StaleWhileRevalidateCache(Generic[K, V]):
+    """\
+    A bounded cache of fetched values, which are served for `ttl` seconds,
+    and then (while stale) for up to `stale_ttl` more while being refetched
+    in the background.
+
+    Concurrent misses for the same key share one fetch, and fetches which
+    fail (returning None) aren't cached. Hits, misses & the hit ratio may be
+    exported through `app.metrics`.
+
+    Intended Usage:
+    >>> cache: StaleWhileRevalidateCache[str, bytes] = StaleWhileRevalidateCache(
+    ...     maxsize=1000, ttl=60.0, stale_ttl=600.0,
+    ... )
+    >>> await cache.get_or_fetch(query, lambda: search(query))
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        stale_ttl: float,
+        hits_metric: str | None = None,
+        misses_metric: str | None = None,
+        hit_ratio_metric: str | None = None,
+    ) -> None:
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits_metric = hits_metric
+        self.misses_metric = misses_metric
+        self.hit_ratio_metric = hit_ratio_metric
+
+        self.hits = 0
+        self.misses = 0
+
+        # {key: (value, fetched_at), ...}; expires once no longer servable
+        self._entries: LRUCache[K, tuple[V, float]] = LRUCache(
+            maxsize=maxsize,
+            ttl=ttl + stale_ttl,
+        )
+        self._fetches: SingleFlight[K, V | None] = SingleFlight()
+
+        # (also keeps references to the otherwise unawaited revalidation tasks)
+        self._revalidations: dict[K, asyncio.Task[V | None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _record_lookup(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+            metric = self.hits_metric
+        else:
+            self.misses += 1
+            metric = self.misses_metric
+
+        if metric is not None:
+            app.metrics.increment(metric)
+
+        if self.hit_ratio_metric is not None:
+            app.metrics.set_gauge(
+                self.hit_ratio_metric,
+                self.hits / (self.hits + self.misses),
+            )
+
+    async def _fetch(self, key: K, fn: Callable[[], Awaitable[V | None]]) -> V | None:
+        value = await fn()
+        if value is not None:
+            self._entries[key] = (value, time.monotonic())
+
+        return value
+
+    def _revalidate(self, key: K, fn: Callable[[], Awaitable[V | None]]) -> None:
+        if key in self._revalidations:
+            return
+
+        task = asyncio.ensure_future(
+            self._fetches.do(key, lambda: self._fetch(key, fn)),
+        )
+        task.add_done_callback(lambda task: self._on_revalidated(key, task))
+        self._revalidations[key] = task
+
+    def _on_revalidated(self, key: K, task: asyncio.Task[V | None]) -> None:
+        del self._revalidations[key]
+
+        # a failed revalidation leaves the stale entry to be served (& retried)
+        if not task.cancelled():
+            task.exception()
+
+    async def get_or_fetch(
+        self,
+        key: K,
+        fn: Callable[[], Awaitable[V | None]],
+    ) -> V | None:
+        """\
+        Get the value for `key`, calling `fn` to fetch it if it isn't cached,
+        or to refetch it in the background if it's stale.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            self._record_lookup(hit=True)
+
+            if time.monotonic() - fetched_at >= self.ttl:
+                self._revalidate(key, fn)
+
+            return value
+
+        self._record_lookup(hit=False)
+        return await self._fetches.do(key, lambda: self._fetch(key, fn))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def _estimate_beatmap_size(beatmap: Beatmap) -> int:
+    # the object, its attribute dict & its (mostly unshared) values
+    attrs = vars(beatmap)
+    return (
+        sys.getsizeof(beatmap)
+        + sys.getsizeof(attrs)
+        + sum(sys.getsizeof(value) for name, value in attrs.items() if name != "set")
+    )
+
+
+@dataclass
+class _BeatmapSetEntry:
+    beatmap_set: BeatmapSet
+    nbytes: int
+
+    # the set's maps, by their md5 & id when indexed
+    maps: list[tuple[str, int, Beatmap]]
+
+
+class BeatmapCache:
+    """\
+    A cache of beatmap sets, with their beatmaps indexed by md5 & id.
+
+    Sets are the cache's entries: a lookup of any of a set's maps marks the
+    whole set as recently used, and sets are evicted (along with all of
+    their maps' index entries) least recently used first, once the cache's
+    estimated size exceeds `max_bytes`.
+
+    Entry & byte counts, and the hit ratio are exported through `app.metrics`.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+
+        # {set id: entry, ...}, in order of least to most recently used
+        self._sets: OrderedDict[int, _BeatmapSetEntry] = OrderedDict()
+
+        self._by_md5: dict[str, Beatmap] = {}
+        self._by_id: dict[int, Beatmap] = {}
+
+    def __len__(self) -> int:
+        return len(self._sets)
+
+    @property
+    def num_maps(self) -> int:
+        return len(self._by_id)
+
+    def _record_lookup(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+            app.metrics.increment("ex_beatmap_cache_hits")
+        else:
+            self.misses += 1
+            app.metrics.increment("ex_beatmap_cache_misses")
+
+        app.metrics.set_gauge(
+            "ex_beatmap_cache_hit_ratio",
+            self.hits / (self.hits + self.misses),
+        )
+
+    def _record_size(self) -> None:
+        app.metrics.set_gauge("ex_beatmap_cache_sets", len(self._sets))
+        app.metrics.set_gauge("ex_beatmap_cache_maps", len(self._by_id))
+        app.metrics.set_gauge("ex_beatmap_cache_bytes", self.nbytes)
+
+    def _lookup(self, beatmap: Beatmap | None) -> Beatmap | None:
+        if beatmap is not None:
+            self._sets.move_to_end(beatmap.set.id)
+
+        self._record_lookup(beatmap is not None)
+        return beatmap
+
+    def get_set(self, set_id: int) -> BeatmapSet | None:
+        """Get a beatmap set by id, marking it as recently used."""
+        entry = self._sets.get(set_id)
+        if entry is not None:
+            self._sets.move_to_end(set_id)
+
+        self._record_lookup(entry is not None)
+        return entry.beatmap_set if entry is not None else None
+
+    def peek_set(self, set_id: int) -> BeatmapSet | None:
+        """Get a beatmap set by id, without marking it as used or counting it."""
+        entry = self._sets.get(set_id)
+        return entry.beatmap_set if entry is not None else None
+
+    def get_by_md5(self, md5: str) -> Beatmap | None:
+        """Get a beatmap by md5, marking its set as recently used."""
+        beatmap = self._by_md5.get(md5)
+        if beatmap is not None and beatmap.md5 != md5:
+            beatmap = None  # updated since being cached
+
+        return self._lookup(beatmap)
+
+    def get_by_id(self, id: int) -> Beatmap | None:
+        """Get a beatmap by id, marking its set as recently used."""
+        return self._lookup(self._by_id.get(id))
+
+    def add_set(self, beatmap_set: BeatmapSet) -> None:
+        """Add (or update) a beatmap set & its maps, evicting sets as needed."""
+        self._remove_set(beatmap_set.id)
+
+        entry = _BeatmapSetEntry(beatmap_set, sys.getsizeof(beatmap_set), [])
+        for beatmap in beatmap_set.maps:
+            self._by_md5[beatmap.md5] = beatmap
+            self._by_id[beatmap.id] = beatmap
+
+            entry.maps.append((beatmap.md5, beatmap.id, beatmap))
+            entry.nbytes += _estimate_beatmap_size(beatmap)
+
+        self._sets[beatmap_set.id] = entry
+        self.nbytes += entry.nbytes
+
+        # (always keeping the newly added set)
+        while self.nbytes > self.max_bytes and len(self._sets) > 1:
+            self._remove_set(next(iter(self._sets)))
+
+        self._record_size()
+
+    def _remove_set(self, set_id: int) -> None:
+        entry = self._sets.pop(set_id, None)
+        if entry is None:
+            return
+
+        self.nbytes -= entry.nbytes
+
+        for md5, id, beatmap in entry.maps:
+            if self._by_md5.get(md5) is beatmap:
+                del self._by_md5[md5]
+            if self._by_id.get(id) is beatmap:
+                del self._by_id[id]
+
+    def invalidate_set(self, set_id: int) -> None:
+        """Remove a beatmap set & its maps from the cache, if present."""
+        self._remove_set(set_id)
+        self._record_size()
+
+    def clear(self) -> None:
+        self._sets.clear()
+        self._by_md5.clear()
+        self._by_id.clear()
+        self.nbytes = 0
+        self._record_size()
@@ -17,7 +17,6 @@ from dataclasses import dataclass
 from datetime import datetime
 from datetime import timedelta
 from functools import wraps
-from pathlib import Path
 from time import perf_counter_ns as clock_ns
 from typing import TYPE_CHECKING
 from typing import Any
@@ -39,7 +38,6 @@ import app.logging
 import app.packets
 import app.settings
 import app.state
-import app.usecases.performance
 import app.utils
 from app.constants import regexes
 from app.constants.gamemodes import GAMEMODE_REPR_LIST
@@ -52,6 +50,7 @@ from app.logging import log
 from app.objects.beatmap import Beatmap
 from app.objects.beatmap import RankedStatus
 from app.objects.beatmap import ensure_osu_file_is_available
+from app.objects.leaderboard import invalidate_map_leaderboards
 from app.objects.match import Match
 from app.objects.match import MatchTeams
 from app.objects.match import MatchTeamTypes
@@ -72,9 +71,6 @@ if TYPE_CHECKING:
     from app.objects.channel import Channel
 
 
-BEATMAPS_PATH = Path.cwd() / ".data/osu"
-
-
 @dataclass
 class Context:
     player: Player
@@ -271,6 +267,7 @@ async def block(ctx: Context) -> str | None:
 
     if target.id in ctx.player.friends:
         ctx.player.friends.remove(target.id)
+        app.state.sessions.players.update_pres_filter_views(ctx.player)
 
     await ctx.player.add_block(target)
     return f"Added {target.name} to blocked users."
@@ -565,8 +562,9 @@ async def _with(ctx: Context) -> str | None:
         score_args.acc = acc
         msg_fields.append(f"{acc:.2f}%")
 
-    result = app.usecases.performance.calculate_performances(
-        osu_file_path=str(BEATMAPS_PATH / f"{bmap.id}.osu"),
+    result = await app.state.services.performance_calculator.calculate(
+        bmap.id,
+        bmap.md5,
         scores=[score_args],  # calculate one score
     )
 
@@ -711,7 +709,7 @@ async def _map(ctx: Context) -> str | None:
                 await maps_repo.partial_update(_bmap.id, status=new_status, frozen=True)
 
             # make sure cache and db are synced about the newest change
-            for _bmap in app.state.cache.beatmapset[bmap.set_id].maps:
+            for _bmap in bmap.set.maps:
                 _bmap.status = new_status
                 _bmap.frozen = True
 
@@ -729,14 +727,19 @@ async def _map(ctx: Context) -> str | None:
             await maps_repo.partial_update(bmap.id, status=new_status, frozen=True)
 
             # make sure cache and db are synced about the newest change
-            if bmap.md5 in app.state.cache.beatmap:
-                app.state.cache.beatmap[bmap.md5].status = new_status
-                app.state.cache.beatmap[bmap.md5].frozen = True
+            cached = app.state.cache.beatmaps.get_by_md5(bmap.md5)
+            if cached is not None:
+                cached.status = new_status
+                cached.frozen = True
 
             modified_beatmap_ids = [bmap.id]
 
         # deactivate rank requests for all ids
         await map_requests_repo.mark_batch_as_inactive(map_ids=modified_beatmap_ids)
+
+    # which scores award pp has changed
+    app.state.cache.top_scores.clear()
+
     pubsub = app.state.services.redis.pubsub()
     data = json.dumps({"map_ids": modified_beatmap_ids, "ranktype": ranktype, "type": ctx.args[0]})
     await pubsub.execute_command("PUBLISH", "ex:map_status_change", data)
@@ -1294,6 +1297,8 @@ async def wipemap(ctx: Context) -> str | None:
         "DELETE FROM scores WHERE map_md5 = :map_md5",
         {"map_md5": map_md5},
     )
+    invalidate_map_leaderboards(map_md5)
+    app.state.cache.top_scores.clear()
 
     return "Scores wiped."
 
@@ -12,6 +12,36 @@ METRICS = {
     "ex_first_place_webhook": Counter("ex_first_place_webhook", "First place webhooks send"),
     "ex_chat_messages": Counter("ex_chat_messages", "Total number of chat messages sent"),
     "ex_logins": Counter("ex_logins", "Total number of logins"),
+    "ex_bcrypt_queue_depth": Gauge("ex_bcrypt_queue_depth_g", "Number of bcrypt operations currently queued or running"),
+    "ex_bcrypt_rejected": Counter("ex_bcrypt_rejected", "Total number of bcrypt operations rejected due to load"),
+    "ex_bcrypt_cache_hits": Counter("ex_bcrypt_cache_hits", "Total number of bcrypt credential cache hits"),
+    "ex_bcrypt_cache_misses": Counter("ex_bcrypt_cache_misses", "Total number of bcrypt credential cache misses"),
+    "ex_leaderboard_cache_hits": Counter("ex_leaderboard_cache_hits", "Total number of beatmap leaderboard cache hits"),
+    "ex_leaderboard_cache_misses": Counter("ex_leaderboard_cache_misses", "Total number of beatmap leaderboard cache misses"),
+    "ex_top_scores_cache_hits": Counter("ex_top_scores_cache_hits", "Total number of user top scores cache hits"),
+    "ex_top_scores_cache_misses": Counter("ex_top_scores_cache_misses", "Total number of user top scores cache misses"),
+    "ex_beatmap_cache_hits": Counter("ex_beatmap_cache_hits", "Total number of beatmap (& beatmap set) cache hits"),
+    "ex_beatmap_cache_misses": Counter("ex_beatmap_cache_misses", "Total number of beatmap (& beatmap set) cache misses"),
+    "ex_beatmap_cache_hit_ratio": Gauge("ex_beatmap_cache_hit_ratio_g", "Ratio of beatmap (& beatmap set) cache lookups which were hits"),
+    "ex_beatmap_cache_sets": Gauge("ex_beatmap_cache_sets_g", "Number of beatmap sets in the beatmap cache"),
+    "ex_beatmap_cache_maps": Gauge("ex_beatmap_cache_maps_g", "Number of beatmaps in the beatmap cache"),
+    "ex_beatmap_cache_bytes": Gauge("ex_beatmap_cache_bytes_g", "Estimated size of the beatmap cache in bytes"),
+    "ex_direct_search_cache_hits": Counter("ex_direct_search_cache_hits", "Total number of osu!direct search cache hits (including stale hits)"),
+    "ex_direct_search_cache_misses": Counter("ex_direct_search_cache_misses", "Total number of osu!direct search cache misses"),
+    "ex_direct_search_cache_hit_ratio": Gauge("ex_direct_search_cache_hit_ratio_g", "Ratio of osu!direct search cache lookups which were hits"),
+    "ex_direct_search_upstream_time": Histogram("ex_direct_search_upstream_time", "Beatmap mirror search request latency in seconds"),
+    "ex_top_scores_reconciled": Counter("ex_top_scores_reconciled", "Total number of cached user top scores found to have drifted from sql"),
+    "ex_bcrypt_time": Histogram("ex_bcrypt_time", "bcrypt operation latency in seconds (including time queued)"),
+    "ex_packet_queue_bytes": Histogram("ex_packet_queue_bytes", "Size of players' outbound packet queues when sent, in bytes", buckets=(64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)),
+    "ex_packet_queue_overflows": Counter("ex_packet_queue_overflows", "Total number of players' outbound packet queues exceeding their byte limit"),
+    "ex_chat_log_batch_lines": Histogram("ex_chat_log_batch_lines", "Number of chat log lines written per batch", buckets=(1, 4, 16, 64, 256, 1024, 4096, 16384, 65536)),
+    "ex_chat_log_dropped": Counter("ex_chat_log_dropped", "Total number of chat log lines dropped due to a full buffer"),
+    "ex_performance_calc_time": Histogram("ex_performance_calc_time", "Performance calculation latency in seconds (including time queued)"),
+    "ex_db_query_time": Histogram("ex_db_query_time", "Database query latency in seconds, by query fingerprint", ["query"]),
+    "ex_db_pool_wait_time": Histogram("ex_db_pool_wait_time", "Time spent waiting for a database connection from the pool in seconds"),
+    "ex_db_pool_waiting": Gauge("ex_db_pool_waiting_g", "Number of queries currently waiting for a database connection from the pool"),
+    "ex_db_statement_cache_hits": Counter("ex_db_statement_cache_hits", "Total number of compiled SQL statement cache hits"),
+    "ex_db_statement_cache_misses": Counter("ex_db_statement_cache_misses", "Total number of compiled SQL statement cache misses"),
 }
 
 enabled = app.settings.ENABLE_PROMETHEUS
@@ -50,8 +80,8 @@ def decrement(metric: str):
 
     metric_object.dec()
 
-def histrogram(metric: str, value: float):
-    """Records a value for the specified histogram metric."""
+def set_gauge(metric: str, value: float) -> None:
+    """Sets the specified gauge metric to a value."""
     if not enabled:
         return
 
@@ -59,4 +89,21 @@ def histrogram(metric: str, value: float):
     if metric_object is None:
         raise ValueError(f"Invalid metric name: {metric}")
 
+    if not isinstance(metric_object, Gauge):
+        raise ValueError(f"Not a gauge metric: {metric}")
+
+    metric_object.set(value)
+
+def histrogram(metric: str, value: float, labels: dict[str, str] | None = None):
+    """Records a value for the specified histogram metric (with the given labels, if any)."""
+    if not enabled:
+        return
+
+    metric_object = METRICS.get(metric)
+    if metric_object is None:
+        raise ValueError(f"Invalid metric name: {metric}")
+
+    if labels is not None:
+        metric_object = metric_object.labels(**labels)
+
     metric_object.observe(value)
\ No newline at end of file
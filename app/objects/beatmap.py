@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import functools
-import hashlib
 from collections import defaultdict
 from collections.abc import Mapping
 from datetime import datetime
@@ -19,6 +18,7 @@ from tenacity.stop import stop_after_attempt
 import app.settings
 import app.state
 import app.utils
+from app.caching import SingleFlight
 from app.constants.gamemodes import GameMode
 from app.logging import Ansi
 from app.logging import log
@@ -34,6 +34,22 @@ DEFAULT_LAST_UPDATE = datetime(1970, 1, 1)
 
 IGNORED_BEATMAP_CHARS = dict.fromkeys(map(ord, r':\/*<>?"|'), None)
 
+# in-flight lookups & downloads, shared between concurrent callers; maps
+# which don't exist (& failed downloads) are remembered for a short time.
+_md5_lookups: SingleFlight[str, Beatmap | None] = SingleFlight(
+    negative_ttl=app.settings.BEATMAP_NEGATIVE_CACHE_TTL,
+)
+_bid_lookups: SingleFlight[int, Beatmap | None] = SingleFlight(
+    negative_ttl=app.settings.BEATMAP_NEGATIVE_CACHE_TTL,
+)
+_bsid_lookups: SingleFlight[int, BeatmapSet | None] = SingleFlight(
+    negative_ttl=app.settings.BEATMAP_NEGATIVE_CACHE_TTL,
+)
+_set_updates: SingleFlight[int, None] = SingleFlight()
+_osu_file_downloads: SingleFlight[tuple[int, str | None], bool] = SingleFlight(
+    negative_ttl=app.settings.BEATMAP_NEGATIVE_CACHE_TTL,
+)
+
 
 class BeatmapApiResponse(TypedDict):
     data: list[dict[str, Any]] | None
@@ -114,17 +130,15 @@ def disk_has_expected_osu_file(
     beatmap_id: int,
     expected_md5: str | None = None,
 ) -> bool:
-    osu_file_path = BEATMAPS_PATH / f"{beatmap_id}.osu"
-    file_exists = osu_file_path.exists()
-    if file_exists and expected_md5 is not None:
-        osu_file_md5 = hashlib.md5(osu_file_path.read_bytes()).hexdigest()
-        return osu_file_md5 == expected_md5
-    return file_exists
+    if expected_md5 is None:
+        return (BEATMAPS_PATH / f"{beatmap_id}.osu").exists()
+
+    # (only rehashed if the file has changed since last hashed)
+    return app.state.services.osu_file_index.md5(beatmap_id) == expected_md5
 
 
 def write_osu_file_to_disk(beatmap_id: int, data: bytes) -> None:
-    osu_file_path = BEATMAPS_PATH / f"{beatmap_id}.osu"
-    osu_file_path.write_bytes(data)
+    app.state.services.osu_file_index.write(beatmap_id, data)
 
 
 async def ensure_osu_file_is_available(
@@ -143,6 +157,35 @@ async def ensure_osu_file_is_available(
     if disk_has_expected_osu_file(beatmap_id, expected_md5):
         return True
 
+    # concurrent requests for the same file share one download
+    return await _osu_file_downloads.do(
+        (beatmap_id, expected_md5),
+        lambda: _download_osu_file(beatmap_id),
+    )
+
+
+async def _delete_scores_on_maps(map_md5s: set[str]) -> None:
+    """Delete all scores on the given maps, & their users' cached top scores."""
+    # the users (& modes) whose top scores may include them
+    top_scores_keys = [
+        (row["userid"], GameMode(row["mode"]))
+        for row in await app.state.services.database.fetch_all(
+            "SELECT DISTINCT userid, mode FROM scores "
+            "WHERE map_md5 IN :map_md5s AND status = 2",  # 2: =best score
+            {"map_md5s": map_md5s},
+        )
+    ]
+
+    await app.state.services.database.execute(
+        "DELETE FROM scores WHERE map_md5 IN :map_md5s",
+        {"map_md5s": map_md5s},
+    )
+
+    for key in top_scores_keys:
+        app.state.cache.top_scores.invalidate(key)
+
+
+async def _download_osu_file(beatmap_id: int) -> bool:
     try:
         latest_osu_file = await api_get_osu_file(beatmap_id)
     except httpx.HTTPStatusError:
@@ -436,44 +479,51 @@ class Beatmap:
         bmap = await cls._from_md5_cache(md5)
 
         if not bmap:
-            # map not found in cache
+            # map not found in cache; concurrent
+            # lookups of the map share one request
+            return await _md5_lookups.do(
+                md5,
+                lambda: cls._from_md5_uncached(md5, set_id),
+            )
 
-            # to be efficient, we want to cache the whole set
-            # at once rather than caching the individual map
+        if bmap.set._cache_expired():
+            await bmap.set._update_if_available()
 
-            if set_id <= 0:
-                # set id not provided - fetch it from the map md5
-                rec = await maps_repo.fetch_one(md5=md5)
+        return bmap
 
-                if rec is not None:
-                    # set found in db
-                    set_id = rec["set_id"]
-                else:
-                    # set not found in db, try api
-                    api_data = await api_get_beatmaps(h=md5)
+    @classmethod
+    async def _from_md5_uncached(cls, md5: str, set_id: int) -> Beatmap | None:
+        # to be efficient, we want to cache the whole set
+        # at once rather than caching the individual map
+
+        if set_id <= 0:
+            # set id not provided - fetch it from the map md5
+            rec = await maps_repo.fetch_one(md5=md5)
 
-                    if api_data["data"] is None:
-                        return None
+            if rec is not None:
+                # set found in db
+                set_id = rec["set_id"]
+            else:
+                # set not found in db, try api
+                api_data = await api_get_beatmaps(h=md5)
 
-                    api_response = api_data["data"]
-                    set_id = int(api_response[0]["beatmapset_id"])
+                if api_data["data"] is None:
+                    return None
 
-            # fetch (and cache) beatmap set
-            beatmap_set = await BeatmapSet.from_bsid(set_id)
+                api_response = api_data["data"]
+                set_id = int(api_response[0]["beatmapset_id"])
 
-            if beatmap_set is not None:
-                # the beatmap set has been cached - fetch beatmap from cache
-                bmap = await cls._from_md5_cache(md5)
+        # fetch (and cache) beatmap set
+        beatmap_set = await BeatmapSet.from_bsid(set_id)
 
-                # XXX:HACK in this case, BeatmapSet.from_bsid will have
-                # ensured the map is up to date, so we can just return it
-                return bmap
+        if beatmap_set is None:
+            return None
 
-        if bmap is not None:
-            if bmap.set._cache_expired():
-                await bmap.set._update_if_available()
+        # the beatmap set has been cached - fetch beatmap from cache
 
-        return bmap
+        # XXX:HACK in this case, BeatmapSet.from_bsid will have
+        # ensured the map is up to date, so we can just return it
+        return await cls._from_md5_cache(md5)
 
     @classmethod
     async def from_bid(cls, bid: int) -> Beatmap | None:
@@ -481,42 +531,46 @@ class Beatmap:
         bmap = await cls._from_bid_cache(bid)
 
         if not bmap:
-            # map not found in cache
+            # map not found in cache; concurrent
+            # lookups of the map share one request
+            return await _bid_lookups.do(bid, lambda: cls._from_bid_uncached(bid))
 
-            # to be efficient, we want to cache the whole set
-            # at once rather than caching the individual map
+        if bmap.set._cache_expired():
+            await bmap.set._update_if_available()
 
-            rec = await maps_repo.fetch_one(id=bid)
+        return bmap
 
-            if rec is not None:
-                # set found in db
-                set_id = rec["set_id"]
-            else:
-                # set not found in db, try getting via api
-                api_data = await api_get_beatmaps(b=bid)
+    @classmethod
+    async def _from_bid_uncached(cls, bid: int) -> Beatmap | None:
+        # to be efficient, we want to cache the whole set
+        # at once rather than caching the individual map
 
-                if api_data["data"] is None:
-                    return None
+        rec = await maps_repo.fetch_one(id=bid)
 
-                api_response = api_data["data"]
-                set_id = int(api_response[0]["beatmapset_id"])
+        if rec is not None:
+            # set found in db
+            set_id = rec["set_id"]
+        else:
+            # set not found in db, try getting via api
+            api_data = await api_get_beatmaps(b=bid)
 
-            # fetch (and cache) beatmap set
-            beatmap_set = await BeatmapSet.from_bsid(set_id)
+            if api_data["data"] is None:
+                return None
 
-            if beatmap_set is not None:
-                # the beatmap set has been cached - fetch beatmap from cache
-                bmap = await cls._from_bid_cache(bid)
+            api_response = api_data["data"]
+            set_id = int(api_response[0]["beatmapset_id"])
 
-                # XXX:HACK in this case, BeatmapSet.from_bsid will have
-                # ensured the map is up to date, so we can just return it
-                return bmap
+        # fetch (and cache) beatmap set
+        beatmap_set = await BeatmapSet.from_bsid(set_id)
 
-        if bmap is not None:
-            if bmap.set._cache_expired():
-                await bmap.set._update_if_available()
+        if beatmap_set is None:
+            return None
 
-        return bmap
+        # the beatmap set has been cached - fetch beatmap from cache
+
+        # XXX:HACK in this case, BeatmapSet.from_bsid will have
+        # ensured the map is up to date, so we can just return it
+        return await cls._from_bid_cache(bid)
 
     """ Lower level API """
     # These functions are meant for internal use under
@@ -586,12 +640,12 @@ class Beatmap:
     @staticmethod
     async def _from_md5_cache(md5: str) -> Beatmap | None:
         """Fetch a map from the cache by md5."""
-        return app.state.cache.beatmap.get(md5, None)
+        return app.state.cache.beatmaps.get_by_md5(md5)
 
     @staticmethod
     async def _from_bid_cache(bid: int) -> Beatmap | None:
         """Fetch a map from the cache by id."""
-        return app.state.cache.beatmap.get(bid, None)
+        return app.state.cache.beatmaps.get_by_id(bid)
 
 
 class BeatmapSet:
@@ -620,6 +674,7 @@ class BeatmapSet:
 
       BeatmapSet._cache_expired() -> bool
       await BeatmapSet._update_if_available() -> None
+      await BeatmapSet._update_from_osuapi() -> None
       await BeatmapSet._save_to_sql() -> None
     """
 
@@ -686,7 +741,10 @@ class BeatmapSet:
     async def _update_if_available(self) -> None:
         """Fetch the newest data from the api, check for differences
         and propogate any update into our cache & database."""
+        # concurrent update checks of the set share one request
+        await _set_updates.do(self.id, self._update_from_osuapi)
 
+    async def _update_from_osuapi(self) -> None:
         try:
             api_data = await api_get_beatmaps(s=self.id)
         except (httpx.TransportError, httpx.DecodingError):
@@ -760,6 +818,7 @@ class BeatmapSet:
 
             # save changes to cache
             self.maps = updated_maps
+            cache_beatmap_set(self)
 
             # save changes to sql
 
@@ -771,10 +830,7 @@ class BeatmapSet:
                 )
 
                 # delete scores on the maps
-                await app.state.services.database.execute(
-                    "DELETE FROM scores WHERE map_md5 IN :map_md5s",
-                    {"map_md5s": map_md5s_to_delete},
-                )
+                await _delete_scores_on_maps(map_md5s_to_delete)
 
             # update last_osuapi_check
             await app.state.services.database.execute(
@@ -807,10 +863,7 @@ class BeatmapSet:
                 )
 
                 # delete scores on the maps
-                await app.state.services.database.execute(
-                    "DELETE FROM scores WHERE map_md5 IN :map_md5s",
-                    {"map_md5s": map_md5s_to_delete},
-                )
+                await _delete_scores_on_maps(map_md5s_to_delete)
 
             # delete set
             await app.state.services.database.execute(
@@ -869,7 +922,7 @@ class BeatmapSet:
     @staticmethod
     async def _from_bsid_cache(bsid: int) -> BeatmapSet | None:
         """Fetch a mapset from the cache by set id."""
-        return app.state.cache.beatmapset.get(bsid, None)
+        return app.state.cache.beatmaps.get_set(bsid)
 
     @classmethod
     async def _from_bsid_sql(cls, bsid: int) -> BeatmapSet | None:
@@ -992,22 +1045,34 @@ class BeatmapSet:
         """Cache all maps in a set from the osuapi, optionally
         returning beatmaps by their md5 or id."""
         bmap_set = await cls._from_bsid_cache(bsid)
+
+        if not bmap_set:
+            # set not found in cache; concurrent
+            # lookups of the set share one request
+            return await _bsid_lookups.do(bsid, lambda: cls._from_bsid_uncached(bsid))
+
+        # TODO: this can be done less often for certain types of maps,
+        # such as ones that're ranked on bancho and won't be updated,
+        # and perhaps ones that haven't been updated in a long time.
+        if bmap_set._cache_expired():
+            await bmap_set._update_if_available()
+
+        return bmap_set
+
+    @classmethod
+    async def _from_bsid_uncached(cls, bsid: int) -> BeatmapSet | None:
         did_api_request = False
 
+        bmap_set = await cls._from_bsid_sql(bsid)
+
         if not bmap_set:
-            bmap_set = await cls._from_bsid_sql(bsid)
+            bmap_set = await cls._from_bsid_osuapi(bsid)
 
             if not bmap_set:
-                bmap_set = await cls._from_bsid_osuapi(bsid)
+                return None
 
-                if not bmap_set:
-                    return None
+            did_api_request = True
 
-                did_api_request = True
-
-        # TODO: this can be done less often for certain types of maps,
-        # such as ones that're ranked on bancho and won't be updated,
-        # and perhaps ones that haven't been updated in a long time.
         if not did_api_request and bmap_set._cache_expired():
             await bmap_set._update_if_available()
 
@@ -1018,15 +1083,6 @@ class BeatmapSet:
         return bmap_set
 
 
-def cache_beatmap(beatmap: Beatmap) -> None:
-    """Add the beatmap to the cache."""
-    app.state.cache.beatmap[beatmap.md5] = beatmap
-    app.state.cache.beatmap[beatmap.id] = beatmap
-
-
 def cache_beatmap_set(beatmap_set: BeatmapSet) -> None:
     """Add the beatmap set, and each beatmap to the cache."""
-    app.state.cache.beatmapset[beatmap_set.id] = beatmap_set
-
-    for beatmap in beatmap_set.maps:
-        cache_beatmap(beatmap)
+    app.state.cache.beatmaps.add_set(beatmap_set)
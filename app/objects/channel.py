@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections.abc import Hashable
 from collections.abc import Sequence
 from typing import TYPE_CHECKING
 
@@ -130,8 +131,13 @@ class Channel:
             # the channel from the global list.
             app.state.sessions.channels.remove(self)
 
-    def enqueue(self, data: bytes, immune: Sequence[int] = []) -> None:
+    def enqueue(
+        self,
+        data: bytes,
+        immune: Sequence[int] = [],
+        key: Hashable | None = None,
+    ) -> None:
         """Enqueue `data` to all connected clients not in `immune`."""
         for player in self.players:
             if player.id not in immune:
-                player.enqueue(data)
+                player.enqueue(data, key)
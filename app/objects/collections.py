@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+from collections.abc import Hashable
 from collections.abc import Iterable
 from collections.abc import Iterator
+from collections.abc import KeysView
 from collections.abc import Sequence
 from typing import Any
 import random
@@ -12,18 +14,23 @@ import databases.core
 import app.settings
 import app.state
 import app.utils
+from app.adapters.password_hasher import PasswordHasherOverloaded
 from app.constants.gamemodes import GameMode
 from app.constants.privileges import ClanPrivileges
 from app.constants.privileges import Privileges
 from app.logging import Ansi
 from app.logging import log
 from app.objects.channel import Channel
+from app.objects.leaderboard import fetch_leaderboard
+from app.objects.leaderboard import scoring_metric_for
 from app.objects.match import Match
 from app.objects.player import Action
 from app.objects.player import Player
+from app.objects.player import PresenceFilter
 from app.repositories import channels as channels_repo
 from app.repositories import clans as clans_repo
 from app.repositories import users as users_repo
+from app.usecases.leaderboards import rebuild_leaderboards
 from app.utils import make_safe_name
 
 
@@ -124,11 +131,46 @@ class Matches(list[Match | None]):
 
 
 class Players(list[Player]):
-    """The currently active players on the server."""
+    """The currently active players on the server.
+
+    Alongside the list itself, we maintain hash indexes by token,
+    id, safe name & irc key so that lookups (done on every bancho
+    request) don't need to walk the entire list of online players.
+    """
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
 
+        # {key: [player, ...]} - multiple sessions may share an id
+        # or name (e.g. tourney clients), the first one added wins.
+        self._by_token: dict[str, list[Player]] = {}
+        self._by_id: dict[int, list[Player]] = {}
+        self._by_safe_name: dict[str, list[Player]] = {}
+        self._by_irc_key: dict[str, list[Player]] = {}
+
+        # the keys each player was indexed under, so that we can
+        # still remove them after their token/name have changed.
+        self._index_keys: dict[Player, tuple[str, int, str, str | None]] = {}
+
+        # privilege views, maintained as players are added/removed and
+        # as their privileges change. dicts are used as ordered sets so
+        # that views iterate in login order.
+        self._staff: dict[Player, None] = {}
+        self._restricted: dict[Player, None] = {}
+        self._unrestricted: dict[Player, None] = {}
+        self._unrestricted_ids: dict[int, int] = {}  # {id: session count}
+
+        # presence filter views, for fanning out stats updates; those
+        # filtering by friends are also indexed by each of their friends.
+        self._pres_filter_all: dict[Player, None] = {}
+        self._pres_filter_friends: dict[int, dict[Player, None]] = {}
+        self._pres_filter_keys: dict[Player, tuple[PresenceFilter, frozenset[int]]] = {}
+
+        for player in self:
+            self._add_to_indexes(player)
+            self._add_to_priv_views(player)
+            self._add_to_pres_filter_views(player)
+
     def __iter__(self) -> Iterator[Player]:
         return super().__iter__()
 
@@ -136,9 +178,12 @@ class Players(list[Player]):
         # allow us to either pass in the player
         # obj, or the player name as a string.
         if isinstance(player, str):
-            return player in (player.name for player in self)
+            return any(
+                p.name == player
+                for p in self._by_safe_name.get(make_safe_name(player), ())
+            )
         else:
-            return super().__contains__(player)
+            return player in self._index_keys
 
     def __repr__(self) -> str:
         return f'[{", ".join(map(repr, self))}]'
@@ -146,28 +191,176 @@ class Players(list[Player]):
     @property
     def ids(self) -> set[int]:
         """Return a set of the current ids in the list."""
-        return {p.id for p in self}
+        return set(self._by_id)
+
+    # NOTE: the views below are live & read-only; they're
+    # updated in place as players log in/out or change privs.
 
     @property
-    def staff(self) -> set[Player]:
+    def staff(self) -> KeysView[Player]:
         """Return a set of the current staff online."""
-        return {p for p in self if p.priv & Privileges.STAFF}
+        return self._staff.keys()
 
     @property
-    def restricted(self) -> set[Player]:
+    def restricted(self) -> KeysView[Player]:
         """Return a set of the current restricted players."""
-        return {p for p in self if not p.priv & Privileges.UNRESTRICTED}
+        return self._restricted.keys()
 
     @property
-    def unrestricted(self) -> set[Player]:
+    def unrestricted(self) -> KeysView[Player]:
         """Return a set of the current unrestricted players."""
-        return {p for p in self if p.priv & Privileges.UNRESTRICTED}
+        return self._unrestricted.keys()
+
+    @property
+    def unrestricted_ids(self) -> KeysView[int]:
+        """Return the ids of the current unrestricted players, in login order."""
+        return self._unrestricted_ids.keys()
 
-    def enqueue(self, data: bytes, immune: Sequence[Player] = []) -> None:
+    def enqueue(
+        self,
+        data: bytes,
+        immune: Sequence[Player] = [],
+        key: Hashable | None = None,
+    ) -> None:
         """Enqueue `data` to all players, except for those in `immune`."""
         for player in self:
             if player not in immune:
-                player.enqueue(data)
+                player.enqueue(data, key=key)
+
+    def enqueue_stats(self, player: Player) -> None:
+        """\
+        Enqueue `player`'s stats to the players who can see them.
+
+        That's the player themself, their spectators & match, and those
+        whose presence filter shows them (everyone, or their friends).
+        Updates are coalesced until each recipient's next poll.
+        """
+        if player not in self._index_keys:
+            return  # logged out
+
+        targets: dict[Player, None] = {player: None}
+        targets.update(self._pres_filter_all)
+        targets.update(self._pres_filter_friends.get(player.id, {}))
+        targets.update(dict.fromkeys(player.spectators))
+        if player.spectating is not None:
+            targets[player.spectating] = None
+        if player.match is not None:
+            for slot in player.match.slots:
+                if slot.player is not None:
+                    targets[slot.player] = None
+
+        for target in targets:
+            if target.is_bot_client or target not in self._index_keys:
+                continue
+
+            target.enqueue_stats(player)
+
+    @staticmethod
+    def _index_add(index: dict[Any, list[Player]], key: Any, player: Player) -> None:
+        if key in index:
+            index[key].append(player)
+        else:
+            index[key] = [player]
+
+    @staticmethod
+    def _index_remove(
+        index: dict[Any, list[Player]],
+        key: Any,
+        player: Player,
+    ) -> None:
+        players = index.get(key)
+        if players is None:
+            return
+
+        for idx, p in enumerate(players):
+            if p is player:
+                del players[idx]
+                break
+
+        if not players:
+            del index[key]
+
+    def _add_to_indexes(self, player: Player) -> None:
+        keys = (player.token, player.id, player.safe_name, player.irc_key)
+        self._index_keys[player] = keys
+
+        self._index_add(self._by_token, keys[0], player)
+        self._index_add(self._by_id, keys[1], player)
+        self._index_add(self._by_safe_name, keys[2], player)
+        if keys[3] is not None:
+            self._index_add(self._by_irc_key, keys[3], player)
+
+    def _remove_from_indexes(self, player: Player) -> None:
+        token, id, safe_name, irc_key = self._index_keys.pop(player)
+
+        self._index_remove(self._by_token, token, player)
+        self._index_remove(self._by_id, id, player)
+        self._index_remove(self._by_safe_name, safe_name, player)
+        if irc_key is not None:
+            self._index_remove(self._by_irc_key, irc_key, player)
+
+    def _add_to_priv_views(self, player: Player) -> None:
+        if player.priv & Privileges.STAFF:
+            self._staff[player] = None
+
+        if player.priv & Privileges.UNRESTRICTED:
+            self._unrestricted[player] = None
+            self._unrestricted_ids[player.id] = (
+                self._unrestricted_ids.get(player.id, 0) + 1
+            )
+        else:
+            self._restricted[player] = None
+
+    def _remove_from_priv_views(self, player: Player) -> None:
+        self._staff.pop(player, None)
+        self._restricted.pop(player, None)
+
+        if player in self._unrestricted:
+            del self._unrestricted[player]
+
+            sessions = self._unrestricted_ids[player.id] - 1
+            if sessions:
+                self._unrestricted_ids[player.id] = sessions
+            else:
+                del self._unrestricted_ids[player.id]
+
+    def _add_to_pres_filter_views(self, player: Player) -> None:
+        keys = (player.pres_filter, frozenset(player.friends))
+        self._pres_filter_keys[player] = keys
+
+        if keys[0] == PresenceFilter.All:
+            self._pres_filter_all[player] = None
+        elif keys[0] == PresenceFilter.Friends:
+            for friend_id in keys[1]:
+                self._pres_filter_friends.setdefault(friend_id, {})[player] = None
+
+    def _remove_from_pres_filter_views(self, player: Player) -> None:
+        pres_filter, friend_ids = self._pres_filter_keys.pop(player)
+
+        if pres_filter == PresenceFilter.All:
+            del self._pres_filter_all[player]
+        elif pres_filter == PresenceFilter.Friends:
+            for friend_id in friend_ids:
+                players = self._pres_filter_friends[friend_id]
+                del players[player]
+                if not players:
+                    del self._pres_filter_friends[friend_id]
+
+    def update_pres_filter_views(self, player: Player) -> None:
+        """Update the presence views after `player`'s filter or friends changed."""
+        if player not in self:
+            return
+
+        self._remove_from_pres_filter_views(player)
+        self._add_to_pres_filter_views(player)
+
+    def update_priv_views(self, player: Player) -> None:
+        """Update the privilege views after `player`'s privileges changed."""
+        if player not in self:
+            return
+
+        self._remove_from_priv_views(player)
+        self._add_to_priv_views(player)
 
     def get(
         self,
@@ -177,21 +370,43 @@ class Players(list[Player]):
         name: str | None = None,
     ) -> Player | None:
         """Get a player by token, id, or name from cache."""
-        for player in self:
-            if token is not None:
-                if player.token == token:
-                    return player
-            elif irc_key is not None:
-                if player.irc_key == irc_key:
-                    return player
-            elif id is not None:
-                if player.id == id:
-                    return player
-            elif name is not None:
-                if player.safe_name == make_safe_name(name):
-                    return player
+        if token is not None:
+            players = self._by_token.get(token)
+        elif irc_key is not None:
+            players = self._by_irc_key.get(irc_key)
+        elif id is not None:
+            players = self._by_id.get(id)
+        elif name is not None:
+            players = self._by_safe_name.get(make_safe_name(name))
+        else:
+            return None
 
-        return None
+        return players[0] if players else None
+
+    def get_many(
+        self,
+        ids: Iterable[int],
+        unrestricted_only: bool = False,
+    ) -> Iterator[Player]:
+        """Yield the online players with the given ids, skipping those offline."""
+        for id in ids:
+            if unrestricted_only and id not in self._unrestricted_ids:
+                continue
+
+            players = self._by_id.get(id)
+            if players:
+                yield players[0]
+
+    def rename(self, player: Player, name: str) -> None:
+        """Change `player`'s name, keeping the name index up to date."""
+        if player in self:
+            self._remove_from_indexes(player)
+            player.name = name
+            self._add_to_indexes(player)
+        else:
+            player.name = name
+
+        player.invalidate_packet_cache()
 
     async def get_sql(
         self,
@@ -271,10 +486,22 @@ class Players(list[Player]):
 
         assert player.pw_bcrypt is not None
 
-        if app.state.cache.bcrypt[player.pw_bcrypt] == pw_md5.encode():
-            return player
+        cached_pw_md5 = app.state.cache.bcrypt.get(player.pw_bcrypt)
+        if cached_pw_md5 is not None:
+            return player if cached_pw_md5 == pw_md5.encode() else None
 
-        return None
+        # not cached (or expired); verify with bcrypt off of the event loop
+        try:
+            if not await app.state.services.password_hasher.checkpw(
+                pw_md5.encode(),
+                player.pw_bcrypt,
+            ):
+                return None
+        except PasswordHasherOverloaded:
+            return None
+
+        app.state.cache.bcrypt[player.pw_bcrypt] = pw_md5.encode()
+        return player
 
     def append(self, player: Player) -> None:
         """Append `p` to the list."""
@@ -284,6 +511,9 @@ class Players(list[Player]):
             return
 
         super().append(player)
+        self._add_to_indexes(player)
+        self._add_to_priv_views(player)
+        self._add_to_pres_filter_views(player)
 
     def remove(self, player: Player) -> None:
         """Remove `p` from the list."""
@@ -293,6 +523,9 @@ class Players(list[Player]):
             return
 
         super().remove(player)
+        self._remove_from_indexes(player)
+        self._remove_from_priv_views(player)
+        self._remove_from_pres_filter_views(player)
 
 
 async def _load_simulation_bots() -> None:
@@ -374,42 +607,45 @@ async def _load_simulation_bots() -> None:
 async def _initialize_leaderboards() -> None:
     """Initialize leaderboards in redis from database statistics."""
     log("Initializing leaderboards in redis.", Ansi.LCYAN)
-    
-    # fetch all unrestricted users with their stats
-    all_stats = await app.state.services.database.fetch_all(
-        """
-        SELECT s.id, s.mode, s.pp, u.country, u.priv
-        FROM stats s
-        INNER JOIN users u ON s.id = u.id
-        WHERE s.pp > 0 AND (u.priv & :unrestricted) = :unrestricted
-        """,
-        {"unrestricted": Privileges.UNRESTRICTED.value},
+
+    leaderboard_counts = await rebuild_leaderboards(
+        app.state.services.database,
+        app.state.services.redis,
     )
-    
-    leaderboard_counts = {}
-    
-    for stat in all_stats:
-        mode = stat["mode"]
-        user_id = str(stat["id"])
-        pp = stat["pp"]
-        country = stat["country"]
-        
-        # add to global leaderboard
-        await app.state.services.redis.zadd(
-            f"bancho:leaderboard:{mode}",
-            {user_id: pp},
-        )
-        
-        # add to country leaderboard
-        await app.state.services.redis.zadd(
-            f"bancho:leaderboard:{mode}:{country}",
-            {user_id: pp},
-        )
-        
-        leaderboard_counts[mode] = leaderboard_counts.get(mode, 0) + 1
-    
+
     for mode, count in leaderboard_counts.items():
-        log(f"Initialized leaderboard for mode {mode} with {count} players.", Ansi.LGREEN)
+        if count:
+            log(f"Initialized leaderboard for mode {mode} with {count} players.", Ansi.LGREEN)
+
+
+async def _initialize_beatmap_leaderboards() -> None:
+    """Load the leaderboards of the most played beatmaps from the database."""
+    if app.settings.LEADERBOARD_CACHE_WARMUP <= 0:
+        return
+
+    log("Loading beatmap leaderboards from the database.", Ansi.LCYAN)
+
+    maps = await app.state.services.database.fetch_all(
+        "SELECT md5, mode FROM maps ORDER BY plays DESC LIMIT :limit",
+        {"limit": app.settings.LEADERBOARD_CACHE_WARMUP},
+    )
+
+    # maps.mode is the map's vanilla mode; warm its relax & autopilot
+    # leaderboards too, where those exist.
+    modes_by_vanilla_mode: dict[int, list[GameMode]] = {}
+    for mode in GameMode.valid_gamemodes():
+        modes_by_vanilla_mode.setdefault(mode.as_vanilla, []).append(mode)
+
+    num_leaderboards = 0
+    for row in maps:
+        for mode in modes_by_vanilla_mode[row["mode"]]:
+            await fetch_leaderboard(row["md5"], mode, scoring_metric_for(mode))
+            num_leaderboards += 1
+
+    log(
+        f"Loaded {num_leaderboards} leaderboards for {len(maps)} beatmaps.",
+        Ansi.LGREEN,
+    )
 
 
 async def initialize_ram_caches() -> None:
@@ -443,6 +679,9 @@ async def initialize_ram_caches() -> None:
 
     # initialize leaderboards in redis from database
     await _initialize_leaderboards()
+
+    # preload the most requested beatmap leaderboards
+    await _initialize_beatmap_leaderboards()
     
     # load simulation bots for online count
     await _load_simulation_bots()
@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import bisect
+from collections.abc import Collection
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Literal
+
+import app.state
+from app.caching import SingleFlight
+from app.constants.gamemodes import GameMode
+from app.repositories import clans as clans_repo
+
+if TYPE_CHECKING:
+    from app.objects.score import Score
+
+ScoringMetric = Literal["pp", "score"]
+LeaderboardKey = tuple[str, GameMode, ScoringMetric]  # (map_md5, mode, metric)
+
+# the number of scores shown on a leaderboard in-game
+LEADERBOARD_SIZE = 50
+
+
+def scoring_metric_for(mode: GameMode) -> ScoringMetric:
+    """Return the metric a mode's leaderboards are sorted by."""
+    return "pp" if mode >= GameMode.RELAX_OSU else "score"
+
+
+@dataclass
+class LeaderboardScore:
+    id: int
+    score: float  # the leaderboard's scoring metric (pp or score)
+    max_combo: int
+    n50: int
+    n100: int
+    n300: int
+    nmiss: int
+    nkatu: int
+    ngeki: int
+    perfect: int
+    mods: int
+    time: int  # unix timestamp
+    userid: int
+    name: str  # including clan tag
+    country: str
+
+    def to_row(self, include_user: bool = True) -> dict[str, Any]:
+        """Convert to the row format of a leaderboard score listing."""
+        row: dict[str, Any] = {
+            "id": self.id,
+            "_score": self.score,
+            "max_combo": self.max_combo,
+            "n50": self.n50,
+            "n100": self.n100,
+            "n300": self.n300,
+            "nmiss": self.nmiss,
+            "nkatu": self.nkatu,
+            "ngeki": self.ngeki,
+            "perfect": self.perfect,
+            "mods": self.mods,
+            "time": self.time,
+        }
+        if include_user:
+            row["userid"] = self.userid
+            row["name"] = self.name
+
+        return row
+
+
+def _sort_key(score: LeaderboardScore) -> tuple[float, int]:
+    # best scores first, ties broken by the earliest submission
+    return (-score.score, score.id)
+
+
+class Leaderboard:
+    """\
+    The best scores of all unrestricted players on a
+    beatmap in a given mode, sorted by scoring metric.
+
+    Held in `app.state.cache.leaderboards`, where it's loaded lazily
+    from sql, and kept up to date as best scores are submitted.
+    """
+
+    def __init__(self, scores: Collection[LeaderboardScore] = ()) -> None:
+        self._scores = sorted(scores, key=_sort_key)
+        self._by_user = {score.userid: score for score in self._scores}
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    @classmethod
+    async def from_sql(
+        cls,
+        map_md5: str,
+        mode: GameMode,
+        scoring_metric: ScoringMetric,
+    ) -> Leaderboard:
+        rows = await app.state.services.database.fetch_all(
+            f"SELECT s.id, s.{scoring_metric} AS _score, "
+            "s.max_combo, s.n50, s.n100, s.n300, "
+            "s.nmiss, s.nkatu, s.ngeki, s.perfect, s.mods, "
+            "UNIX_TIMESTAMP(s.play_time) time, u.id userid, "
+            "COALESCE(CONCAT('[', c.tag, '] ', u.name), u.name) AS name, "
+            "u.country "
+            "FROM scores s "
+            "INNER JOIN users u ON u.id = s.userid "
+            "LEFT JOIN clans c ON c.id = u.clan_id "
+            "WHERE s.map_md5 = :map_md5 AND s.status = 2 "  # 2: =best score
+            "AND u.priv & 1 AND s.mode = :mode",
+            {"map_md5": map_md5, "mode": mode},
+        )
+        return cls(
+            [
+                LeaderboardScore(
+                    id=row["id"],
+                    score=row["_score"],
+                    max_combo=row["max_combo"],
+                    n50=row["n50"],
+                    n100=row["n100"],
+                    n300=row["n300"],
+                    nmiss=row["nmiss"],
+                    nkatu=row["nkatu"],
+                    ngeki=row["ngeki"],
+                    perfect=row["perfect"],
+                    mods=row["mods"],
+                    time=row["time"],
+                    userid=row["userid"],
+                    name=row["name"],
+                    country=row["country"],
+                )
+                for row in rows
+            ],
+        )
+
+    def add(self, score: LeaderboardScore) -> None:
+        """Add a (new) best score, replacing the user's previous one."""
+        self.remove_user(score.userid)
+        bisect.insort(self._scores, score, key=_sort_key)
+        self._by_user[score.userid] = score
+
+    def remove_user(self, user_id: int) -> None:
+        """Remove a user's best score from the leaderboard."""
+        score = self._by_user.pop(user_id, None)
+        if score is None:
+            return
+
+        idx = bisect.bisect_left(self._scores, _sort_key(score), key=_sort_key)
+        del self._scores[idx]
+
+    def personal_best(self, user_id: int) -> LeaderboardScore | None:
+        return self._by_user.get(user_id)
+
+    def rank_of(self, score: float) -> int:
+        """Return the rank a score of `score` would hold (in O(log n))."""
+        return 1 + bisect.bisect_left(self._scores, -score, key=lambda s: -s.score)
+
+    def top(
+        self,
+        limit: int = LEADERBOARD_SIZE,
+        mods: int | None = None,
+        user_ids: Collection[int] | None = None,
+        country: str | None = None,
+    ) -> list[LeaderboardScore]:
+        """Return the best `limit` scores matching the given filters."""
+        if mods is None and user_ids is None and country is None:
+            return self._scores[:limit]
+
+        if country is not None:
+            country = country.lower()
+
+        scores = []
+        for score in self._scores:
+            if mods is not None and score.mods != mods:
+                continue
+            if user_ids is not None and score.userid not in user_ids:
+                continue
+            if country is not None and score.country.lower() != country:
+                continue
+
+            scores.append(score)
+            if len(scores) == limit:
+                break
+
+        return scores
+
+
+# best scores submitted while a leaderboard was being loaded from sql,
+# which may have been missed by the load; applied once it completes.
+_pending_scores: dict[LeaderboardKey, list[LeaderboardScore]] = {}
+
+# concurrent misses for a leaderboard share one load
+_leaderboard_loads: SingleFlight[LeaderboardKey, Leaderboard] = SingleFlight()
+
+
+async def _load_leaderboard(key: LeaderboardKey) -> Leaderboard:
+    pending_scores: list[LeaderboardScore] = []
+    _pending_scores[key] = pending_scores
+    try:
+        leaderboard = await Leaderboard.from_sql(*key)
+    finally:
+        del _pending_scores[key]
+
+    for score in pending_scores:
+        leaderboard.add(score)
+
+    # never replace a leaderboard which was cached in the meantime,
+    # as it may have had scores added since.
+    cached_leaderboard = app.state.cache.leaderboards.peek(key)
+    if cached_leaderboard is not None:
+        return cached_leaderboard
+
+    app.state.cache.leaderboards[key] = leaderboard
+    return leaderboard
+
+
+async def fetch_leaderboard(
+    map_md5: str,
+    mode: GameMode,
+    scoring_metric: ScoringMetric,
+) -> Leaderboard:
+    """Fetch a beatmap's leaderboard from the cache, or sql as fallback."""
+    key = (map_md5, mode, scoring_metric)
+
+    leaderboard = app.state.cache.leaderboards.get(key)
+    if leaderboard is not None:
+        return leaderboard
+
+    return await _leaderboard_loads.do(key, lambda: _load_leaderboard(key))
+
+
+async def add_submitted_score(score: Score) -> None:
+    """Add a newly submitted best score to its cached leaderboard, if any."""
+    assert score.id is not None
+    assert score.bmap is not None
+    assert score.player is not None
+
+    key = (score.bmap.md5, score.mode, scoring_metric_for(score.mode))
+
+    leaderboard = app.state.cache.leaderboards.get(key)
+    pending_scores = _pending_scores.get(key)
+    if leaderboard is None and pending_scores is None:
+        return  # not cached; it'll be loaded from sql when needed
+
+    name = score.player.name
+    if score.player.clan_id is not None:
+        clan = await clans_repo.fetch_one(id=score.player.clan_id)
+        if clan is not None:
+            name = f"[{clan['tag']}] {name}"
+
+    leaderboard_score = LeaderboardScore(
+        id=score.id,
+        score=score.pp if key[2] == "pp" else score.score,
+        max_combo=score.max_combo,
+        n50=score.n50,
+        n100=score.n100,
+        n300=score.n300,
+        nmiss=score.nmiss,
+        nkatu=score.nkatu,
+        ngeki=score.ngeki,
+        perfect=int(score.perfect),
+        mods=int(score.mods),
+        time=int(score.server_time.timestamp()),
+        userid=score.player.id,
+        name=name,
+        country=score.player.geoloc["country"]["acronym"],
+    )
+
+    # the cache may have changed while fetching the clan
+    leaderboard = app.state.cache.leaderboards.get(key)
+    if leaderboard is not None:
+        leaderboard.add(leaderboard_score)
+
+    pending_scores = _pending_scores.get(key)
+    if pending_scores is not None:
+        pending_scores.append(leaderboard_score)
+
+
+def invalidate_map_leaderboards(map_md5: str) -> None:
+    """Drop a beatmap's cached leaderboards in all modes."""
+    for mode in GameMode:
+        app.state.cache.leaderboards.invalidate(
+            (map_md5, mode, scoring_metric_for(mode)),
+        )
+
+
+def remove_user_scores(user_id: int) -> None:
+    """Remove a user's best scores from all cached leaderboards."""
+    for key in app.state.cache.leaderboards.keys():
+        leaderboard = app.state.cache.leaderboards.peek(key)
+        if leaderboard is not None:
+            leaderboard.remove_user(user_id)
+
+
+async def invalidate_user_leaderboards(user_id: int) -> None:
+    """Drop the cached leaderboards of the beatmaps a user has best scores on."""
+    rows = await app.state.services.database.fetch_all(
+        "SELECT DISTINCT map_md5 FROM scores WHERE userid = :user_id AND status = 2",
+        {"user_id": user_id},
+    )
+    for row in rows:
+        invalidate_map_leaderboards(row["map_md5"])
@@ -26,6 +26,7 @@ if TYPE_CHECKING:
 
     from app.objects.channel import Channel
     from app.objects.player import Player
+    from app.objects.score import Score
 
 
 MAX_MATCH_NAME_LENGTH = 50
@@ -200,6 +201,10 @@ class Match:
 
         self.tourney_clients: set[int] = set()  # player ids
 
+        # scores being awaited after a map's completion
+        self._submissions: dict[int, Score | None] = {}  # {player id: score}
+        self._all_submitted: asyncio.Event | None = None
+
     @property
     def host(self) -> Player:
         player = app.state.sessions.players.get(id=self.host_id)
@@ -298,12 +303,22 @@ class Match:
         """Enqueue `self`'s state to players in the match & lobby."""
         # TODO: hmm this is pretty bad, writes twice
 
+        # only the latest state of the match needs to be sent,
+        # keyed by (packet, match id, whether the password is sent)
+        key = (app.packets.ServerPackets.UPDATE_MATCH, self.id)
+
         # send password only to users currently in the match.
-        self.chat.enqueue(app.packets.update_match(self, send_pw=True))
+        self.chat.enqueue(
+            app.packets.update_match(self, send_pw=True),
+            key=(*key, True),
+        )
 
         lchan = app.state.sessions.channels.get_by_name("#lobby")
         if lobby and lchan and lchan.players:
-            lchan.enqueue(app.packets.update_match(self, send_pw=False))
+            lchan.enqueue(
+                app.packets.update_match(self, send_pw=False),
+                key=(*key, False),
+            )
 
     def unready_players(self, expected: SlotStatus = SlotStatus.ready) -> None:
         """Unready any players in the `expected` state."""
@@ -339,6 +354,25 @@ class Match:
         self.winners.clear()
         self.bans.clear()
 
+    def submit_score(self, score: Score) -> None:
+        """Hand a newly submitted score to the match, if it's awaiting it."""
+        if (
+            self._all_submitted is None
+            or score.player is None
+            or score.bmap is None
+            or score.bmap.md5 != self.map_md5
+            or score.player.id not in self._submissions
+            or self._submissions[score.player.id] is not None
+        ):
+            # not awaiting a score from this player (on this map)
+            return
+
+        self._submissions[score.player.id] = score
+
+        if all(self._submissions.values()):
+            # the last score has landed
+            self._all_submitted.set()
+
     async def await_submissions(
         self,
         was_playing: Sequence[Slot],
@@ -346,7 +380,6 @@ class Match:
         """Await score submissions from all players in completed state."""
         scores: dict[MatchTeams | Player, int] = defaultdict(int)
         didnt_submit: list[Player] = []
-        time_waited = 0.0  # allow up to 10s (total, not per player)
 
         ffa = self.team_type in (MatchTeamTypes.head_to_head, MatchTeamTypes.tag_coop)
 
@@ -361,40 +394,52 @@ class Match:
             # map isn't submitted
             return {}, ()
 
+        max_age = datetime.now() - timedelta(seconds=bmap.total_length + 0.5)
+
+        submissions: dict[int, Score | None] = {}
         for s in was_playing:
-            # continue trying to fetch each player's
-            # scores until they've all been submitted.
-            while True:
-                assert s.player is not None
-                rc_score = s.player.recent_score
-
-                max_age = datetime.now() - timedelta(
-                    seconds=bmap.total_length + time_waited + 0.5,
-                )
+            assert s.player is not None
+            rc_score = s.player.recent_score
+
+            if (
+                rc_score
+                and rc_score.bmap
+                and rc_score.bmap.md5 == self.map_md5
+                and rc_score.server_time > max_age
+            ):
+                # score was submitted before the match completed
+                submissions[s.player.id] = rc_score
+            else:
+                submissions[s.player.id] = None
+
+        if not all(submissions.values()):
+            # await the remaining scores, which are handed to us by
+            # score submission; allow up to 10s (total, not per player)
+            self._submissions = submissions
+            self._all_submitted = asyncio.Event()
+            try:
+                await asyncio.wait_for(self._all_submitted.wait(), timeout=10)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._submissions = {}
+                self._all_submitted = None
 
-                if (
-                    rc_score
-                    and rc_score.bmap
-                    and rc_score.bmap.md5 == self.map_md5
-                    and rc_score.server_time > max_age
-                ):
-                    # score found, add to our scores dict if != 0.
-                    score: int = getattr(rc_score, win_cond)
-                    if score:
-                        key: MatchTeams | Player = s.player if ffa else s.team
-                        scores[key] += score
-
-                    break
-
-                # wait 0.5s and try again
-                await asyncio.sleep(0.5)
-                time_waited += 0.5
-
-                if time_waited > 10:
-                    # inform the match this user didn't
-                    # submit a score in time, and skip them.
-                    didnt_submit.append(s.player)
-                    break
+        for s in was_playing:
+            assert s.player is not None
+            rc_score = submissions[s.player.id]
+
+            if rc_score is None:
+                # inform the match this user didn't
+                # submit a score in time, and skip them.
+                didnt_submit.append(s.player)
+                continue
+
+            # score found, add to our scores dict if != 0.
+            score: int = getattr(rc_score, win_cond)
+            if score:
+                key: MatchTeams | Player = s.player if ffa else s.team
+                scores[key] += score
 
         # all scores retrieved, update the match.
         return scores, didnt_submit
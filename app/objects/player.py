@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 import time
 import uuid
+from collections.abc import Hashable
 from dataclasses import dataclass
 from datetime import date
 from enum import IntEnum
@@ -28,6 +29,8 @@ from app.discord import Webhook
 from app.logging import Ansi
 from app.logging import log
 from app.objects.channel import Channel
+from app.objects.leaderboard import invalidate_user_leaderboards
+from app.objects.leaderboard import remove_user_scores
 from app.objects.match import Match
 from app.objects.match import MatchTeams
 from app.objects.match import MatchTeamTypes
@@ -198,11 +201,29 @@ class Player:
     is_tourney_client: `bool`
         Whether this is a management/spectator tourney client.
 
-    _packet_queue: `bytearray`
-        Bytes enqueued to the player which will be transmitted
+    is_bot_client: `bool`
+        Whether this is a server-side bot (e.g. the main bot), which
+        never polls for its packet queue.
+
+    _packet_queue: `list[bytes]`
+        Packets enqueued to the player which will be transmitted
         at the tail end of their next connection to the server.
         XXX: cls.enqueue() will add data to this queue, and
              cls.dequeue() will return the data, and remove it.
+             Keyed packets (e.g. USER_STATS per user) replace their
+             unsent predecessors, found through _packet_queue_keys.
+
+    packet_queue_overflowed: `bool`
+        Whether the queue has exceeded PACKET_QUEUE_MAX_BYTES under
+        the "disconnect" overflow policy; such players are logged
+        out by the ghost disconnection loop.
+
+    _presence_packet & _stats_packet: `bytes | None`
+        The player's encoded USER_PRESENCE & USER_STATS packets.
+        XXX: these are built lazily by cls.presence_packet and
+             cls.stats_packet, and must be wiped with
+             cls.invalidate_packet_cache() whenever the player's
+             status, stats, privileges, geoloc or name change.
     """
 
     def __init__(
@@ -222,6 +243,7 @@ class Player:
         client_details: ClientDetails | None = None,
         login_time: float = 0.0,
         is_tourney_client: bool = False,
+        is_bot_client: bool = False,
         api_key: str | None = None,
         irc_key: str | None = None,
         irc_client: bool | False = False,
@@ -250,6 +272,7 @@ class Player:
         self.login_time = login_time
         self.last_recv_time = login_time
         self.is_tourney_client = is_tourney_client
+        self.is_bot_client = is_bot_client
         self.api_key = api_key
         self.irc_key = irc_key
         self.irc_client = irc_client
@@ -280,7 +303,13 @@ class Player:
         # store the last beatmap /np'ed by the user.
         self.last_np: LastNp | None = None
 
-        self._packet_queue = bytearray()
+        self._packet_queue: list[bytes] = []
+        self._packet_queue_keys: dict[Hashable, int] = {}  # {key: index}
+        self._packet_queue_size = 0
+        self.packet_queue_overflowed = False
+
+        self._presence_packet: bytes | None = None
+        self._stats_packet: bytes | None = None
 
     def __repr__(self) -> str:
         return f"<{self.name} ({self.id})>"
@@ -346,6 +375,27 @@ class Player:
         """The player's stats in their currently selected mode."""
         return self.stats[self.status.mode]
 
+    @property
+    def presence_packet(self) -> bytes:
+        """The player's USER_PRESENCE packet (cached until invalidated)."""
+        if self._presence_packet is None:
+            self._presence_packet = app.packets.user_presence(self)
+
+        return self._presence_packet
+
+    @property
+    def stats_packet(self) -> bytes:
+        """The player's USER_STATS packet (cached until invalidated)."""
+        if self._stats_packet is None:
+            self._stats_packet = app.packets.user_stats(self)
+
+        return self._stats_packet
+
+    def invalidate_packet_cache(self) -> None:
+        """Wipe `self`'s cached presence & stats packets."""
+        self._presence_packet = None
+        self._stats_packet = None
+
     @property
     def recent_score(self) -> Score | None:
         """The player's most recently submitted score."""
@@ -417,7 +467,11 @@ class Player:
             if app.metrics.enabled:
                 app.metrics.decrement("ex_online_players")
 
-            app.state.sessions.players.enqueue(app.packets.logout(self.id))
+            # (replacing any of our stats yet to be sent)
+            app.state.sessions.players.enqueue(
+                app.packets.logout(self.id),
+                key=(app.packets.ServerPackets.USER_STATS, self.id),
+            )
 
         log(f"{self} logged out.")
 
@@ -427,6 +481,9 @@ class Player:
         self.priv = new
         if "bancho_priv" in vars(self):
             del self.bancho_priv  # wipe cached_property
+        self.invalidate_packet_cache()
+
+        app.state.sessions.players.update_priv_views(self)
 
         await users_repo.partial_update(
             id=self.id,
@@ -439,6 +496,9 @@ class Player:
         self.priv |= bits
         if "bancho_priv" in vars(self):
             del self.bancho_priv  # wipe cached_property
+        self.invalidate_packet_cache()
+
+        app.state.sessions.players.update_priv_views(self)
 
         await users_repo.partial_update(
             id=self.id,
@@ -456,6 +516,9 @@ class Player:
         self.priv &= ~bits
         if "bancho_priv" in vars(self):
             del self.bancho_priv  # wipe cached_property
+        self.invalidate_packet_cache()
+
+        app.state.sessions.players.update_priv_views(self)
 
         await users_repo.partial_update(
             id=self.id,
@@ -488,6 +551,9 @@ class Player:
                 self.id,
             )
 
+        # their scores are held in cached beatmap leaderboards
+        remove_user_scores(self.id)
+
         log_msg = f"{admin} restricted {self} for: {reason}."
 
         log(log_msg, Ansi.LRED)
@@ -525,6 +591,9 @@ class Player:
                 {str(self.id): stats.pp},
             )
 
+        # their scores are missing from cached beatmap leaderboards
+        await invalidate_user_leaderboards(self.id)
+
         log_msg = f"{admin} unrestricted {self} for: {reason}."
 
         log(log_msg, Ansi.LRED)
@@ -851,6 +920,7 @@ class Player:
             return
 
         self.friends.add(player.id)
+        app.state.sessions.players.update_pres_filter_views(self)
         await app.state.services.database.execute(
             "REPLACE INTO relationships (user1, user2, type) VALUES (:user1, :user2, 'friend')",
             {"user1": self.id, "user2": player.id},
@@ -868,6 +938,7 @@ class Player:
             return
 
         self.friends.remove(player.id)
+        app.state.sessions.players.update_pres_filter_views(self)
         await app.state.services.database.execute(
             "DELETE FROM relationships WHERE user1 = :user1 AND user2 = :user2",
             {"user1": self.id, "user2": player.id},
@@ -987,6 +1058,8 @@ class Player:
                 },
             )
 
+        self.invalidate_packet_cache()
+
     def update_latest_activity_soon(self) -> None:
         """Update the player's latest activity in the database."""
         task = users_repo.partial_update(
@@ -995,15 +1068,76 @@ class Player:
         )
         app.state.loop.create_task(task)  # type: ignore[unused-awaitable]
 
-    def enqueue(self, data: bytes) -> None:
-        """Add data to be sent to the client."""
-        self._packet_queue += data
+    def enqueue(self, data: bytes, key: Hashable | None = None) -> None:
+        """\
+        Add data to be sent to the client.
+
+        Data enqueued with a `key` (e.g. a user's stats, or a match's
+        state) replaces any unsent data enqueued with the same key; the
+        old data is removed, and the new data added to the end.
+        """
+        if self.is_bot_client or self.irc_client:
+            # bots are never sent data, and irc clients' data is
+            # sent through their `IRCClient`, so there's nothing
+            # to drain this queue; don't let it grow.
+            return
+
+        if self.packet_queue_overflowed:
+            return  # they're to be disconnected
+
+        replaced_idx = None
+        if key is not None:
+            replaced_idx = self._packet_queue_keys.get(key)
+
+        queue_size = self._packet_queue_size + len(data)
+        if replaced_idx is not None:
+            queue_size -= len(self._packet_queue[replaced_idx])
+
+        if queue_size > app.settings.PACKET_QUEUE_MAX_BYTES:
+            self._overflow_packet_queue()
+            return
+
+        if replaced_idx is not None:
+            self._packet_queue[replaced_idx] = b""
+
+        if key is not None:
+            self._packet_queue_keys[key] = len(self._packet_queue)
+
+        self._packet_queue.append(data)
+        self._packet_queue_size = queue_size
+
+    def enqueue_stats(self, player: Player) -> None:
+        """Add `player`'s latest stats to be sent to the client."""
+        self.enqueue(
+            player.stats_packet,
+            key=(app.packets.ServerPackets.USER_STATS, player.id),
+        )
+
+    def _overflow_packet_queue(self) -> None:
+        app.metrics.increment("ex_packet_queue_overflows")
+
+        if app.settings.PACKET_QUEUE_OVERFLOW_POLICY == "drop":
+            return  # drop the new data
+
+        # the client has fallen too far behind to catch up; drop
+        # their queue, and leave them to be disconnected by
+        # `app.bg_loops._disconnect_ghosts`.
+        log(f"{self}'s packet queue overflowed; disconnecting.", Ansi.LYELLOW)
+        self.packet_queue_overflowed = True
+        self._clear_packet_queue()
+
+    def _clear_packet_queue(self) -> None:
+        self._packet_queue.clear()
+        self._packet_queue_keys.clear()
+        self._packet_queue_size = 0
 
     def dequeue(self) -> bytes | None:
         """Get data from the queue to send to the client."""
-        if self._packet_queue:
-            data = bytes(self._packet_queue)
-            self._packet_queue.clear()
+        if self._packet_queue_size:
+            app.metrics.histrogram("ex_packet_queue_bytes", self._packet_queue_size)
+
+            data = b"".join(self._packet_queue)
+            self._clear_packet_queue()
             return data
 
         return None
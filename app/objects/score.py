@@ -5,17 +5,17 @@ import hashlib
 from datetime import datetime
 from enum import IntEnum
 from enum import unique
-from pathlib import Path
 from typing import TYPE_CHECKING
 
 from app.api.v2.common import json # Common JSON handling for the application
 import app.state
-import app.usecases.performance
 import app.utils
 from app.constants.clientflags import ClientFlags
 from app.constants.gamemodes import GameMode
 from app.constants.mods import Mods
 from app.objects.beatmap import Beatmap
+from app.objects.leaderboard import fetch_leaderboard
+from app.objects.leaderboard import scoring_metric_for
 from app.repositories import scores as scores_repo
 from app.usecases.performance import ScoreParams
 from app.utils import escape_enum
@@ -24,8 +24,6 @@ from app.utils import pymysql_encode
 if TYPE_CHECKING:
     from app.objects.player import Player
 
-BEATMAPS_PATH = Path.cwd() / ".data/osu"
-
 
 @unique
 class Grade(IntEnum):
@@ -376,30 +374,13 @@ class Score:
     async def calculate_placement(self) -> int:
         assert self.bmap is not None
 
-        if self.mode >= GameMode.RELAX_OSU:
-            scoring_metric = "pp"
-            score = self.pp
-        else:
-            scoring_metric = "score"
-            score = self.score
-
-        num_better_scores: int | None = await app.state.services.database.fetch_val(
-            "SELECT COUNT(*) AS c FROM scores s "
-            "INNER JOIN users u ON u.id = s.userid "
-            "WHERE s.map_md5 = :map_md5 AND s.mode = :mode "
-            "AND s.status = 2 AND u.priv & 1 "
-            f"AND s.{scoring_metric} > :score",
-            {
-                "map_md5": self.bmap.md5,
-                "mode": self.mode,
-                "score": score,
-            },
-            column=0,  # COUNT(*)
-        )
-        assert num_better_scores is not None
-        return num_better_scores + 1
+        scoring_metric = scoring_metric_for(self.mode)
+        score = self.pp if scoring_metric == "pp" else self.score
 
-    def calculate_performance(self, beatmap_id: int) -> tuple[float, float]:
+        leaderboard = await fetch_leaderboard(self.bmap.md5, self.mode, scoring_metric)
+        return leaderboard.rank_of(score)
+
+    async def calculate_performance(self, beatmap_id: int) -> tuple[float, float]:
         """Calculate PP and star rating for our score."""
         mode_vn = self.mode.as_vanilla
 
@@ -415,8 +396,11 @@ class Score:
             nmiss=self.nmiss,
         )
 
-        result = app.usecases.performance.calculate_performances(
-            osu_file_path=str(BEATMAPS_PATH / f"{beatmap_id}.osu"),
+        assert self.bmap is not None
+
+        result = await app.state.services.performance_calculator.calculate(
+            beatmap_id,
+            self.bmap.md5,
             scores=[score_args],
         )
         
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import bisect
+from collections.abc import Collection
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import app.metrics
+import app.state
+from app.constants.gamemodes import GameMode
+from app.logging import Ansi
+from app.logging import log
+from app.usecases.stats import calculate_totals
+
+if TYPE_CHECKING:
+    from app.objects.score import Score
+
+TopScoresKey = tuple[int, GameMode]  # (user_id, mode)
+
+# the number of scores kept; the weight of any
+# further scores (0.95**1000 ~= 5e-23) is negligible
+TOP_SCORES_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class TopScore:
+    id: int
+    pp: float
+    acc: float
+
+
+def _sort_key(score: TopScore) -> tuple[float, int]:
+    return (-score.pp, score.id)
+
+
+class TopScores:
+    """\
+    A user's best `TOP_SCORES_SIZE` scores on ranked & approved maps in
+    a given mode sorted by pp, along with their total count of them.
+
+    Held in `app.state.cache.top_scores`, where it's loaded lazily from
+    sql, and kept up to date as best scores are submitted; so the user's
+    total pp & accuracy may be recalculated without fetching all scores.
+    """
+
+    def __init__(self, scores: Collection[TopScore], count: int) -> None:
+        self._scores = sorted(scores, key=_sort_key)[:TOP_SCORES_SIZE]
+        self._by_id = {score.id: score for score in self._scores}
+        self.count = count
+
+        # incremented on each change, to detect changes while reconciling
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TopScores):
+            return NotImplemented
+
+        return self.count == other.count and self._scores == other._scores
+
+    @classmethod
+    async def from_sql(cls, user_id: int, mode: GameMode) -> TopScores:
+        params = {"user_id": user_id, "mode": mode}
+
+        rows = await app.state.services.database.fetch_all(
+            "SELECT s.id, s.pp, s.acc FROM scores s "
+            "INNER JOIN maps m ON s.map_md5 = m.md5 "
+            "WHERE s.userid = :user_id AND s.mode = :mode "
+            "AND s.status = 2 AND m.status IN (2, 3) "  # ranked, approved
+            "ORDER BY s.pp DESC, s.id "
+            "LIMIT :limit",
+            params | {"limit": TOP_SCORES_SIZE},
+        )
+
+        if len(rows) < TOP_SCORES_SIZE:
+            count = len(rows)
+        else:
+            count = await app.state.services.database.fetch_val(
+                "SELECT COUNT(*) FROM scores s "
+                "INNER JOIN maps m ON s.map_md5 = m.md5 "
+                "WHERE s.userid = :user_id AND s.mode = :mode "
+                "AND s.status = 2 AND m.status IN (2, 3)",  # ranked, approved
+                params,
+            )
+
+        return cls(
+            [TopScore(id=row["id"], pp=row["pp"], acc=row["acc"]) for row in rows],
+            count,
+        )
+
+    @property
+    def complete(self) -> bool:
+        """Whether all of the user's best `TOP_SCORES_SIZE` scores are held."""
+        return len(self._scores) >= min(self.count, TOP_SCORES_SIZE)
+
+    def replace(self, score: TopScore, prev_best_id: int | None) -> None:
+        """Add a new best score, replacing the previous best on its map (if any)."""
+        if prev_best_id is None:
+            self.count += 1
+        else:
+            prev_best = self._by_id.pop(prev_best_id, None)
+            if prev_best is not None:
+                idx = bisect.bisect_left(
+                    self._scores,
+                    _sort_key(prev_best),
+                    key=_sort_key,
+                )
+                del self._scores[idx]
+
+        # scores which aren't held can only rank below those which are
+        all_held = len(self._scores) == self.count - 1
+        if all_held or _sort_key(score) < _sort_key(self._scores[-1]):
+            bisect.insort(self._scores, score, key=_sort_key)
+            self._by_id[score.id] = score
+
+            if len(self._scores) > TOP_SCORES_SIZE:
+                del self._by_id[self._scores.pop().id]
+
+        self.version += 1
+
+    def totals(self) -> tuple[float, int]:
+        """Calculate the user's total (weighted) accuracy & pp."""
+        return calculate_totals(
+            [score.pp for score in self._scores],
+            [score.acc for score in self._scores],
+            self.count,
+        )
+
+
+async def add_best_score(score: Score) -> TopScores:
+    """\
+    Apply a newly submitted best score on a ranked or approved
+    map (already saved to sql) to its user's top scores.
+    """
+    assert score.id is not None
+    assert score.player is not None
+
+    key = (score.player.id, score.mode)
+
+    top_scores = app.state.cache.top_scores.get(key)
+    if top_scores is not None:
+        prev_best_id = score.prev_best.id if score.prev_best is not None else None
+        top_scores.replace(
+            # (rounded as they're stored in sql)
+            TopScore(id=score.id, pp=round(score.pp, 3), acc=round(score.acc, 3)),
+            prev_best_id,
+        )
+
+        if top_scores.complete:
+            return top_scores
+
+        # a score was replaced by one outside of the top
+        # scores, leaving a gap which can only be filled by sql
+
+    top_scores = await TopScores.from_sql(*key)
+    app.state.cache.top_scores[key] = top_scores
+    return top_scores
+
+
+def invalidate_user_top_scores(user_id: int) -> None:
+    """Drop a user's cached top scores in all modes."""
+    for mode in GameMode:
+        app.state.cache.top_scores.invalidate((user_id, mode))
+
+
+async def reconcile_top_scores() -> int:
+    """\
+    Verify all cached top scores against sql, replacing any which have
+    drifted (e.g. from pp recalculations); returning the amount replaced.
+    """
+    mismatches = 0
+
+    for key in app.state.cache.top_scores.keys():
+        top_scores = app.state.cache.top_scores.peek(key)
+        if top_scores is None:
+            continue  # evicted since
+
+        version = top_scores.version
+        actual = await TopScores.from_sql(*key)
+
+        if (
+            app.state.cache.top_scores.peek(key) is not top_scores
+            or top_scores.version != version
+        ):
+            continue  # changed while loading; check again next time
+
+        if top_scores != actual:
+            log(f"Reconciled drifted top scores for {key}.", Ansi.LYELLOW)
+            app.metrics.increment("ex_top_scores_reconciled")
+            app.state.cache.top_scores[key] = actual
+            mismatches += 1
+
+    return mismatches
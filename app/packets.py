@@ -303,16 +303,46 @@ class BasePacket(ABC):
 PacketMap = dict[ClientPackets, type[BasePacket]]
 
 
+# precompiled formats for the packet reader
+PACKET_HEADER_FMT = struct.Struct("<HxI")
+I8_FMT = struct.Struct("<b")
+U8_FMT = struct.Struct("<B")
+I16_FMT = struct.Struct("<h")
+U16_FMT = struct.Struct("<H")
+I32_FMT = struct.Struct("<i")
+U32_FMT = struct.Struct("<I")
+I64_FMT = struct.Struct("<q")
+U64_FMT = struct.Struct("<Q")
+F16_FMT = struct.Struct("<e")
+F32_FMT = struct.Struct("<f")
+F64_FMT = struct.Struct("<d")
+
+MATCH_INFO_READ_FMT = struct.Struct("<hbbi")  # id, in_progress, powerplay, mods
+MATCH_SLOTS_FMT = struct.Struct("<16b16b")  # statuses, teams
+MATCH_SETTINGS_READ_FMT = struct.Struct("<ibbbb")
+MATCH_SLOT_MODS_FMT = struct.Struct("<16i")
+SCOREV2_PORTIONS_FMT = struct.Struct("<dd")
+REPLAYFRAME_FMT = struct.Struct("<BBffi")
+
+
 class BanchoPacketReader:
     """\
     A class for reading bancho packets
     from the osu! client's request body.
 
+    The body is never re-sliced while reading; values are unpacked
+    directly from the buffer at an integer cursor, and each packet
+    starts at the end of the previous one (regardless of how much
+    of it the handler read).
+
     Attributes
     -----------
     body_view: `memoryview`
         A readonly view of the request's body.
 
+    offset: `int`
+        The cursor's current position in `body_view`.
+
     packet_map: `dict[ClientPackets, BasePacket]`
         The map of registered packets the reader may handle.
 
@@ -321,7 +351,7 @@ class BanchoPacketReader:
 
     Intended Usage:
     >>> with memoryview(await request.body()) as body_view:
-    ...     for packet in BanchoPacketReader(body_view):
+    ...     for packet in BanchoPacketReader(body_view, packet_map):
     ...         await packet.handle()
     """
 
@@ -329,24 +359,28 @@ class BanchoPacketReader:
         self.body_view = body_view  # readonly
         self.packet_map = packet_map
 
+        self.offset = 0
         self.current_len = 0  # last read packet's length
+        self._packet_end = 0  # offset at which the next packet begins
 
     def __iter__(self) -> Iterator[BasePacket]:
         return self
 
     def __next__(self) -> BasePacket:
+        # skip anything the last packet's handler didn't read.
+        self.offset = self._packet_end
+
         # do not break until we've read the
         # header of a packet we can handle.
         p_type = ClientPackets.UNKNOWN_PACKET
         p_len = 0
-        while self.body_view:  # len(self.view) < 7?
+        while self.offset < len(self.body_view):
             p_type, p_len = self._read_header()
 
             if p_type not in self.packet_map:
-                # packet type not handled, remove
-                # from internal buffer and continue.
-                if p_len != 0:
-                    self.body_view = self.body_view[p_len:]
+                # packet type not handled, skip
+                # over its data and continue.
+                self.offset += p_len
             else:
                 # we can handle this one.
                 break
@@ -356,116 +390,97 @@ class BanchoPacketReader:
         # we have a packet handler for this.
         packet_cls = self.packet_map[p_type]
         self.current_len = p_len
+        self._packet_end = self.offset + p_len
 
         return packet_cls(self)
 
     def _read_header(self) -> tuple[ClientPackets, int]:
         """Read the header of an osu! packet (id & length)."""
         # read type & length from the body
-        data = struct.unpack("<HxI", self.body_view[:7])
-        self.body_view = self.body_view[7:]
-        return ClientPackets(data[0]), data[1]
+        p_type, p_len = PACKET_HEADER_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 7
+        return ClientPackets(p_type), p_len
+
+    def _unpack(self, fmt: struct.Struct) -> tuple[Any, ...]:
+        """Unpack `fmt` from the cursor, and advance past it."""
+        val = fmt.unpack_from(self.body_view, self.offset)
+        self.offset += fmt.size
+        return val
 
     """ public API (exposed for packet handler's __init__ methods) """
 
     def read_raw(self) -> memoryview:
-        val = self.body_view[: self.current_len]
-        self.body_view = self.body_view[self.current_len :]
+        val = self.body_view[self.offset : self.offset + self.current_len]
+        self.offset += len(val)
         return val
 
     # integral types
 
     def read_i8(self) -> int:
-        val = self.body_view[0]
-        self.body_view = self.body_view[1:]
-        return val - 256 if val > 127 else val
+        return cast(int, self._unpack(I8_FMT)[0])
 
     def read_u8(self) -> int:
-        val = self.body_view[0]
-        self.body_view = self.body_view[1:]
-        return val
+        return cast(int, self._unpack(U8_FMT)[0])
 
     def read_i16(self) -> int:
-        val = int.from_bytes(self.body_view[:2], "little", signed=True)
-        self.body_view = self.body_view[2:]
-        return val
+        return cast(int, self._unpack(I16_FMT)[0])
 
     def read_u16(self) -> int:
-        val = int.from_bytes(self.body_view[:2], "little", signed=False)
-        self.body_view = self.body_view[2:]
-        return val
+        return cast(int, self._unpack(U16_FMT)[0])
 
     def read_i32(self) -> int:
-        val = int.from_bytes(self.body_view[:4], "little", signed=True)
-        self.body_view = self.body_view[4:]
-        return val
+        return cast(int, self._unpack(I32_FMT)[0])
 
     def read_u32(self) -> int:
-        val = int.from_bytes(self.body_view[:4], "little", signed=False)
-        self.body_view = self.body_view[4:]
-        return val
+        return cast(int, self._unpack(U32_FMT)[0])
 
     def read_i64(self) -> int:
-        val = int.from_bytes(self.body_view[:8], "little", signed=True)
-        self.body_view = self.body_view[8:]
-        return val
+        return cast(int, self._unpack(I64_FMT)[0])
 
     def read_u64(self) -> int:
-        val = int.from_bytes(self.body_view[:8], "little", signed=False)
-        self.body_view = self.body_view[8:]
-        return val
+        return cast(int, self._unpack(U64_FMT)[0])
 
     # floating-point types
 
     def read_f16(self) -> float:
-        (val,) = struct.unpack_from("<e", self.body_view[:2])
-        self.body_view = self.body_view[2:]
-        return cast(float, val)
+        return cast(float, self._unpack(F16_FMT)[0])
 
     def read_f32(self) -> float:
-        (val,) = struct.unpack_from("<f", self.body_view[:4])
-        self.body_view = self.body_view[4:]
-        return cast(float, val)
+        return cast(float, self._unpack(F32_FMT)[0])
 
     def read_f64(self) -> float:
-        (val,) = struct.unpack_from("<d", self.body_view[:8])
-        self.body_view = self.body_view[8:]
-        return cast(float, val)
+        return cast(float, self._unpack(F64_FMT)[0])
 
     # complex types
 
     # XXX: some osu! packets use i16 for
     # array length, while others use i32
     def read_i32_list_i16l(self) -> tuple[int, ...]:
-        length = int.from_bytes(self.body_view[:2], "little")
-        self.body_view = self.body_view[2:]
-
-        val = struct.unpack(f'<{"I" * length}', self.body_view[: length * 4])
-        self.body_view = self.body_view[length * 4 :]
-        return val
+        length = self.read_u16()
+        return self._unpack(struct.Struct(f"<{length}I"))
 
     def read_i32_list_i32l(self) -> tuple[int, ...]:
-        length = int.from_bytes(self.body_view[:4], "little")
-        self.body_view = self.body_view[4:]
-
-        val = struct.unpack(f'<{"I" * length}', self.body_view[: length * 4])
-        self.body_view = self.body_view[length * 4 :]
-        return val
+        length = self.read_u32()
+        return self._unpack(struct.Struct(f"<{length}I"))
 
     def read_string(self) -> str:
-        exists = self.body_view[0] == 0x0B
-        self.body_view = self.body_view[1:]
+        body_view = self.body_view
+        offset = self.offset
+
+        exists = body_view[offset] == 0x0B
+        offset += 1
 
         if not exists:
             # no string sent.
+            self.offset = offset
             return ""
 
         # non-empty string, decode str length (uleb128)
         length = shift = 0
 
         while True:
-            byte = self.body_view[0]
-            self.body_view = self.body_view[1:]
+            byte = body_view[offset]
+            offset += 1
 
             length |= (byte & 0x7F) << shift
             if (byte & 0x80) == 0:
@@ -473,8 +488,8 @@ class BanchoPacketReader:
 
             shift += 7
 
-        val = self.body_view[:length].tobytes().decode()  # copy
-        self.body_view = self.body_view[length:]
+        val = str(body_view[offset : offset + length], "utf-8")
+        self.offset = offset + length
         return val
 
     # custom osu! types
@@ -498,64 +513,72 @@ class BanchoPacketReader:
 
     def read_match(self) -> MultiplayerMatch:
         """Read an osu! match from the internal buffer."""
+        match_id, in_progress, powerplay, mods = self._unpack(MATCH_INFO_READ_FMT)
         match = MultiplayerMatch(
-            id=self.read_i16(),
-            in_progress=self.read_i8() == 1,
-            powerplay=self.read_i8(),
-            mods=self.read_i32(),
+            id=match_id,
+            in_progress=in_progress == 1,
+            powerplay=powerplay,
+            mods=mods,
             name=self.read_string(),
             passwd=self.read_string(),
             map_name=self.read_string(),
             map_id=self.read_i32(),
             map_md5=self.read_string(),
-            slot_statuses=[self.read_i8() for _ in range(16)],
-            slot_teams=[self.read_i8() for _ in range(16)],
-            # ^^ up to slot_ids, as it relies on slot_statuses ^^
         )
 
-        for status in match.slot_statuses:
-            if status & 124 != 0:  # slot has a player
-                match.slot_ids.append(self.read_i32())
+        # up to slot_ids, as it relies on slot_statuses
+        slots = self._unpack(MATCH_SLOTS_FMT)
+        match.slot_statuses = list(slots[:16])
+        match.slot_teams = list(slots[16:])
+
+        # slots with a player (status & 124) send their player's id
+        player_count = sum(status & 124 != 0 for status in match.slot_statuses)
+        match.slot_ids = list(self._unpack(struct.Struct(f"<{player_count}i")))
 
-        match.host_id = self.read_i32()
-        match.mode = self.read_i8()
-        match.win_condition = self.read_i8()
-        match.team_type = self.read_i8()
-        match.freemods = self.read_i8() == 1
+        (
+            match.host_id,
+            match.mode,
+            match.win_condition,
+            match.team_type,
+            freemods,
+        ) = self._unpack(MATCH_SETTINGS_READ_FMT)
+        match.freemods = freemods == 1
 
         if match.freemods:
-            match.slot_mods = [self.read_i32() for _ in range(16)]
+            match.slot_mods = list(self._unpack(MATCH_SLOT_MODS_FMT))
 
         match.seed = self.read_i32()  # used for mania random mod
 
         return match
 
     def read_scoreframe(self) -> ScoreFrame:
-        sf = ScoreFrame(*SCOREFRAME_FMT.unpack_from(self.body_view[:29]))
-        self.body_view = self.body_view[29:]
+        sf = ScoreFrame(*self._unpack(SCOREFRAME_FMT))
 
         if sf.score_v2:
-            sf.combo_portion = self.read_f64()
-            sf.bonus_portion = self.read_f64()
+            sf.combo_portion, sf.bonus_portion = self._unpack(SCOREV2_PORTIONS_FMT)
 
         return sf
 
     def read_replayframe(self) -> ReplayFrame:
-        return ReplayFrame(
-            button_state=self.read_u8(),
-            taiko_byte=self.read_u8(),  # pre-taiko support (<=2008)
-            x=self.read_f32(),
-            y=self.read_f32(),
-            time=self.read_i32(),
-        )
+        return ReplayFrame._make(self._unpack(REPLAYFRAME_FMT))
+
+    def read_replayframes(self, count: int) -> list[ReplayFrame]:
+        """Read an array of `count` replay frames in bulk."""
+        end = self.offset + count * REPLAYFRAME_FMT.size
+        if end > len(self.body_view):
+            raise struct.error("replay frame array exceeds the packet's body")
+
+        frames = REPLAYFRAME_FMT.iter_unpack(self.body_view[self.offset : end])
+        self.offset = end
+        return list(map(ReplayFrame._make, frames))
 
     def read_replayframe_bundle(self) -> ReplayFrameBundle:
         # save raw format to distribute to the other clients
-        raw_data = self.body_view[: self.current_len]
+        raw_data = self.body_view[self.offset : self.offset + self.current_len]
 
         extra = self.read_i32()  # bancho proto >= 18
         framecount = self.read_u16()
-        frames = [self.read_replayframe() for _ in range(framecount)]
+        frames = self.read_replayframes(framecount)
         action = ReplayAction(self.read_u8())
         scoreframe = self.read_scoreframe()
         sequence = self.read_u16()
@@ -586,7 +609,11 @@ def write_string(s: str) -> bytes:
     """Write `s` into bytes (ULEB128 & string)."""
     if s:
         encoded = s.encode()
-        ret = b"\x0b" + write_uleb128(len(encoded)) + encoded
+        if len(encoded) < 0x80:
+            # fast path; the length fits in a single uleb128 byte
+            ret = bytes((0x0B, len(encoded))) + encoded
+        else:
+            ret = b"\x0b" + write_uleb128(len(encoded)) + encoded
     else:
         ret = b"\x00"
 
@@ -636,43 +663,52 @@ def write_channel(name: str, topic: str, count: int) -> bytearray:
 #    return ret
 
 
-def write_match(m: Match, send_pw: bool = True) -> bytearray:
+MATCH_INFO_FMT = struct.Struct("<HbbI")
+MATCH_SETTINGS_FMT = struct.Struct("<IBBBB")
+
+
+def write_match(m: Match, send_pw: bool = True) -> bytes:
     """Write `m` into bytes (osu! match)."""
-    # 0 is for match type
-    ret = bytearray(struct.pack("<HbbI", m.id, m.in_progress, 0, m.mods))
-    ret += write_string(m.name)
+    slots = m.slots
 
     # osu expects \x0b\x00 if there's a password, but it's
     # not being sent, and \x00 if there's no password.
     if m.passwd:
-        if send_pw:
-            ret += write_string(m.passwd)
-        else:
-            ret += b"\x0b\x00"
+        passwd = write_string(m.passwd) if send_pw else b"\x0b\x00"
     else:
-        ret += b"\x00"
-
-    ret += write_string(m.map_name)
-    ret += m.map_id.to_bytes(4, "little", signed=True)
-    ret += write_string(m.map_md5)
+        passwd = b"\x00"
 
-    ret.extend([s.status for s in m.slots])
-    ret.extend([s.team for s in m.slots])
-
-    for s in m.slots:
+    player_ids = []
+    for s in slots:
         if s.status & 0b01111100 != 0:  # SlotStatus.has_player
             assert s.player is not None
-            ret += s.player.id.to_bytes(4, "little")
-
-    ret += m.host.id.to_bytes(4, "little")
-    ret.extend((m.mode, m.win_condition, m.team_type, m.freemods))
+            player_ids.append(s.player.id)
+
+    parts = [
+        # 0 is for match type
+        MATCH_INFO_FMT.pack(m.id, m.in_progress, 0, m.mods),
+        write_string(m.name),
+        passwd,
+        write_string(m.map_name),
+        I32_FMT.pack(m.map_id),
+        write_string(m.map_md5),
+        bytes([s.status for s in slots]),
+        bytes([s.team for s in slots]),
+        struct.pack(f"<{len(player_ids)}I", *player_ids),
+        MATCH_SETTINGS_FMT.pack(
+            m.host.id,
+            m.mode,
+            m.win_condition,
+            m.team_type,
+            m.freemods,
+        ),
+    ]
 
     if m.freemods:
-        for s in m.slots:
-            ret += s.mods.to_bytes(4, "little")
+        parts.append(struct.pack(f"<{len(slots)}I", *[s.mods for s in slots]))
 
-    ret += m.seed.to_bytes(4, "little")
-    return ret
+    parts.append(U32_FMT.pack(m.seed))
+    return b"".join(parts)
 
 
 SCOREFRAME_FMT = struct.Struct("<iBHHHHHHiHH?BB?")
@@ -719,7 +755,7 @@ _noexpand_types: dict[osuTypes, Callable[..., bytes]] = {
     # not (yet?) implemented: write replayframe & bundle
 }
 
-_expand_types: dict[osuTypes, Callable[..., bytearray]] = {
+_expand_types: dict[osuTypes, Callable[..., bytes | bytearray]] = {
     # multiarg, tuple expansion
     osuTypes.message: write_message,
     osuTypes.channel: write_channel,
@@ -728,8 +764,12 @@ _expand_types: dict[osuTypes, Callable[..., bytearray]] = {
 
 
 def write(packid: int, *args: tuple[Any, osuTypes]) -> bytes:
-    """Write `args` into bytes."""
-    ret = bytearray(struct.pack("<Hx", packid))
+    """Write `args` into bytes.
+
+    NOTE: this is the generic (slow) path; packets with a
+    known layout should use a precompiled `PacketEncoder`.
+    """
+    ret = bytearray()
 
     for p_args, p_type in args:
         if p_type == osuTypes.raw:
@@ -739,15 +779,360 @@ def write(packid: int, *args: tuple[Any, osuTypes]) -> bytes:
         elif p_type in _expand_types:
             ret += _expand_types[p_type](*p_args)
 
-    # add size
-    ret[3:3] = struct.pack("<I", len(ret) - 3)
-    return bytes(ret)
+    return PACKET_HEADER_FMT.pack(packid, len(ret)) + ret
+
+
+# precompiled packet encoders
+
+_FIXED_WIDTH_FORMATS: dict[osuTypes, str] = {
+    osuTypes.i8: "b",
+    osuTypes.u8: "B",
+    osuTypes.i16: "h",
+    osuTypes.u16: "H",
+    osuTypes.i32: "i",
+    osuTypes.u32: "I",
+    osuTypes.f32: "f",
+    osuTypes.i64: "q",
+    osuTypes.u64: "Q",
+    osuTypes.f64: "d",
+}
+
+# osu! types which are simply a run of other types
+_FLATTENED_TYPES: dict[osuTypes, tuple[osuTypes, ...]] = {
+    osuTypes.message: (osuTypes.string, osuTypes.string, osuTypes.string, osuTypes.i32),
+    osuTypes.channel: (osuTypes.string, osuTypes.string, osuTypes.u16),
+}
+
+
+def _write_raw(data: bytes) -> bytes:
+    return data
+
+
+# variable-width types; (writer, number of args it takes)
+_VARIABLE_WIDTH_WRITERS: dict[
+    osuTypes, tuple[Callable[..., bytes | bytearray], int]
+] = {
+    osuTypes.string: (write_string, 1),
+    osuTypes.i32_list: (write_i32_list, 1),
+    osuTypes.scoreframe: (write_scoreframe, 1),
+    osuTypes.match: (write_match, 2),
+    osuTypes.raw: (_write_raw, 1),
+}
+
+
+class PacketEncoder:
+    """\
+    A server packet layout, compiled once into an encoder.
+
+    Consecutive fixed-width fields are packed together by a single
+    `struct.Struct`, leaving only the variable-width fields (strings,
+    lists, matches, etc.) to be written individually. The header is
+    written in the same pass as the body, and packets with no
+    variable-width fields are packed entirely by one `struct.Struct`.
+
+    Higher level types are passed as their flattened arguments;
+    e.g. `osuTypes.message` takes (sender, text, recipient, sender_id),
+    and `osuTypes.match` takes (match, send_pw).
+
+    Intended Usage:
+    >>> USER_LOGOUT = PacketEncoder(
+    ...     ServerPackets.USER_LOGOUT,
+    ...     osuTypes.i32,  # user_id
+    ...     osuTypes.u8,  # (always 0)
+    ... )
+    >>> USER_LOGOUT.pack(1001, 0)
+    b'\\x0c\\x00\\x00\\x05\\x00\\x00\\x00\\xe9\\x03\\x00\\x00\\x00'
+    """
+
+    def __init__(self, packid: ServerPackets, *layout: osuTypes) -> None:
+        self.packid = packid
+
+        fields: list[osuTypes] = []
+        for field_type in layout:
+            fields.extend(_FLATTENED_TYPES.get(field_type, (field_type,)))
+
+        # each segment of the body is (writer, first arg index, last arg index)
+        self._segments: list[tuple[Callable[..., bytes | bytearray], int, int]] = []
+
+        fixed_fmt = ""  # the current run of fixed-width fields
+        fixed_start = arg_idx = 0
+
+        for field_type in fields:
+            if field_type in _FIXED_WIDTH_FORMATS:
+                if not fixed_fmt:
+                    fixed_start = arg_idx
+                fixed_fmt += _FIXED_WIDTH_FORMATS[field_type]
+                arg_idx += 1
+                continue
+
+            if field_type not in _VARIABLE_WIDTH_WRITERS:
+                raise ValueError(f"Cannot encode {field_type!r} for {packid!r}")
+
+            if fixed_fmt:
+                fixed_struct = struct.Struct("<" + fixed_fmt)
+                self._segments.append((fixed_struct.pack, fixed_start, arg_idx))
+                fixed_fmt = ""
+
+            writer, argc = _VARIABLE_WIDTH_WRITERS[field_type]
+            self._segments.append((writer, arg_idx, arg_idx + argc))
+            arg_idx += argc
+
+        self.argc = arg_idx
+
+        if not self._segments:
+            # entirely fixed-width; header & body are packed in one go
+            self._fixed_struct: struct.Struct | None = struct.Struct(
+                PACKET_HEADER_FMT.format + fixed_fmt,
+            )
+            self._fixed_len = self._fixed_struct.size - PACKET_HEADER_FMT.size
+        else:
+            if fixed_fmt:
+                fixed_struct = struct.Struct("<" + fixed_fmt)
+                self._segments.append((fixed_struct.pack, fixed_start, arg_idx))
+
+            self._fixed_struct = None
+            self._fixed_len = 0
+
+    def __repr__(self) -> str:
+        return f"<PacketEncoder {self.packid!r}>"
+
+    def pack(self, *args: Any) -> bytes:
+        """Encode `args` into a full packet (header & body)."""
+        if self._fixed_struct is not None:
+            return self._fixed_struct.pack(self.packid, self._fixed_len, *args)
+
+        # the first slot is reserved for the header
+        parts: list[bytes | bytearray] = [b""]
+        for writer, start, stop in self._segments:
+            parts.append(writer(*args[start:stop]))
+
+        parts[0] = PACKET_HEADER_FMT.pack(self.packid, sum(map(len, parts)))
+        return b"".join(parts)
 
 
 #
 # packets
 #
 
+# packet layouts; each is compiled once at import time.
+
+# packet id: 5
+_USER_ID = PacketEncoder(ServerPackets.USER_ID, osuTypes.i32)
+
+# packet id: 7
+_SEND_MESSAGE = PacketEncoder(ServerPackets.SEND_MESSAGE, osuTypes.message)
+
+# packet id: 8
+_PONG = PacketEncoder(ServerPackets.PONG)
+
+# packet id: 9
+_HANDLE_IRC_CHANGE_USERNAME = PacketEncoder(
+    ServerPackets.HANDLE_IRC_CHANGE_USERNAME,
+    osuTypes.string,
+)
+
+# packet id: 11
+_USER_STATS = PacketEncoder(
+    ServerPackets.USER_STATS,
+    osuTypes.i32,  # id
+    osuTypes.u8,  # action
+    osuTypes.string,  # info_text
+    osuTypes.string,  # map_md5
+    osuTypes.i32,  # mods
+    osuTypes.u8,  # mode
+    osuTypes.i32,  # map_id
+    osuTypes.i64,  # rscore
+    osuTypes.f32,  # acc
+    osuTypes.i32,  # plays
+    osuTypes.i64,  # tscore
+    osuTypes.i32,  # rank
+    osuTypes.u16,  # pp
+)
+
+# packet id: 12
+_USER_LOGOUT = PacketEncoder(ServerPackets.USER_LOGOUT, osuTypes.i32, osuTypes.u8)
+
+# packet id: 13
+_SPECTATOR_JOINED = PacketEncoder(ServerPackets.SPECTATOR_JOINED, osuTypes.i32)
+
+# packet id: 14
+_SPECTATOR_LEFT = PacketEncoder(ServerPackets.SPECTATOR_LEFT, osuTypes.i32)
+
+# packet id: 15
+_SPECTATE_FRAMES = PacketEncoder(ServerPackets.SPECTATE_FRAMES, osuTypes.raw)
+
+# packet id: 19
+_VERSION_UPDATE = PacketEncoder(ServerPackets.VERSION_UPDATE)
+
+# packet id: 22
+_SPECTATOR_CANT_SPECTATE = PacketEncoder(
+    ServerPackets.SPECTATOR_CANT_SPECTATE,
+    osuTypes.i32,
+)
+
+# packet id: 23
+_GET_ATTENTION = PacketEncoder(ServerPackets.GET_ATTENTION)
+
+# packet id: 24
+_NOTIFICATION = PacketEncoder(ServerPackets.NOTIFICATION, osuTypes.string)
+
+# packet id: 26
+_UPDATE_MATCH = PacketEncoder(ServerPackets.UPDATE_MATCH, osuTypes.match)
+
+# packet id: 27
+_NEW_MATCH = PacketEncoder(ServerPackets.NEW_MATCH, osuTypes.match)
+
+# packet id: 28
+_DISPOSE_MATCH = PacketEncoder(ServerPackets.DISPOSE_MATCH, osuTypes.i32)
+
+# packet id: 34
+_TOGGLE_BLOCK_NON_FRIEND_DMS = PacketEncoder(ServerPackets.TOGGLE_BLOCK_NON_FRIEND_DMS)
+
+# packet id: 36
+_MATCH_JOIN_SUCCESS = PacketEncoder(ServerPackets.MATCH_JOIN_SUCCESS, osuTypes.match)
+
+# packet id: 37
+_MATCH_JOIN_FAIL = PacketEncoder(ServerPackets.MATCH_JOIN_FAIL)
+
+# packet id: 42
+_FELLOW_SPECTATOR_JOINED = PacketEncoder(
+    ServerPackets.FELLOW_SPECTATOR_JOINED,
+    osuTypes.i32,
+)
+
+# packet id: 43
+_FELLOW_SPECTATOR_LEFT = PacketEncoder(
+    ServerPackets.FELLOW_SPECTATOR_LEFT,
+    osuTypes.i32,
+)
+
+# packet id: 46
+_MATCH_START = PacketEncoder(ServerPackets.MATCH_START, osuTypes.match)
+
+# packet id: 48
+_MATCH_SCORE_UPDATE = PacketEncoder(
+    ServerPackets.MATCH_SCORE_UPDATE,
+    osuTypes.scoreframe,
+)
+
+# packet id: 50
+_MATCH_TRANSFER_HOST = PacketEncoder(ServerPackets.MATCH_TRANSFER_HOST)
+
+# packet id: 53
+_MATCH_ALL_PLAYERS_LOADED = PacketEncoder(ServerPackets.MATCH_ALL_PLAYERS_LOADED)
+
+# packet id: 57
+_MATCH_PLAYER_FAILED = PacketEncoder(ServerPackets.MATCH_PLAYER_FAILED, osuTypes.i32)
+
+# packet id: 58
+_MATCH_COMPLETE = PacketEncoder(ServerPackets.MATCH_COMPLETE)
+
+# packet id: 61
+_MATCH_SKIP = PacketEncoder(ServerPackets.MATCH_SKIP)
+
+# packet id: 64
+_CHANNEL_JOIN_SUCCESS = PacketEncoder(
+    ServerPackets.CHANNEL_JOIN_SUCCESS,
+    osuTypes.string,
+)
+
+# packet id: 65
+_CHANNEL_INFO = PacketEncoder(ServerPackets.CHANNEL_INFO, osuTypes.channel)
+
+# packet id: 66
+_CHANNEL_KICK = PacketEncoder(ServerPackets.CHANNEL_KICK, osuTypes.string)
+
+# packet id: 67
+_CHANNEL_AUTO_JOIN = PacketEncoder(ServerPackets.CHANNEL_AUTO_JOIN, osuTypes.channel)
+
+# packet id: 71
+_PRIVILEGES = PacketEncoder(ServerPackets.PRIVILEGES, osuTypes.i32)
+
+# packet id: 72
+_FRIENDS_LIST = PacketEncoder(ServerPackets.FRIENDS_LIST, osuTypes.i32_list)
+
+# packet id: 75
+_PROTOCOL_VERSION = PacketEncoder(ServerPackets.PROTOCOL_VERSION, osuTypes.i32)
+
+# packet id: 76
+_MAIN_MENU_ICON = PacketEncoder(ServerPackets.MAIN_MENU_ICON, osuTypes.string)
+
+# packet id: 80
+_MONITOR = PacketEncoder(ServerPackets.MONITOR)
+
+# packet id: 81
+_MATCH_PLAYER_SKIPPED = PacketEncoder(ServerPackets.MATCH_PLAYER_SKIPPED, osuTypes.i32)
+
+# packet id: 83
+_USER_PRESENCE = PacketEncoder(
+    ServerPackets.USER_PRESENCE,
+    osuTypes.i32,  # id
+    osuTypes.string,  # name
+    osuTypes.u8,  # utc_offset + 24
+    osuTypes.u8,  # country
+    osuTypes.u8,  # bancho_priv | (mode << 5)
+    osuTypes.f32,  # longitude
+    osuTypes.f32,  # latitude
+    osuTypes.i32,  # rank
+)
+
+# packet id: 86
+_RESTART = PacketEncoder(ServerPackets.RESTART, osuTypes.i32)
+
+# packet id: 88
+_MATCH_INVITE = PacketEncoder(ServerPackets.MATCH_INVITE, osuTypes.message)
+
+# packet id: 89
+_CHANNEL_INFO_END = PacketEncoder(ServerPackets.CHANNEL_INFO_END)
+
+# packet id: 91
+_MATCH_CHANGE_PASSWORD = PacketEncoder(
+    ServerPackets.MATCH_CHANGE_PASSWORD,
+    osuTypes.string,
+)
+
+# packet id: 92
+_SILENCE_END = PacketEncoder(ServerPackets.SILENCE_END, osuTypes.i32)
+
+# packet id: 94
+_USER_SILENCED = PacketEncoder(ServerPackets.USER_SILENCED, osuTypes.i32)
+
+# packet id: 95
+_USER_PRESENCE_SINGLE = PacketEncoder(ServerPackets.USER_PRESENCE_SINGLE, osuTypes.i32)
+
+# packet id: 96
+_USER_PRESENCE_BUNDLE = PacketEncoder(
+    ServerPackets.USER_PRESENCE_BUNDLE,
+    osuTypes.i32_list,
+)
+
+# packet id: 100
+_USER_DM_BLOCKED = PacketEncoder(ServerPackets.USER_DM_BLOCKED, osuTypes.message)
+
+# packet id: 101
+_TARGET_IS_SILENCED = PacketEncoder(ServerPackets.TARGET_IS_SILENCED, osuTypes.message)
+
+# packet id: 102
+_VERSION_UPDATE_FORCED = PacketEncoder(ServerPackets.VERSION_UPDATE_FORCED)
+
+# packet id: 103
+_SWITCH_SERVER = PacketEncoder(ServerPackets.SWITCH_SERVER, osuTypes.i32)
+
+# packet id: 104
+_ACCOUNT_RESTRICTED = PacketEncoder(ServerPackets.ACCOUNT_RESTRICTED)
+
+# packet id: 105
+_RTX = PacketEncoder(ServerPackets.RTX, osuTypes.string)
+
+# packet id: 106
+_MATCH_ABORT = PacketEncoder(ServerPackets.MATCH_ABORT)
+
+# packet id: 107
+_SWITCH_TOURNAMENT_SERVER = PacketEncoder(
+    ServerPackets.SWITCH_TOURNAMENT_SERVER,
+    osuTypes.string,
+)
+
 
 class LoginFailureReason(IntEnum):
     AUTHENTICATION_FAILED = -1
@@ -770,30 +1155,24 @@ def login_reply(user_id: int) -> bytes:
 
     In failure cases, we'll send a negative integer of type `LoginFailureReason`.
     """
-    return write(ServerPackets.USER_ID, (user_id, osuTypes.i32))
+    return _USER_ID.pack(user_id)
 
 
 # packet id: 7
 def send_message(sender: str, msg: str, recipient: str, sender_id: int) -> bytes:
-    return write(
-        ServerPackets.SEND_MESSAGE,
-        ((sender, msg, recipient, sender_id), osuTypes.message),
-    )
+    return _SEND_MESSAGE.pack(sender, msg, recipient, sender_id)
 
 
 # packet id: 8
 @cache
 def pong() -> bytes:
-    return write(ServerPackets.PONG)
+    return _PONG.pack()
 
 
 # packet id: 9
 # NOTE: deprecated
 def change_username(old: str, new: str) -> bytes:
-    return write(
-        ServerPackets.HANDLE_IRC_CHANGE_USERNAME,
-        (f"{old}>>>>{new}", osuTypes.string),
-    )
+    return _HANDLE_IRC_CHANGE_USERNAME.pack(f"{old}>>>>{new}")
 
 
 BOT_STATUSES = (
@@ -818,21 +1197,20 @@ def bot_stats(player: Player) -> bytes:
     # pick at random from list of potential statuses.
     status_id, status_txt = random.choice(BOT_STATUSES)
 
-    return write(
-        ServerPackets.USER_STATS,
-        (player.id, osuTypes.i32),  # id
-        (status_id, osuTypes.u8),  # action
-        (status_txt, osuTypes.string),  # info_text
-        ("", osuTypes.string),  # map_md5
-        (0, osuTypes.i32),  # mods
-        (0, osuTypes.u8),  # mode
-        (0, osuTypes.i32),  # map_id
-        (0, osuTypes.i64),  # rscore
-        (0.0, osuTypes.f32),  # acc
-        (0, osuTypes.i32),  # plays
-        (0, osuTypes.i64),  # tscore
-        (0, osuTypes.i32),  # rank
-        (0, osuTypes.u16),  # pp
+    return _USER_STATS.pack(
+        player.id,  # id
+        status_id,  # action
+        status_txt,  # info_text
+        "",  # map_md5
+        0,  # mods
+        0,  # mode
+        0,  # map_id
+        0,  # rscore
+        0.0,  # acc
+        0,  # plays
+        0,  # tscore
+        0,  # rank
+        0,  # pp
     )
 
 
@@ -858,21 +1236,20 @@ def _user_stats(
         ranked_score = pp
         pp = 0
 
-    return write(
-        ServerPackets.USER_STATS,
-        (user_id, osuTypes.i32),
-        (action, osuTypes.u8),
-        (info_text, osuTypes.string),
-        (map_md5, osuTypes.string),
-        (mods, osuTypes.i32),
-        (mode, osuTypes.u8),
-        (map_id, osuTypes.i32),
-        (ranked_score, osuTypes.i64),
-        (accuracy / 100.0, osuTypes.f32),
-        (plays, osuTypes.i32),
-        (total_score, osuTypes.i64),
-        (global_rank, osuTypes.i32),
-        (pp, osuTypes.u16),
+    return _USER_STATS.pack(
+        user_id,
+        action,
+        info_text,
+        map_md5,
+        mods,
+        mode,
+        map_id,
+        ranked_score,
+        accuracy / 100.0,
+        plays,
+        total_score,
+        global_rank,
+        pp,
     )
 
 
@@ -887,40 +1264,39 @@ def user_stats(player: Player) -> bytes:
         rscore = gm_stats.rscore
         pp = gm_stats.pp
 
-    return write(
-        ServerPackets.USER_STATS,
-        (player.id, osuTypes.i32),
-        (player.status.action, osuTypes.u8),
-        (player.status.info_text, osuTypes.string),
-        (player.status.map_md5, osuTypes.string),
-        (player.status.mods, osuTypes.i32),
-        (player.status.mode.as_vanilla, osuTypes.u8),
-        (player.status.map_id, osuTypes.i32),
-        (rscore, osuTypes.i64),
-        (gm_stats.acc / 100.0, osuTypes.f32),
-        (gm_stats.plays, osuTypes.i32),
-        (gm_stats.tscore, osuTypes.i64),
-        (gm_stats.rank, osuTypes.i32),
-        (pp, osuTypes.u16),
+    return _USER_STATS.pack(
+        player.id,
+        player.status.action,
+        player.status.info_text,
+        player.status.map_md5,
+        player.status.mods,
+        player.status.mode.as_vanilla,
+        player.status.map_id,
+        rscore,
+        gm_stats.acc / 100.0,
+        gm_stats.plays,
+        gm_stats.tscore,
+        gm_stats.rank,
+        pp,
     )
 
 
 # packet id: 12
 @cache
 def logout(user_id: int) -> bytes:
-    return write(ServerPackets.USER_LOGOUT, (user_id, osuTypes.i32), (0, osuTypes.u8))
+    return _USER_LOGOUT.pack(user_id, 0)
 
 
 # packet id: 13
 @cache
 def spectator_joined(user_id: int) -> bytes:
-    return write(ServerPackets.SPECTATOR_JOINED, (user_id, osuTypes.i32))
+    return _SPECTATOR_JOINED.pack(user_id)
 
 
 # packet id: 14
 @cache
 def spectator_left(user_id: int) -> bytes:
-    return write(ServerPackets.SPECTATOR_LEFT, (user_id, osuTypes.i32))
+    return _SPECTATOR_LEFT.pack(user_id)
 
 
 # packet id: 15
@@ -930,81 +1306,81 @@ def spectate_frames(data: bytes) -> bytes:
 
     # spectator frames *received* by the server are always validated.
 
-    return write(ServerPackets.SPECTATE_FRAMES, (data, osuTypes.raw))
+    return _SPECTATE_FRAMES.pack(data)
 
 
 # packet id: 19
 @cache
 def version_update() -> bytes:
-    return write(ServerPackets.VERSION_UPDATE)
+    return _VERSION_UPDATE.pack()
 
 
 # packet id: 22
 @cache
 def spectator_cant_spectate(user_id: int) -> bytes:
-    return write(ServerPackets.SPECTATOR_CANT_SPECTATE, (user_id, osuTypes.i32))
+    return _SPECTATOR_CANT_SPECTATE.pack(user_id)
 
 
 # packet id: 23
 @cache
 def get_attention() -> bytes:
-    return write(ServerPackets.GET_ATTENTION)
+    return _GET_ATTENTION.pack()
 
 
 # packet id: 24
 @lru_cache(maxsize=4)
 def notification(msg: str) -> bytes:
-    return write(ServerPackets.NOTIFICATION, (msg, osuTypes.string))
+    return _NOTIFICATION.pack(msg)
 
 
 # packet id: 26
 def update_match(m: Match, send_pw: bool = True) -> bytes:
-    return write(ServerPackets.UPDATE_MATCH, ((m, send_pw), osuTypes.match))
+    return _UPDATE_MATCH.pack(m, send_pw)
 
 
 # packet id: 27
 def new_match(m: Match) -> bytes:
-    return write(ServerPackets.NEW_MATCH, ((m, True), osuTypes.match))
+    return _NEW_MATCH.pack(m, True)
 
 
 # packet id: 28
 @cache
 def dispose_match(id: int) -> bytes:
-    return write(ServerPackets.DISPOSE_MATCH, (id, osuTypes.i32))
+    return _DISPOSE_MATCH.pack(id)
 
 
 # packet id: 34
 @cache
 def toggle_block_non_friend_dm() -> bytes:
-    return write(ServerPackets.TOGGLE_BLOCK_NON_FRIEND_DMS)
+    return _TOGGLE_BLOCK_NON_FRIEND_DMS.pack()
 
 
 # packet id: 36
 def match_join_success(m: Match) -> bytes:
-    return write(ServerPackets.MATCH_JOIN_SUCCESS, ((m, True), osuTypes.match))
+    return _MATCH_JOIN_SUCCESS.pack(m, True)
 
 
 # packet id: 37
 @cache
 def match_join_fail() -> bytes:
-    return write(ServerPackets.MATCH_JOIN_FAIL)
+    return _MATCH_JOIN_FAIL.pack()
 
 
 # packet id: 42
 @cache
 def fellow_spectator_joined(user_id: int) -> bytes:
-    return write(ServerPackets.FELLOW_SPECTATOR_JOINED, (user_id, osuTypes.i32))
+    return _FELLOW_SPECTATOR_JOINED.pack(user_id)
 
 
 # packet id: 43
 @cache
 def fellow_spectator_left(user_id: int) -> bytes:
-    return write(ServerPackets.FELLOW_SPECTATOR_LEFT, (user_id, osuTypes.i32))
+    return _FELLOW_SPECTATOR_LEFT.pack(user_id)
 
 
 # packet id: 46
 def match_start(m: Match) -> bytes:
-    return write(ServerPackets.MATCH_START, ((m, True), osuTypes.match))
+    return _MATCH_START.pack(m, True)
 
 
 # packet id: 48
@@ -1013,64 +1389,61 @@ def match_start(m: Match) -> bytes:
 #       rather than parsing them. Though I might
 #       end up doing it eventually for security reasons
 def match_score_update(frame: ScoreFrame) -> bytes:
-    return write(ServerPackets.MATCH_SCORE_UPDATE, (frame, osuTypes.scoreframe))
+    return _MATCH_SCORE_UPDATE.pack(frame)
 
 
 # packet id: 50
 @cache
 def match_transfer_host() -> bytes:
-    return write(ServerPackets.MATCH_TRANSFER_HOST)
+    return _MATCH_TRANSFER_HOST.pack()
 
 
 # packet id: 53
 @cache
 def match_all_players_loaded() -> bytes:
-    return write(ServerPackets.MATCH_ALL_PLAYERS_LOADED)
+    return _MATCH_ALL_PLAYERS_LOADED.pack()
 
 
 # packet id: 57
 @cache
 def match_player_failed(slot_id: int) -> bytes:
-    return write(ServerPackets.MATCH_PLAYER_FAILED, (slot_id, osuTypes.i32))
+    return _MATCH_PLAYER_FAILED.pack(slot_id)
 
 
 # packet id: 58
 @cache
 def match_complete() -> bytes:
-    return write(ServerPackets.MATCH_COMPLETE)
+    return _MATCH_COMPLETE.pack()
 
 
 # packet id: 61
 @cache
 def match_skip() -> bytes:
-    return write(ServerPackets.MATCH_SKIP)
+    return _MATCH_SKIP.pack()
 
 
 # packet id: 64
 @lru_cache(maxsize=16)
 def channel_join(name: str) -> bytes:
-    return write(ServerPackets.CHANNEL_JOIN_SUCCESS, (name, osuTypes.string))
+    return _CHANNEL_JOIN_SUCCESS.pack(name)
 
 
 # packet id: 65
 @lru_cache(maxsize=8)
 def channel_info(name: str, topic: str, p_count: int) -> bytes:
-    return write(ServerPackets.CHANNEL_INFO, ((name, topic, p_count), osuTypes.channel))
+    return _CHANNEL_INFO.pack(name, topic, p_count)
 
 
 # packet id: 66
 @lru_cache(maxsize=8)
 def channel_kick(name: str) -> bytes:
-    return write(ServerPackets.CHANNEL_KICK, (name, osuTypes.string))
+    return _CHANNEL_KICK.pack(name)
 
 
 # packet id: 67
 @lru_cache(maxsize=8)
 def channel_auto_join(name: str, topic: str, p_count: int) -> bytes:
-    return write(
-        ServerPackets.CHANNEL_AUTO_JOIN,
-        ((name, topic, p_count), osuTypes.channel),
-    )
+    return _CHANNEL_AUTO_JOIN.pack(name, topic, p_count)
 
 
 # packet id: 69
@@ -1084,27 +1457,24 @@ def channel_auto_join(name: str, topic: str, p_count: int) -> bytes:
 # packet id: 71
 @cache
 def bancho_privileges(priv: int) -> bytes:
-    return write(ServerPackets.PRIVILEGES, (priv, osuTypes.i32))
+    return _PRIVILEGES.pack(priv)
 
 
 # packet id: 72
 def friends_list(friends: Collection[int]) -> bytes:
-    return write(ServerPackets.FRIENDS_LIST, (friends, osuTypes.i32_list))
+    return _FRIENDS_LIST.pack(friends)
 
 
 # packet id: 75
 @cache
 def protocol_version(ver: int) -> bytes:
-    return write(ServerPackets.PROTOCOL_VERSION, (ver, osuTypes.i32))
+    return _PROTOCOL_VERSION.pack(ver)
 
 
 # packet id: 76
 @cache
 def main_menu_icon(icon_url: str, onclick_url: str) -> bytes:
-    return write(
-        ServerPackets.MAIN_MENU_ICON,
-        (icon_url + "|" + onclick_url, osuTypes.string),
-    )
+    return _MAIN_MENU_ICON.pack(icon_url + "|" + onclick_url)
 
 
 # packet id: 80
@@ -1118,13 +1488,13 @@ def monitor() -> bytes:
 
     # this doesn't work on newer clients, and I had no plans
     # of trying to put it to use - just coded for completion.
-    return write(ServerPackets.MONITOR)
+    return _MONITOR.pack()
 
 
 # packet id: 81
 @cache
 def match_player_skipped(user_id: int) -> bytes:
-    return write(ServerPackets.MATCH_PLAYER_SKIPPED, (user_id, osuTypes.i32))
+    return _MATCH_PLAYER_SKIPPED.pack(user_id)
 
 
 # since the bot is always online and is
@@ -1133,16 +1503,15 @@ def match_player_skipped(user_id: int) -> bytes:
 # *very* frequently; only build it once.
 @cache
 def bot_presence(player: Player) -> bytes:
-    return write(
-        ServerPackets.USER_PRESENCE,
-        (player.id, osuTypes.i32),
-        (player.name, osuTypes.string),
-        (-5 + 24, osuTypes.u8),
-        (245, osuTypes.u8),  # satellite provider
-        (31, osuTypes.u8),
-        (1234.0, osuTypes.f32),  # send coordinates waaay
-        (4321.0, osuTypes.f32),  # off the map for the bot
-        (0, osuTypes.i32),
+    return _USER_PRESENCE.pack(
+        player.id,
+        player.name,
+        -5 + 24,
+        245,  # satellite provider
+        31,
+        1234.0,  # send coordinates waaay
+        4321.0,  # off the map for the bot
+        0,
     )
 
 
@@ -1158,69 +1527,64 @@ def _user_presence(
     longitude: int,
     global_rank: int,
 ) -> bytes:
-    return write(
-        ServerPackets.USER_PRESENCE,
-        (user_id, osuTypes.i32),
-        (name, osuTypes.string),
-        (utc_offset + 24, osuTypes.u8),
-        (country_code, osuTypes.u8),
-        (bancho_privileges | (mode << 5), osuTypes.u8),
-        (longitude, osuTypes.f32),
-        (latitude, osuTypes.f32),
-        (global_rank, osuTypes.i32),
+    return _USER_PRESENCE.pack(
+        user_id,
+        name,
+        utc_offset + 24,
+        country_code,
+        bancho_privileges | (mode << 5),
+        longitude,
+        latitude,
+        global_rank,
     )
 
 
 def user_presence(player: Player) -> bytes:
-    return write(
-        ServerPackets.USER_PRESENCE,
-        (player.id, osuTypes.i32),
-        (player.name, osuTypes.string),
-        (player.utc_offset + 24, osuTypes.u8),
-        (player.geoloc["country"]["numeric"], osuTypes.u8),
-        (player.bancho_priv | (player.status.mode.as_vanilla << 5), osuTypes.u8),
-        (player.geoloc["longitude"], osuTypes.f32),
-        (player.geoloc["latitude"], osuTypes.f32),
-        (player.gm_stats.rank, osuTypes.i32),
+    return _USER_PRESENCE.pack(
+        player.id,
+        player.name,
+        player.utc_offset + 24,
+        player.geoloc["country"]["numeric"],
+        player.bancho_priv | (player.status.mode.as_vanilla << 5),
+        player.geoloc["longitude"],
+        player.geoloc["latitude"],
+        player.gm_stats.rank,
     )
 
 
 # packet id: 86
 @cache
 def restart_server(ms: int) -> bytes:
-    return write(ServerPackets.RESTART, (ms, osuTypes.i32))
+    return _RESTART.pack(ms)
 
 
 # packet id: 88
 def match_invite(player: Player, target_name: str) -> bytes:
     assert player.match is not None
     msg = f"Come join my game: {player.match.embed}."
-    return write(
-        ServerPackets.MATCH_INVITE,
-        ((player.name, msg, target_name, player.id), osuTypes.message),
-    )
+    return _MATCH_INVITE.pack(player.name, msg, target_name, player.id)
 
 
 # packet id: 89
 @cache
 def channel_info_end() -> bytes:
-    return write(ServerPackets.CHANNEL_INFO_END)
+    return _CHANNEL_INFO_END.pack()
 
 
 # packet id: 91
 def match_change_password(new: str) -> bytes:
-    return write(ServerPackets.MATCH_CHANGE_PASSWORD, (new, osuTypes.string))
+    return _MATCH_CHANGE_PASSWORD.pack(new)
 
 
 # packet id: 92
 def silence_end(delta: int) -> bytes:
-    return write(ServerPackets.SILENCE_END, (delta, osuTypes.i32))
+    return _SILENCE_END.pack(delta)
 
 
 # packet id: 94
 @cache
 def user_silenced(user_id: int) -> bytes:
-    return write(ServerPackets.USER_SILENCED, (user_id, osuTypes.i32))
+    return _USER_SILENCED.pack(user_id)
 
 
 """ not sure why 95 & 96 exist? unused in bancho.py """
@@ -1229,44 +1593,41 @@ def user_silenced(user_id: int) -> bytes:
 # packet id: 95
 @cache
 def user_presence_single(user_id: int) -> bytes:
-    return write(ServerPackets.USER_PRESENCE_SINGLE, (user_id, osuTypes.i32))
+    return _USER_PRESENCE_SINGLE.pack(user_id)
 
 
 # packet id: 96
 def user_presence_bundle(user_ids: Collection[int]) -> bytes:
-    return write(ServerPackets.USER_PRESENCE_BUNDLE, (user_ids, osuTypes.i32_list))
+    return _USER_PRESENCE_BUNDLE.pack(user_ids)
 
 
 # packet id: 100
 def user_dm_blocked(target: str) -> bytes:
-    return write(ServerPackets.USER_DM_BLOCKED, (("", "", target, 0), osuTypes.message))
+    return _USER_DM_BLOCKED.pack("", "", target, 0)
 
 
 # packet id: 101
 def target_silenced(target: str) -> bytes:
-    return write(
-        ServerPackets.TARGET_IS_SILENCED,
-        (("", "", target, 0), osuTypes.message),
-    )
+    return _TARGET_IS_SILENCED.pack("", "", target, 0)
 
 
 # packet id: 102
 @cache
 def version_update_forced() -> bytes:
-    return write(ServerPackets.VERSION_UPDATE_FORCED)
+    return _VERSION_UPDATE_FORCED.pack()
 
 
 # packet id: 103
 def switch_server(t: int) -> bytes:
     # increment endpoint index if
     # idletime >= t && match == null
-    return write(ServerPackets.SWITCH_SERVER, (t, osuTypes.i32))
+    return _SWITCH_SERVER.pack(t)
 
 
 # packet id: 104
 @cache
 def account_restricted() -> bytes:
-    return write(ServerPackets.ACCOUNT_RESTRICTED)
+    return _ACCOUNT_RESTRICTED.pack()
 
 
 # packet id: 105
@@ -1276,13 +1637,13 @@ def rtx(msg: str) -> bytes:
     # to show some visual effects on screen for 5 seconds:
     # - black screen, freezes game, beeps loudly.
     # within the next 3-8 seconds at random.
-    return write(ServerPackets.RTX, (msg, osuTypes.string))
+    return _RTX.pack(msg)
 
 
 # packet id: 106
 @cache
 def match_abort() -> bytes:
-    return write(ServerPackets.MATCH_ABORT)
+    return _MATCH_ABORT.pack()
 
 
 # packet id: 107
@@ -1290,4 +1651,4 @@ def switch_tournament_server(ip: str) -> bytes:
     # the client only reads the string if it's
     # not on the client's normal endpoints,
     # but we can send it either way xd.
-    return write(ServerPackets.SWITCH_TOURNAMENT_SERVER, (ip, osuTypes.string))
+    return _SWITCH_TOURNAMENT_SERVER.pack(ip)
@@ -250,6 +250,7 @@ async def fetch_many(
     artist: str | None = None,
     creator: str | None = None,
     filename: str | None = None,
+    filenames: list[str] | None = None,
     mode: int | None = None,
     frozen: bool | None = None,
     page: int | None = None,
@@ -270,6 +271,8 @@ async def fetch_many(
         select_stmt = select_stmt.where(MapsTable.creator == creator)
     if filename is not None:
         select_stmt = select_stmt.where(MapsTable.filename == filename)
+    if filenames is not None:
+        select_stmt = select_stmt.where(MapsTable.filename.in_(filenames))
     if mode is not None:
         select_stmt = select_stmt.where(MapsTable.mode == mode)
     if frozen is not None:
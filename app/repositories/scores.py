@@ -202,6 +202,7 @@ async def fetch_count(
 
 async def fetch_many(
     map_md5: str | None = None,
+    map_md5s: list[str] | None = None,
     mods: int | None = None,
     status: int | None = None,
     mode: int | None = None,
@@ -212,6 +213,8 @@ async def fetch_many(
     select_stmt = select(*READ_PARAMS)
     if map_md5 is not None:
         select_stmt = select_stmt.where(ScoresTable.map_md5 == map_md5)
+    if map_md5s is not None:
+        select_stmt = select_stmt.where(ScoresTable.map_md5.in_(map_md5s))
     if mods is not None:
         select_stmt = select_stmt.where(ScoresTable.mods == mods)
     if status is not None:
@@ -20,6 +20,10 @@ DB_USER = os.environ["DB_USER"]
 DB_PASS = quote(os.environ["DB_PASS"])
 DB_NAME = os.environ["DB_NAME"]
 DB_DSN = f"mysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "10"))
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", "1024"))
+DB_SLOW_QUERY_THRESHOLD_MS = int(os.environ.get("DB_SLOW_QUERY_THRESHOLD_MS", "250"))
 
 REDIS_HOST = os.environ["REDIS_HOST"]
 REDIS_PORT = int(os.environ["REDIS_PORT"])
@@ -57,6 +61,50 @@ IRC_PORT = int(os.environ["IRC_PORT"])
 ENABLE_PROMETHEUS= read_bool(os.environ["ENABLE_PROMETHEUS"])
 PROMETHEUS_PORT = int(os.environ["PROMETHEUS_PORT"])
 
+# bcrypt thread pool; limits how much password hashing work may pile up
+BCRYPT_WORKERS = int(os.environ.get("BCRYPT_WORKERS", "4"))
+BCRYPT_MAX_QUEUED = int(os.environ.get("BCRYPT_MAX_QUEUED", "64"))
+BCRYPT_MAX_IN_FLIGHT_PER_IP = int(os.environ.get("BCRYPT_MAX_IN_FLIGHT_PER_IP", "4"))
+
+# cache of verified {bcrypt: md5} credentials; ttl in seconds
+BCRYPT_CACHE_MAX_ENTRIES = int(os.environ.get("BCRYPT_CACHE_MAX_ENTRIES", "10000"))
+BCRYPT_CACHE_TTL = int(os.environ.get("BCRYPT_CACHE_TTL", "21600"))
+
+# per-player outbound packet queue limit (in bytes), and what to do
+# when it's exceeded: "disconnect" the player, or "drop" the packet
+PACKET_QUEUE_MAX_BYTES = int(os.environ.get("PACKET_QUEUE_MAX_BYTES", "2097152"))
+PACKET_QUEUE_OVERFLOW_POLICY = os.environ.get("PACKET_QUEUE_OVERFLOW_POLICY", "disconnect")
+
+# chat log rotation; by size (in bytes) & age (in seconds)
+CHAT_LOG_MAX_BYTES = int(os.environ.get("CHAT_LOG_MAX_BYTES", "52428800"))
+CHAT_LOG_ROTATE_INTERVAL = int(os.environ.get("CHAT_LOG_ROTATE_INTERVAL", "86400"))
+CHAT_LOG_COMPRESS = read_bool(os.environ.get("CHAT_LOG_COMPRESS", "true"))
+
+# performance calculation worker processes; each caches parsed beatmaps
+PERFORMANCE_WORKERS = int(os.environ.get("PERFORMANCE_WORKERS", "2"))
+PERFORMANCE_CACHE_MAX_BEATMAPS = int(os.environ.get("PERFORMANCE_CACHE_MAX_BEATMAPS", "256"))
+
+# cache of beatmap leaderboards served to /web/osu-osz2-getscores.php; ttl in seconds
+LEADERBOARD_CACHE_MAX_ENTRIES = int(os.environ.get("LEADERBOARD_CACHE_MAX_ENTRIES", "1000"))
+LEADERBOARD_CACHE_TTL = int(os.environ.get("LEADERBOARD_CACHE_TTL", "600"))
+# number of most played beatmaps to preload leaderboards (in each of their modes) for
+# at startup; like any others, they expire after LEADERBOARD_CACHE_TTL & reload lazily
+LEADERBOARD_CACHE_WARMUP = int(os.environ.get("LEADERBOARD_CACHE_WARMUP", "100"))
+
+# cache of users' top scores, for total pp & acc; verified against sql every interval (seconds)
+TOP_SCORES_CACHE_MAX_ENTRIES = int(os.environ.get("TOP_SCORES_CACHE_MAX_ENTRIES", "5000"))
+TOP_SCORES_RECONCILE_INTERVAL = int(os.environ.get("TOP_SCORES_RECONCILE_INTERVAL", "900"))
+
+# cache of beatmap sets (& their maps); bounded by their estimated size in bytes
+BEATMAP_CACHE_MAX_BYTES = int(os.environ.get("BEATMAP_CACHE_MAX_BYTES", "67108864"))
+# seconds to remember beatmaps (& .osu files) which couldn't be found
+BEATMAP_NEGATIVE_CACHE_TTL = int(os.environ.get("BEATMAP_NEGATIVE_CACHE_TTL", "60"))
+# cache of formatted osu!direct search responses; fresh for DIRECT_SEARCH_CACHE_TTL
+# seconds, then served for DIRECT_SEARCH_CACHE_STALE_TTL more while being refetched
+DIRECT_SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get("DIRECT_SEARCH_CACHE_MAX_ENTRIES", "1000"))
+DIRECT_SEARCH_CACHE_TTL = int(os.environ.get("DIRECT_SEARCH_CACHE_TTL", "300"))
+DIRECT_SEARCH_CACHE_STALE_TTL = int(os.environ.get("DIRECT_SEARCH_CACHE_STALE_TTL", "3600"))
+
 
 REDIS_AUTH_STRING = f"{REDIS_USER}:{REDIS_PASS}@" if REDIS_USER and REDIS_PASS else ""
 REDIS_DSN = f"redis://{REDIS_AUTH_STRING}{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
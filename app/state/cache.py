@@ -2,13 +2,46 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+import app.settings
+from app.caching import BeatmapCache
+from app.caching import LRUCache
+from app.caching import StaleWhileRevalidateCache
+
 if TYPE_CHECKING:
-    from app.objects.beatmap import Beatmap
-    from app.objects.beatmap import BeatmapSet
+    from app.objects.leaderboard import Leaderboard
+    from app.objects.leaderboard import LeaderboardKey
+    from app.objects.top_scores import TopScores
+    from app.objects.top_scores import TopScoresKey
 
 
-bcrypt: dict[bytes, bytes] = {}  # {bcrypt: md5, ...}
-beatmap: dict[str | int, Beatmap] = {}  # {md5: map, id: map, ...}
-beatmapset: dict[int, BeatmapSet] = {}  # {bsid: map_set}
+bcrypt: LRUCache[bytes, bytes] = LRUCache(  # {bcrypt: md5, ...}
+    maxsize=app.settings.BCRYPT_CACHE_MAX_ENTRIES,
+    ttl=app.settings.BCRYPT_CACHE_TTL,
+    hits_metric="ex_bcrypt_cache_hits",
+    misses_metric="ex_bcrypt_cache_misses",
+)
+leaderboards: LRUCache[LeaderboardKey, Leaderboard] = LRUCache(
+    maxsize=app.settings.LEADERBOARD_CACHE_MAX_ENTRIES,
+    ttl=app.settings.LEADERBOARD_CACHE_TTL,
+    hits_metric="ex_leaderboard_cache_hits",
+    misses_metric="ex_leaderboard_cache_misses",
+)
+top_scores: LRUCache[TopScoresKey, TopScores] = LRUCache(
+    maxsize=app.settings.TOP_SCORES_CACHE_MAX_ENTRIES,
+    hits_metric="ex_top_scores_cache_hits",
+    misses_metric="ex_top_scores_cache_misses",
+)
+beatmaps = BeatmapCache(max_bytes=app.settings.BEATMAP_CACHE_MAX_BYTES)
+# {(query, mode, status, page): response, ...}
+direct_search: StaleWhileRevalidateCache[tuple[str, int, int, int], bytes] = (
+    StaleWhileRevalidateCache(
+        maxsize=app.settings.DIRECT_SEARCH_CACHE_MAX_ENTRIES,
+        ttl=app.settings.DIRECT_SEARCH_CACHE_TTL,
+        stale_ttl=app.settings.DIRECT_SEARCH_CACHE_STALE_TTL,
+        hits_metric="ex_direct_search_cache_hits",
+        misses_metric="ex_direct_search_cache_misses",
+        hit_ratio_metric="ex_direct_search_cache_hit_ratio",
+    )
+)
 unsubmitted: set[str] = set()  # {md5, ...}
 needs_update: set[str] = set()  # {md5, ...}
@@ -20,7 +20,11 @@ from redis import asyncio as aioredis
 import app.settings
 import app.state
 from app._typing import IPAddress
+from app.adapters.chat_log import ChatLog
 from app.adapters.database import Database
+from app.adapters.osu_file_index import OsuFileIndex
+from app.adapters.password_hasher import PasswordHasher
+from app.adapters.performance_calculator import PerformanceCalculator
 from app.logging import Ansi
 from app.logging import log
 
@@ -33,7 +37,12 @@ SQL_UPDATES_FILE = Path.cwd() / "migrations/migrations.sql"
 """ session objects """
 
 http_client = httpx.AsyncClient()
-database = Database(app.settings.DB_DSN)
+database = Database(
+    app.settings.DB_DSN,
+    min_pool_size=app.settings.DB_POOL_MIN_SIZE,
+    max_pool_size=app.settings.DB_POOL_MAX_SIZE,
+    statement_cache_size=app.settings.DB_STATEMENT_CACHE_SIZE,
+)
 redis: aioredis.Redis = aioredis.from_url(app.settings.REDIS_DSN)  # type: ignore[no-untyped-call]
 
 datadog: datadog_client.ThreadStats | None = None
@@ -44,6 +53,28 @@ if str(app.settings.DATADOG_API_KEY) and str(app.settings.DATADOG_APP_KEY):
     )
     datadog = datadog_client.ThreadStats()  # type: ignore[no-untyped-call]
 
+password_hasher = PasswordHasher(
+    max_workers=app.settings.BCRYPT_WORKERS,
+    max_queued=app.settings.BCRYPT_MAX_QUEUED,
+    max_in_flight_per_ip=app.settings.BCRYPT_MAX_IN_FLIGHT_PER_IP,
+)
+
+performance_calculator = PerformanceCalculator(
+    max_workers=app.settings.PERFORMANCE_WORKERS,
+)
+
+osu_file_index = OsuFileIndex(
+    directory=Path.cwd() / ".data/osu",
+    path=Path.cwd() / ".data/osu_files.db",
+)
+
+chat_log = ChatLog(
+    path=Path.cwd() / ".data/logs/chat.log",
+    max_bytes=app.settings.CHAT_LOG_MAX_BYTES,
+    rotate_interval=app.settings.CHAT_LOG_ROTATE_INTERVAL,
+    compress=app.settings.CHAT_LOG_COMPRESS,
+)
+
 ip_resolver: IPResolver
 
 """ session usecases """
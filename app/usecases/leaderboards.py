@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import AsyncIterable
+from collections.abc import Collection
+from collections.abc import Mapping
+from typing import Any
+
+from redis import asyncio as aioredis
+from sqlalchemy import bindparam
+from sqlalchemy import text
+
+from app.adapters.database import Database
+from app.constants.gamemodes import GameMode
+from app.constants.privileges import Privileges
+
+LEADERBOARD_PREFIX = "bancho:leaderboard"
+
+# leaderboards are built under these keys, before replacing the live ones
+REBUILD_PREFIX = "bancho:leaderboard-rebuild"
+
+# the amount of entries buffered before being sent to redis
+REBUILD_BATCH_SIZE = 10_000
+
+
+def _leaderboard_keys(mode: int, country: str) -> tuple[str, str]:
+    """The (global, country) leaderboard key suffixes for a mode."""
+    return f"{mode}", f"{mode}:{country}"
+
+
+async def _scan_keys(redis: aioredis.Redis, prefix: str, mode: int) -> set[str]:
+    keys: set[str] = set()
+    for pattern in (f"{prefix}:{mode}", f"{prefix}:{mode}:*"):
+        async for key in redis.scan_iter(match=pattern, count=1000):
+            keys.add(key.decode() if isinstance(key, bytes) else key)
+
+    return keys
+
+
+async def build_leaderboards(
+    redis: aioredis.Redis,
+    rows: AsyncIterable[Mapping[str, Any]],
+    modes: Collection[int] = tuple(GameMode),
+) -> dict[int, int]:
+    """\
+    Replace the global & country leaderboards of the given modes
+    with users' pp from `rows` (with "id", "mode", "pp" & "country").
+
+    Entries are sent in batches of pipelined ZADDs into temporary keys,
+    which are then renamed over the live leaderboards in one transaction
+    (along with deleting any leaderboards left without players); so
+    readers never see a partially built leaderboard. Updates made to the
+    live leaderboards while building are overwritten.
+
+    Returns the amount of players on each mode's global leaderboard.
+    """
+    modes = {int(mode) for mode in modes}
+
+    # clear anything left behind by an interrupted rebuild
+    for mode in modes:
+        stale_keys = await _scan_keys(redis, REBUILD_PREFIX, mode)
+        if stale_keys:
+            await redis.delete(*stale_keys)
+
+    built: set[str] = set()
+    counts = dict.fromkeys(modes, 0)
+
+    # {key suffix: {user id: pp}}
+    batch: defaultdict[str, dict[str, float]] = defaultdict(dict)
+    batch_size = 0
+
+    async def flush() -> None:
+        async with redis.pipeline(transaction=False) as pipe:
+            for suffix, mapping in batch.items():
+                pipe.zadd(f"{REBUILD_PREFIX}:{suffix}", mapping)
+
+            await pipe.execute()
+
+        built.update(batch)
+        batch.clear()
+
+    async for row in rows:
+        if row["mode"] not in modes:
+            continue
+
+        user_id = str(row["id"])
+        for suffix in _leaderboard_keys(row["mode"], row["country"]):
+            batch[suffix][user_id] = row["pp"]
+
+        counts[row["mode"]] += 1
+        batch_size += 1
+
+        if batch_size >= REBUILD_BATCH_SIZE:
+            await flush()
+            batch_size = 0
+
+    if batch:
+        await flush()
+
+    # leaderboards which are no longer populated are removed
+    live_keys: set[str] = set()
+    for mode in modes:
+        live_keys |= await _scan_keys(redis, LEADERBOARD_PREFIX, mode)
+
+    async with redis.pipeline(transaction=True) as pipe:
+        for suffix in built:
+            pipe.rename(f"{REBUILD_PREFIX}:{suffix}", f"{LEADERBOARD_PREFIX}:{suffix}")
+
+        stale_keys = live_keys - {f"{LEADERBOARD_PREFIX}:{suffix}" for suffix in built}
+        if stale_keys:
+            pipe.delete(*stale_keys)
+
+        await pipe.execute()
+
+    return counts
+
+
+async def rebuild_leaderboards(
+    database: Database,
+    redis: aioredis.Redis,
+    modes: Collection[int] = tuple(GameMode),
+) -> dict[int, int]:
+    """\
+    Rebuild the global & country leaderboards of the given
+    modes in redis from unrestricted users' stats in sql.
+    """
+    rows = database.fetch_stream(
+        text(
+            "SELECT s.id, s.mode, s.pp, u.country "
+            "FROM stats s "
+            "INNER JOIN users u ON s.id = u.id "
+            "WHERE s.mode IN :modes AND s.pp > 0 "
+            "AND (u.priv & :unrestricted) = :unrestricted",
+        ).bindparams(
+            bindparam("modes", value=[int(mode) for mode in modes], expanding=True),
+            unrestricted=Privileges.UNRESTRICTED.value,
+        ),
+    )
+
+    return await build_leaderboards(redis, rows, modes)
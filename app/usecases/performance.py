@@ -7,7 +7,10 @@ from typing import TypedDict
 
 from akatsuki_pp_py import Beatmap
 from akatsuki_pp_py import Calculator
+from akatsuki_pp_py import DifficultyAttributes
 
+import app.settings
+from app.caching import LRUCache
 from app.constants.mods import Mods
 
 
@@ -72,67 +75,127 @@ def calculate_performances(
     """
     calc_bmap = Beatmap(path=osu_file_path)
 
+    return [_calculate_performance(calc_bmap, score) for score in scores]
+
+
+# parsed beatmaps & difficulty attributes, cached within
+# each of the performance calculator's worker processes.
+_beatmaps: LRUCache[tuple[int, str], Beatmap] = LRUCache(
+    maxsize=app.settings.PERFORMANCE_CACHE_MAX_BEATMAPS,
+)
+_difficulties: LRUCache[tuple[int, str, int, int], DifficultyAttributes] = LRUCache(
+    maxsize=app.settings.PERFORMANCE_CACHE_MAX_BEATMAPS * 4,
+)
+
+
+def calculate_performances_cached(
+    beatmap_id: int,
+    beatmap_md5: str,
+    osu_file_path: str,
+    scores: Iterable[ScoreParams],
+) -> list[PerformanceResult]:
+    """\
+    Calculate performance for multiple scores on a single beatmap,
+    reusing the parsed beatmap & difficulty attributes from previous
+    calculations on it (with the same mode & mods).
+
+    Run within `PerformanceCalculator`'s worker processes; the beatmap's
+    md5 is part of the cache keys, so updated .osu files are re-parsed.
+    """
+    beatmap_key = (beatmap_id, beatmap_md5)
+
+    calc_bmap = _beatmaps.get(beatmap_key)
+    if calc_bmap is None:
+        calc_bmap = Beatmap(path=osu_file_path)
+        _beatmaps[beatmap_key] = calc_bmap
+
     results: list[PerformanceResult] = []
 
     for score in scores:
-        if score.acc and (
-            score.n300 or score.n100 or score.n50 or score.ngeki or score.nkatu
-        ):
-            raise ValueError(
-                "Must not specify accuracy AND 300/100/50/geki/katu. Only one or the other.",
-            )
-
-        # rosupp ignores NC and requires DT
-        if score.mods is not None:
-            if score.mods & Mods.NIGHTCORE:
-                score.mods |= Mods.DOUBLETIME
-
-        calculator = Calculator(
-            mode=score.mode,
-            mods=score.mods or 0,
-            combo=score.combo,
-            acc=score.acc,
-            n300=score.n300,
-            n100=score.n100,
-            n50=score.n50,
-            n_geki=score.ngeki,
-            n_katu=score.nkatu,
-            n_misses=score.nmiss,
-        )
-        result = calculator.performance(calc_bmap)
-
-        pp = result.pp
-
-        if math.isnan(pp) or math.isinf(pp):
-            # TODO: report to logserver
-            pp = 0.0
-        else:
-            pp = round(pp, 3)
-
-        results.append(
-            {
-                "performance": {
-                    "pp": pp,
-                    "pp_acc": result.pp_acc,
-                    "pp_aim": result.pp_aim,
-                    "pp_speed": result.pp_speed,
-                    "pp_flashlight": result.pp_flashlight,
-                    "effective_miss_count": result.effective_miss_count,
-                    "pp_difficulty": result.pp_difficulty,
-                },
-                "difficulty": {
-                    "stars": result.difficulty.stars,
-                    "aim": result.difficulty.aim,
-                    "speed": result.difficulty.speed,
-                    "flashlight": result.difficulty.flashlight,
-                    "slider_factor": result.difficulty.slider_factor,
-                    "speed_note_count": result.difficulty.speed_note_count,
-                    "stamina": result.difficulty.stamina,
-                    "color": result.difficulty.color,
-                    "rhythm": result.difficulty.rhythm,
-                    "peak": result.difficulty.peak,
-                },
-            },
-        )
+        difficulty_key = (*beatmap_key, score.mode, _normalize_mods(score.mods))
+
+        difficulty = _difficulties.get(difficulty_key)
+        if difficulty is None:
+            difficulty = _make_calculator(score).difficulty(calc_bmap)
+            _difficulties[difficulty_key] = difficulty
+
+        results.append(_calculate_performance(calc_bmap, score, difficulty))
 
     return results
+
+
+def _normalize_mods(mods: int | None) -> int:
+    # rosupp ignores NC and requires DT
+    if mods is not None and mods & Mods.NIGHTCORE:
+        mods |= Mods.DOUBLETIME
+
+    return mods or 0
+
+
+def _make_calculator(
+    score: ScoreParams,
+    difficulty: DifficultyAttributes | None = None,
+) -> Calculator:
+    if score.acc and (
+        score.n300 or score.n100 or score.n50 or score.ngeki or score.nkatu
+    ):
+        raise ValueError(
+            "Must not specify accuracy AND 300/100/50/geki/katu. Only one or the other.",
+        )
+
+    calculator = Calculator(
+        mode=score.mode,
+        mods=_normalize_mods(score.mods),
+        combo=score.combo,
+        acc=score.acc,
+        n300=score.n300,
+        n100=score.n100,
+        n50=score.n50,
+        n_geki=score.ngeki,
+        n_katu=score.nkatu,
+        n_misses=score.nmiss,
+    )
+    if difficulty is not None:
+        calculator.set_difficulty(difficulty)
+
+    return calculator
+
+
+def _calculate_performance(
+    calc_bmap: Beatmap,
+    score: ScoreParams,
+    difficulty: DifficultyAttributes | None = None,
+) -> PerformanceResult:
+    result = _make_calculator(score, difficulty).performance(calc_bmap)
+
+    pp = result.pp
+
+    if math.isnan(pp) or math.isinf(pp):
+        # TODO: report to logserver
+        pp = 0.0
+    else:
+        pp = round(pp, 3)
+
+    return {
+        "performance": {
+            "pp": pp,
+            "pp_acc": result.pp_acc,
+            "pp_aim": result.pp_aim,
+            "pp_speed": result.pp_speed,
+            "pp_flashlight": result.pp_flashlight,
+            "effective_miss_count": result.effective_miss_count,
+            "pp_difficulty": result.pp_difficulty,
+        },
+        "difficulty": {
+            "stars": result.difficulty.stars,
+            "aim": result.difficulty.aim,
+            "speed": result.difficulty.speed,
+            "flashlight": result.difficulty.flashlight,
+            "slider_factor": result.difficulty.slider_factor,
+            "speed_note_count": result.difficulty.speed_note_count,
+            "stamina": result.difficulty.stamina,
+            "color": result.difficulty.color,
+            "rhythm": result.difficulty.rhythm,
+            "peak": result.difficulty.peak,
+        },
+    }
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+
+# the weight of a user's nth best score is 0.95**n; from
+# around n=14.5k, the weight underflows to exactly zero
+WEIGHTS: FloatArray = 0.95 ** np.arange(16384, dtype=np.float64)
+
+
+def _weights(positions: IntArray) -> FloatArray:
+    return WEIGHTS[np.minimum(positions, len(WEIGHTS) - 1)]
+
+
+def _bonus_acc(counts: IntArray) -> FloatArray:
+    with np.errstate(divide="ignore"):
+        return np.where(counts > 0, 100.0 / (20 * (1 - 0.95**counts)), 0.0)
+
+
+def _bonus_pp(counts: IntArray) -> FloatArray:
+    return np.asarray(416.6667 * (1 - 0.9994**counts), dtype=np.float64)
+
+
+def calculate_totals(
+    pps: Sequence[float] | FloatArray,
+    accs: Sequence[float] | FloatArray,
+    count: int | None = None,
+) -> tuple[float, int]:
+    """\
+    Calculate a user's total (weighted) accuracy & pp from
+    their best scores' pp & accuracy, sorted by pp descending.
+
+    `count` is the user's total amount of best scores, if
+    only their top (most heavily weighted) scores are given.
+    """
+    if count is None:
+        count = len(pps)
+
+    if count == 0:
+        return 0.0, 0
+
+    weights = _weights(np.arange(len(pps)))
+    counts = np.array(count)
+
+    weighted_acc = np.dot(np.asarray(accs, dtype=np.float64), weights)
+    acc = (weighted_acc * _bonus_acc(counts)) / 100
+
+    weighted_pp = np.dot(np.asarray(pps, dtype=np.float64), weights)
+    pp = round(weighted_pp + _bonus_pp(counts))
+
+    return float(acc), int(pp)
+
+
+def calculate_totals_batch(
+    pps: FloatArray,
+    accs: FloatArray,
+    offsets: IntArray,
+    counts: IntArray | None = None,
+) -> tuple[FloatArray, IntArray]:
+    """\
+    Calculate many users' total (weighted) accuracy & pp at once.
+
+    The users' scores are given as one ragged array, where user i's
+    scores are `pps[offsets[i]:offsets[i + 1]]`, sorted by pp descending
+    (so `offsets` has one more element than there are users).
+    """
+    lengths = np.diff(offsets)
+    num_users = len(lengths)
+
+    if counts is None:
+        counts = lengths
+
+    # the index of each score's user, & its position amongst their scores
+    users = np.repeat(np.arange(num_users), lengths)
+    positions = np.arange(len(pps)) - np.repeat(offsets[:-1], lengths)
+    weights = _weights(positions)
+
+    weighted_acc = np.bincount(users, weights=accs * weights, minlength=num_users)
+    acc = (weighted_acc * _bonus_acc(counts)) / 100
+
+    weighted_pp = np.bincount(users, weights=pps * weights, minlength=num_users)
+    pp = np.round(weighted_pp + _bonus_pp(counts)).astype(np.int64)
+
+    return acc, pp
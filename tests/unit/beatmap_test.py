@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import Any
+
+import pytest
+
+import app.objects.beatmap
+import app.state
+from app.caching import BeatmapCache
+from app.caching import SingleFlight
+from app.constants.gamemodes import GameMode
+from app.objects.beatmap import Beatmap
+from app.objects.beatmap import BeatmapApiResponse
+from app.objects.beatmap import BeatmapSet
+from app.objects.top_scores import TopScores
+from app.repositories import maps as maps_repo
+
+MAP_MD5 = "1cf5b2c2edfafd055536d2cefcb89c0e"
+
+
+@pytest.fixture(autouse=True)
+def empty_caches(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(app.state.cache, "beatmaps", BeatmapCache(max_bytes=2**20))
+
+    for name in ("_md5_lookups", "_bid_lookups", "_bsid_lookups"):
+        monkeypatch.setattr(app.objects.beatmap, name, SingleFlight(negative_ttl=60))
+
+
+async def test_concurrent_lookups_of_unknown_map(monkeypatch: pytest.MonkeyPatch):
+    api_calls: list[dict[str, Any]] = []
+
+    async def fetch_one(**kwargs: Any) -> None:
+        return None  # not in sql
+
+    async def api_get_beatmaps(**params: Any) -> BeatmapApiResponse:
+        api_calls.append(params)
+        await asyncio.sleep(0.01)
+        return {"data": None, "status_code": 404}
+
+    monkeypatch.setattr(maps_repo, "fetch_one", fetch_one)
+    monkeypatch.setattr(app.objects.beatmap, "api_get_beatmaps", api_get_beatmaps)
+
+    results = await asyncio.gather(
+        *(Beatmap.from_md5(MAP_MD5) for _ in range(1000)),
+    )
+    assert results == [None] * 1000
+    assert api_calls == [{"h": MAP_MD5}]
+
+    # the map not existing is remembered
+    assert await Beatmap.from_md5(MAP_MD5) is None
+    assert len(api_calls) == 1
+
+
+async def test_concurrent_lookups_of_uncached_map(monkeypatch: pytest.MonkeyPatch):
+    sql_calls: list[int] = []
+
+    async def fetch_one(id: int) -> dict[str, Any]:
+        return {"id": id, "set_id": 1}
+
+    async def from_bsid_sql(bsid: int) -> BeatmapSet:
+        sql_calls.append(bsid)
+        await asyncio.sleep(0.01)
+
+        bmap_set = BeatmapSet(id=bsid, last_osuapi_check=datetime.now())
+        bmap_set.maps.append(
+            Beatmap(map_set=bmap_set, md5=MAP_MD5, id=2, last_update=datetime.now()),
+        )
+        return bmap_set
+
+    monkeypatch.setattr(maps_repo, "fetch_one", fetch_one)
+    monkeypatch.setattr(BeatmapSet, "_from_bsid_sql", from_bsid_sql)
+
+    results = await asyncio.gather(*(Beatmap.from_bid(2) for _ in range(1000)))
+    assert sql_calls == [1]
+
+    bmap = app.state.cache.beatmaps.get_by_id(2)
+    assert bmap is not None
+    assert all(result is bmap for result in results)
+
+
+async def test_deleting_scores_invalidates_top_scores(monkeypatch: pytest.MonkeyPatch):
+    async def fetch_all(query: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+        return [{"userid": 3, "mode": 0}, {"userid": 4, "mode": 4}]
+
+    executed: list[str] = []
+
+    async def execute(query: str, params: dict[str, Any]) -> int:
+        executed.append(query)
+        return 0
+
+    monkeypatch.setattr(app.state.services.database, "fetch_all", fetch_all)
+    monkeypatch.setattr(app.state.services.database, "execute", execute)
+
+    for key in (
+        (3, GameMode.VANILLA_OSU),
+        (4, GameMode.RELAX_OSU),
+        (5, GameMode.VANILLA_OSU),
+    ):
+        app.state.cache.top_scores[key] = TopScores([], count=0)
+
+    await app.objects.beatmap._delete_scores_on_maps({MAP_MD5})
+
+    assert executed == ["DELETE FROM scores WHERE map_md5 IN :map_md5s"]
+    assert app.state.cache.top_scores.keys() == [(5, GameMode.VANILLA_OSU)]
+
+    app.state.cache.top_scores.clear()
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import app.caching
+from app.caching import BeatmapCache
+from app.caching import LRUCache
+from app.caching import SingleFlight
+from app.caching import StaleWhileRevalidateCache
+from app.objects.beatmap import Beatmap
+from app.objects.beatmap import BeatmapSet
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache: LRUCache[str, int] = LRUCache(maxsize=2)
+    cache["a"] = 1
+    cache["b"] = 2
+
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache["c"] = 3
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_lru_cache_ttl(monkeypatch: pytest.MonkeyPatch):
+    now = 1000.0
+    monkeypatch.setattr(app.caching.time, "monotonic", lambda: now)
+
+    cache: LRUCache[str, int] = LRUCache(maxsize=8, ttl=60.0)
+    cache["a"] = 1
+
+    now += 59.0
+    assert cache.get("a") == 1
+
+    now += 1.0
+    assert "a" not in cache
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_cache_invalidate():
+    cache: LRUCache[bytes, bytes] = LRUCache(maxsize=8)
+    cache[b"$2b$12$hash"] = b"pw_md5"
+
+    cache.invalidate(b"$2b$12$hash")
+    cache.invalidate(b"not cached")
+
+    assert cache.get(b"$2b$12$hash") is None
+
+
+def test_lru_cache_peek_and_keys():
+    cache: LRUCache[str, int] = LRUCache(maxsize=2)
+    cache["a"] = 1
+    cache["b"] = 2
+
+    # peeking neither counts, nor marks as recently used
+    assert cache.peek("a") == 1
+    assert cache.peek("c") is None
+    assert (cache.hits, cache.misses) == (0, 0)
+    assert cache.keys() == ["a", "b"]
+
+    cache["c"] = 3
+    assert cache.keys() == ["b", "c"]
+
+
+def make_beatmap_set(set_id: int, map_ids: list[int]) -> BeatmapSet:
+    beatmap_set = BeatmapSet(id=set_id, last_osuapi_check=datetime.now())
+    for map_id in map_ids:
+        beatmap_set.maps.append(
+            Beatmap(map_set=beatmap_set, md5=f"{map_id:032x}", id=map_id),
+        )
+
+    return beatmap_set
+
+
+def test_beatmap_cache_indexes_maps_by_md5_and_id():
+    cache = BeatmapCache(max_bytes=2**20)
+    beatmap_set = make_beatmap_set(1, [10, 11])
+    cache.add_set(beatmap_set)
+
+    beatmap = beatmap_set.maps[1]
+    assert cache.get_by_md5(beatmap.md5) is beatmap
+    assert cache.get_by_id(beatmap.id) is beatmap
+    assert cache.get_set(1) is beatmap_set
+    assert cache.get_by_id(12) is None
+    assert (cache.hits, cache.misses) == (3, 1)
+
+    # peeking doesn't count towards the hit ratio
+    assert cache.peek_set(1) is beatmap_set
+    assert cache.peek_set(2) is None
+    assert (cache.hits, cache.misses) == (3, 1)
+
+    # a map updated (with a new md5) since being cached
+    old_md5 = beatmap.md5
+    beatmap.md5 = "f" * 32
+    assert cache.get_by_md5(old_md5) is None
+
+    # re-adding the set re-indexes its maps
+    cache.add_set(beatmap_set)
+    assert cache.get_by_md5(beatmap.md5) is beatmap
+    assert cache.num_maps == 2
+
+
+def test_beatmap_cache_evicts_whole_sets():
+    set_size = BeatmapCache(max_bytes=2**20)
+    set_size.add_set(make_beatmap_set(1, [10, 11]))
+
+    # room for two sets
+    cache = BeatmapCache(max_bytes=set_size.nbytes * 2)
+    for set_id in (1, 2, 3):
+        cache.add_set(make_beatmap_set(set_id, [set_id * 10, set_id * 10 + 1]))
+
+        if set_id == 2:
+            assert cache.get_by_id(10) is not None  # set 2 is now least recently used
+
+    assert len(cache) == 2
+    assert cache.num_maps == 4
+    assert cache.nbytes <= cache.max_bytes
+
+    assert cache.get_set(2) is None
+    assert cache.get_by_id(20) is None
+    assert cache.get_by_id(21) is None
+    assert cache.get_by_md5(f"{21:032x}") is None
+    assert cache.get_by_id(11) is not None
+    assert cache.get_set(3) is not None
+
+    cache.invalidate_set(3)
+    assert len(cache) == 1
+    assert cache.get_by_id(30) is None
+
+
+async def test_single_flight_shares_exceptions():
+    calls = 0
+
+    async def fail() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream unavailable")
+
+    single_flight: SingleFlight[str, int] = SingleFlight(negative_ttl=60)
+    results = await asyncio.gather(
+        *(single_flight.do("a", fail) for _ in range(10)),
+        return_exceptions=True,
+    )
+
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    # exceptions aren't remembered
+    with pytest.raises(RuntimeError):
+        await single_flight.do("a", fail)
+    assert calls == 2
+
+
+async def test_single_flight_survives_cancelled_callers():
+    async def fetch() -> int:
+        await asyncio.sleep(0.01)
+        return 727
+
+    single_flight: SingleFlight[str, int] = SingleFlight()
+    first = asyncio.create_task(single_flight.do("a", fetch))
+    second = asyncio.create_task(single_flight.do("a", fetch))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    assert await second == 727
+
+
+async def test_stale_while_revalidate_cache(monkeypatch: pytest.MonkeyPatch):
+    now = 1000.0
+    # (not patching time.monotonic itself, which the event loop uses)
+    monkeypatch.setattr(app.caching, "time", SimpleNamespace(monotonic=lambda: now))
+
+    fetches = 0
+
+    async def fetch() -> bytes:
+        nonlocal fetches
+        fetches += 1
+        await asyncio.sleep(0.01)
+        return b"%d" % fetches
+
+    cache: StaleWhileRevalidateCache[str, bytes] = StaleWhileRevalidateCache(
+        maxsize=8,
+        ttl=60.0,
+        stale_ttl=600.0,
+    )
+
+    # concurrent misses share one fetch
+    results = await asyncio.gather(*(cache.get_or_fetch("a", fetch) for _ in range(10)))
+    assert results == [b"1"] * 10
+    assert fetches == 1
+
+    now += 60.0
+
+    # stale entries are served while being refetched (once) in the background
+    assert await cache.get_or_fetch("a", fetch) == b"1"
+    assert await cache.get_or_fetch("a", fetch) == b"1"
+    await asyncio.sleep(0.02)
+    assert fetches == 2
+    assert await cache.get_or_fetch("a", fetch) == b"2"
+
+    # & are no longer served after the stale ttl
+    now += 660.0
+    assert await cache.get_or_fetch("a", fetch) == b"3"
+    assert (cache.hits, cache.misses) == (3, 11)
+
+
+async def test_stale_while_revalidate_cache_failures_arent_cached():
+    responses = [None, b"ok"]
+
+    async def fetch() -> bytes | None:
+        return responses.pop(0)
+
+    cache: StaleWhileRevalidateCache[str, bytes] = StaleWhileRevalidateCache(
+        maxsize=8,
+        ttl=60.0,
+        stale_ttl=600.0,
+    )
+    assert await cache.get_or_fetch("a", fetch) is None
+    assert await cache.get_or_fetch("a", fetch) == b"ok"
+    assert await cache.get_or_fetch("a", fetch) == b"ok"
+    assert len(cache) == 1
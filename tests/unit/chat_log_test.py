@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import gzip
+from pathlib import Path
+
+from app.adapters.chat_log import ChatLog
+
+
+async def test_chat_log_writes_batches(tmp_path: Path):
+    chat_log = ChatLog(
+        path=tmp_path / "chat.log",
+        max_bytes=1024 * 1024,
+        rotate_interval=86400,
+        compress=False,
+    )
+    chat_log.start()
+
+    chat_log.write("cmyui", "#osu", "hello")
+    chat_log.write("jacobian", "cmyui", "hi!")
+    assert not chat_log.path.exists()  # not yet flushed
+
+    await chat_log.stop()
+
+    lines = chat_log.path.read_text().splitlines()
+    assert len(lines) == 2
+    assert lines[0].endswith("] cmyui @ #osu: hello")
+    assert lines[1].endswith("] jacobian @ cmyui: hi!")
+
+
+async def test_chat_log_rotates_by_size(tmp_path: Path):
+    chat_log = ChatLog(
+        path=tmp_path / "chat.log",
+        max_bytes=64,
+        rotate_interval=86400,
+        compress=True,
+    )
+
+    chat_log.write("cmyui", "#osu", "a" * 32)
+    await chat_log.flush()
+    chat_log.write("cmyui", "#osu", "b" * 32)
+    await chat_log.flush()
+
+    rotated_paths = list(tmp_path.glob("chat.log.*.gz"))
+    assert len(rotated_paths) == 1
+    assert gzip.decompress(rotated_paths[0].read_bytes()).endswith(b"a" * 32 + b"\n")
+    assert chat_log.path.read_text().endswith("b" * 32 + "\n")
+
+
+async def test_chat_log_drops_oldest_when_full(tmp_path: Path):
+    chat_log = ChatLog(
+        path=tmp_path / "chat.log",
+        max_bytes=1024 * 1024,
+        rotate_interval=86400,
+        compress=False,
+        buffer_size=2,
+    )
+
+    for msg in ("one", "two", "three"):
+        chat_log.write("cmyui", "#osu", msg)
+
+    await chat_log.flush()
+
+    lines = chat_log.path.read_text().splitlines()
+    assert [line.rsplit(": ", 1)[1] for line in lines] == ["two", "three"]
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+import app.objects.collections
+import app.packets
+import app.settings
+import app.state
+from app.constants.gamemodes import GameMode
+from app.constants.privileges import Privileges
+from app.objects.collections import Players
+from app.objects.player import ModeData
+from app.objects.player import Player
+from app.objects.player import PresenceFilter
+from tests.unit.factories import make_player
+
+
+def test_players_get_by_each_index():
+    players = Players()
+    player = make_player(3, "Cool Guy")
+    players.append(player)
+
+    assert players.get(token=player.token) is player
+    assert players.get(id=3) is player
+    assert players.get(name="cool_guy") is player
+    assert players.get(name="Cool Guy") is player
+    assert players.get(irc_key="irc-3") is player
+    assert players.get(id=4) is None
+    assert player in players
+    assert "Cool Guy" in players
+    assert "cool_guy" not in players
+    assert players.ids == {3}
+
+
+def test_players_remove_after_logout():
+    players = Players()
+    player = make_player(3, "cmyui")
+    players.append(player)
+
+    token = player.token
+    player.token = ""  # as done by `Player.logout()`
+    players.remove(player)
+
+    assert player not in players
+    assert players.get(token=token) is None
+    assert players.get(id=3) is None
+    assert players.get(name="cmyui") is None
+
+
+def test_players_duplicate_ids_first_wins():
+    players = Players()
+    first = make_player(3, "cmyui")
+    second = make_player(3, "cmyui")
+    players.append(first)
+    players.append(second)
+
+    assert players.get(id=3) is first
+
+    players.remove(first)
+    assert players.get(id=3) is second
+
+
+def test_players_rename():
+    players = Players()
+    player = make_player(3, "cmyui")
+    players.append(player)
+
+    players.rename(player, "jacobian")
+
+    assert player.name == "jacobian"
+    assert players.get(name="cmyui") is None
+    assert players.get(name="jacobian") is player
+
+
+def test_players_priv_views():
+    players = Players()
+    staff = make_player(3, "cmyui", Privileges.UNRESTRICTED | Privileges.ADMINISTRATOR)
+    normal = make_player(4, "jacobian")
+    restricted = make_player(5, "rapha", Privileges(0))
+    for player in (staff, normal, restricted):
+        players.append(player)
+
+    assert set(players.staff) == {staff}
+    assert set(players.unrestricted) == {staff, normal}
+    assert set(players.restricted) == {restricted}
+    assert list(players.unrestricted_ids) == [3, 4]
+
+    # e.g. a restriction through `Player.remove_privs`
+    normal.priv &= ~Privileges.UNRESTRICTED
+    players.update_priv_views(normal)
+
+    assert set(players.unrestricted) == {staff}
+    assert set(players.restricted) == {restricted, normal}
+    assert list(players.unrestricted_ids) == [3]
+
+    players.remove(staff)
+    assert not players.staff
+    assert not players.unrestricted_ids
+
+
+def make_online_player(id: int, name: str) -> Player:
+    player = make_player(id, name)
+    player.stats[GameMode.VANILLA_OSU] = ModeData(
+        tscore=0,
+        rscore=0,
+        pp=id,
+        acc=0.0,
+        plays=0,
+        playtime=0,
+        max_combo=0,
+        total_hits=0,
+        rank=0,
+        grades={},
+    )
+    return player
+
+
+def test_players_enqueue_stats_honours_presence_filters():
+    players = Players()
+    subject = make_online_player(3, "cmyui")
+    everyone = make_online_player(4, "everyone")
+    friend = make_online_player(5, "friend")
+    stranger = make_online_player(6, "stranger")
+    no_one = make_online_player(7, "no one")
+    spectator = make_online_player(8, "spectator")
+    for player in (subject, everyone, friend, stranger, no_one, spectator):
+        players.append(player)
+
+    everyone.pres_filter = PresenceFilter.All
+    friend.pres_filter = stranger.pres_filter = PresenceFilter.Friends
+    for player in (everyone, friend, stranger):
+        players.update_pres_filter_views(player)
+
+    # (as done by `Player.add_friend()`)
+    friend.friends.add(subject.id)
+    players.update_pres_filter_views(friend)
+
+    spectator.spectating = subject
+    subject.spectators.append(spectator)
+
+    players.enqueue_stats(subject)
+
+    assert subject.dequeue() == subject.stats_packet
+    assert everyone.dequeue() == subject.stats_packet
+    assert friend.dequeue() == subject.stats_packet
+    assert spectator.dequeue() == subject.stats_packet
+    assert stranger.dequeue() is None
+    assert no_one.dequeue() is None
+
+    # nor after changing filters, or logging out
+    everyone.pres_filter = PresenceFilter.Nil
+    players.update_pres_filter_views(everyone)
+    players.remove(friend)
+
+    players.enqueue_stats(subject)
+    assert everyone.dequeue() is None
+    assert friend.dequeue() is None
+    assert not players._pres_filter_all
+    assert not players._pres_filter_friends
+
+
+def test_player_enqueue_stats_coalesces_updates():
+    subject = make_online_player(3, "cmyui")
+    receiver = make_online_player(4, "jacobian")
+
+    receiver.enqueue_stats(subject)
+    subject.stats[GameMode.VANILLA_OSU].pp = 727
+    subject.invalidate_packet_cache()
+    receiver.enqueue_stats(subject)
+
+    # only the latest stats are sent
+    assert receiver.dequeue() == subject.stats_packet
+    assert receiver.dequeue() is None
+
+    # nor are they sent for players who've since logged out
+    players = Players([receiver])
+    receiver.enqueue_stats(subject)
+    players.enqueue(  # as done by `Player.logout()`
+        app.packets.logout(subject.id),
+        key=(app.packets.ServerPackets.USER_STATS, subject.id),
+    )
+    players.enqueue_stats(subject)
+    assert receiver.dequeue() == app.packets.logout(subject.id)
+
+
+def test_players_get_many():
+    players = Players()
+    normal = make_player(3, "cmyui")
+    restricted = make_player(4, "rapha", Privileges(0))
+    players.append(normal)
+    players.append(restricted)
+
+    assert list(players.get_many([4, 5, 3])) == [restricted, normal]
+    assert list(players.get_many([4, 5, 3], unrestricted_only=True)) == [normal]
+
+
+async def test_beatmap_leaderboard_warmup_covers_relax_and_autopilot(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def fetch_all(query: str, values: dict[str, Any]) -> list[dict[str, Any]]:
+        return [{"md5": "a" * 32, "mode": 0}, {"md5": "b" * 32, "mode": 3}]
+
+    warmed: list[tuple[str, GameMode, str]] = []
+
+    async def fetch_leaderboard(map_md5: str, mode: GameMode, metric: str) -> None:
+        warmed.append((map_md5, mode, metric))
+
+    monkeypatch.setattr(app.settings, "LEADERBOARD_CACHE_WARMUP", 2)
+    monkeypatch.setattr(app.state.services.database, "fetch_all", fetch_all)
+    monkeypatch.setattr(app.objects.collections, "fetch_leaderboard", fetch_leaderboard)
+
+    await app.objects.collections._initialize_beatmap_leaderboards()
+
+    assert warmed == [
+        ("a" * 32, GameMode.VANILLA_OSU, "score"),
+        ("a" * 32, GameMode.RELAX_OSU, "pp"),
+        ("a" * 32, GameMode.AUTOPILOT_OSU, "pp"),
+        ("b" * 32, GameMode.VANILLA_MANIA, "score"),
+    ]
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from app.constants.gamemodes import GameMode
+from app.constants.privileges import Privileges
+from app.objects.beatmap import Beatmap
+from app.objects.leaderboard import LeaderboardScore
+from app.objects.player import Player
+from app.objects.score import Score
+
+
+def make_player(
+    id: int,
+    name: str,
+    priv: Privileges = Privileges.UNRESTRICTED,
+    is_bot_client: bool = False,
+) -> Player:
+    return Player(
+        id=id,
+        name=name,
+        priv=priv,
+        pw_bcrypt=None,
+        token=Player.generate_token(),
+        irc_key=f"irc-{id}",
+        is_bot_client=is_bot_client,
+    )
+
+
+def make_score(player: Player, bmap: Beatmap, value: int) -> Score:
+    score = Score()
+    score.player = player
+    score.bmap = bmap
+    score.mode = GameMode.VANILLA_OSU
+    score.score = value
+    score.server_time = datetime.now()
+    return score
+
+
+def make_leaderboard_score(
+    id: int,
+    score: float,
+    userid: int,
+    mods: int = 0,
+    country: str = "ca",
+) -> LeaderboardScore:
+    return LeaderboardScore(
+        id=id,
+        score=score,
+        max_combo=100,
+        n50=0,
+        n100=0,
+        n300=100,
+        nmiss=0,
+        nkatu=0,
+        ngeki=0,
+        perfect=1,
+        mods=mods,
+        time=1700000000 + id,
+        userid=userid,
+        name=f"user{userid}",
+        country=country,
+    )
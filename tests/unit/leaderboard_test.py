@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+import app.state
+from app.constants.gamemodes import GameMode
+from app.objects.leaderboard import Leaderboard
+from app.objects.leaderboard import LeaderboardKey
+from app.objects.leaderboard import fetch_leaderboard
+from app.objects.leaderboard import invalidate_user_leaderboards
+from app.objects.leaderboard import remove_user_scores
+from tests.unit.factories import make_leaderboard_score
+
+
+def test_leaderboard_keeps_best_score_per_user():
+    leaderboard = Leaderboard(
+        [
+            make_leaderboard_score(id=1, score=500, userid=1),
+            make_leaderboard_score(id=2, score=700, userid=2),
+            make_leaderboard_score(id=3, score=700, userid=3),  # tie; submitted later
+        ],
+    )
+
+    assert [s.id for s in leaderboard.top()] == [2, 3, 1]
+
+    leaderboard.add(make_leaderboard_score(id=4, score=900, userid=1))
+    assert [s.id for s in leaderboard.top()] == [4, 2, 3]
+    assert leaderboard.personal_best(1) == make_leaderboard_score(
+        id=4,
+        score=900,
+        userid=1,
+    )
+    assert len(leaderboard) == 3
+
+    leaderboard.remove_user(2)
+    leaderboard.remove_user(1337)
+    assert [s.id for s in leaderboard.top()] == [4, 3]
+    assert leaderboard.personal_best(2) is None
+
+
+def test_leaderboard_filters():
+    leaderboard = Leaderboard(
+        [
+            make_leaderboard_score(id=1, score=900, userid=1, mods=8, country="us"),
+            make_leaderboard_score(id=2, score=800, userid=2, mods=0, country="ca"),
+            make_leaderboard_score(id=3, score=700, userid=3, mods=8, country="CA"),
+            make_leaderboard_score(id=4, score=600, userid=4, mods=0, country="us"),
+        ],
+    )
+
+    assert [s.id for s in leaderboard.top(limit=2)] == [1, 2]
+    assert [s.id for s in leaderboard.top(mods=8)] == [1, 3]
+    assert [s.id for s in leaderboard.top(user_ids={2, 4, 5})] == [2, 4]
+    assert [s.id for s in leaderboard.top(country="ca")] == [2, 3]
+    assert [s.id for s in leaderboard.top(mods=0, country="US")] == [4]
+
+
+def test_leaderboard_rank_of():
+    leaderboard = Leaderboard(
+        [make_leaderboard_score(id=i, score=100 * i, userid=i) for i in range(1, 11)],
+    )
+
+    assert leaderboard.rank_of(1000) == 1
+    assert leaderboard.rank_of(950) == 2
+    assert leaderboard.rank_of(100) == 10
+    assert leaderboard.rank_of(50) == 11
+
+    # tied scores share the best rank
+    leaderboard.add(make_leaderboard_score(id=11, score=500, userid=11))
+    assert leaderboard.rank_of(500) == 6
+
+
+def test_leaderboard_row_format():
+    row = make_leaderboard_score(id=1, score=123.5, userid=2).to_row()
+    assert row["_score"] == 123.5
+    assert (row["userid"], row["name"]) == (2, "user2")
+
+    # personal best rows have their user filled in separately
+    row = make_leaderboard_score(id=1, score=123.5, userid=2).to_row(include_user=False)
+    assert "userid" not in row and "name" not in row
+
+
+async def test_fetch_leaderboard_caches_load(monkeypatch: pytest.MonkeyPatch):
+    loaded = asyncio.Event()
+    loads = 0
+
+    async def from_sql(*args: object) -> Leaderboard:
+        nonlocal loads
+        loads += 1
+        await loaded.wait()
+        return Leaderboard([make_leaderboard_score(id=1, score=500, userid=1)])
+
+    monkeypatch.setattr(Leaderboard, "from_sql", from_sql)
+    app.state.cache.leaderboards.clear()
+
+    key: LeaderboardKey = ("a" * 32, GameMode.VANILLA_OSU, "score")
+    task = asyncio.create_task(fetch_leaderboard(*key))
+    await asyncio.sleep(0)
+    assert key not in app.state.cache.leaderboards
+
+    loaded.set()
+    leaderboard = await task
+
+    assert await fetch_leaderboard(*key) is leaderboard
+    assert loads == 1
+
+    app.state.cache.leaderboards.clear()
+
+
+async def test_fetch_leaderboard_coalesces_loads(monkeypatch: pytest.MonkeyPatch):
+    loaded = asyncio.Event()
+    loads = 0
+
+    async def from_sql(*args: object) -> Leaderboard:
+        nonlocal loads
+        loads += 1
+        await loaded.wait()
+        return Leaderboard([make_leaderboard_score(id=1, score=500, userid=1)])
+
+    monkeypatch.setattr(Leaderboard, "from_sql", from_sql)
+    app.state.cache.leaderboards.clear()
+
+    key: LeaderboardKey = ("a" * 32, GameMode.VANILLA_OSU, "score")
+    tasks = [asyncio.create_task(fetch_leaderboard(*key)) for _ in range(10)]
+    await asyncio.sleep(0)
+
+    loaded.set()
+    leaderboards = await asyncio.gather(*tasks)
+
+    assert loads == 1
+    assert all(leaderboard is leaderboards[0] for leaderboard in leaderboards)
+    assert app.state.cache.leaderboards.peek(key) is leaderboards[0]
+
+    app.state.cache.leaderboards.clear()
+
+
+def test_remove_user_scores():
+    app.state.cache.leaderboards.clear()
+
+    keys: list[LeaderboardKey] = [
+        ("a" * 32, GameMode.VANILLA_OSU, "score"),
+        ("b" * 32, GameMode.RELAX_OSU, "pp"),
+    ]
+    for key in keys:
+        app.state.cache.leaderboards[key] = Leaderboard(
+            [
+                make_leaderboard_score(id=1, score=500, userid=1),
+                make_leaderboard_score(id=2, score=400, userid=2),
+            ],
+        )
+
+    remove_user_scores(1)
+
+    # the leaderboards are kept, without the user's scores
+    for key in keys:
+        leaderboard = app.state.cache.leaderboards.peek(key)
+        assert leaderboard is not None
+        assert [s.id for s in leaderboard.top()] == [2]
+
+    app.state.cache.leaderboards.clear()
+
+
+async def test_invalidate_user_leaderboards(monkeypatch: pytest.MonkeyPatch):
+    async def fetch_all(query: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+        assert params == {"user_id": 1}
+        return [{"map_md5": "a" * 32}]
+
+    monkeypatch.setattr(app.state.services.database, "fetch_all", fetch_all)
+    app.state.cache.leaderboards.clear()
+
+    played_key: LeaderboardKey = ("a" * 32, GameMode.VANILLA_OSU, "score")
+    other_key: LeaderboardKey = ("b" * 32, GameMode.VANILLA_OSU, "score")
+    for key in (played_key, other_key):
+        app.state.cache.leaderboards[key] = Leaderboard()
+
+    await invalidate_user_leaderboards(1)
+
+    # only the leaderboards of maps the user has best scores on are dropped
+    assert played_key not in app.state.cache.leaderboards
+    assert other_key in app.state.cache.leaderboards
+
+    app.state.cache.leaderboards.clear()
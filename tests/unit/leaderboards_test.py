@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import fnmatch
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+
+import app.usecases.leaderboards
+from app.usecases.leaderboards import build_leaderboards
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis) -> None:
+        self.redis = redis
+        self.commands: list[tuple[str, tuple[Any, ...]]] = []
+
+    async def __aenter__(self) -> FakePipeline:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        pass
+
+    def zadd(self, key: str, mapping: dict[str, float]) -> FakePipeline:
+        self.commands.append(("zadd", (key, mapping)))
+        return self
+
+    def rename(self, src: str, dst: str) -> FakePipeline:
+        self.commands.append(("rename", (src, dst)))
+        return self
+
+    def delete(self, *keys: str) -> FakePipeline:
+        self.commands.append(("delete", keys))
+        return self
+
+    async def execute(self) -> None:
+        self.redis.round_trips += 1
+        for command, args in self.commands:
+            getattr(self.redis, f"_{command}")(*args)
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, dict[str, float]] = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def scan_iter(self, match: str, count: int) -> AsyncIterator[bytes]:
+        for key in list(self.data):
+            if fnmatch.fnmatchcase(key, match):
+                yield key.encode()
+
+    async def delete(self, *keys: str) -> None:
+        self.round_trips += 1
+        self._delete(*keys)
+
+    def _zadd(self, key: str, mapping: dict[str, float]) -> None:
+        self.data.setdefault(key, {}).update(mapping)
+
+    def _rename(self, src: str, dst: str) -> None:
+        self.data[dst] = self.data.pop(src)
+
+    def _delete(self, *keys: str) -> None:
+        for key in keys:
+            self.data.pop(key, None)
+
+
+async def stats_rows(rows: list[dict[str, Any]]) -> AsyncIterator[dict[str, Any]]:
+    for row in rows:
+        yield row
+
+
+async def test_build_leaderboards(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(app.usecases.leaderboards, "REBUILD_BATCH_SIZE", 2)
+
+    redis = FakeRedis()
+    redis.data = {
+        "bancho:leaderboard:0": {"1": 100.0, "9": 50.0},
+        "bancho:leaderboard:0:ca": {"1": 100.0},
+        "bancho:leaderboard:0:jp": {"9": 50.0},  # no longer populated
+        "bancho:leaderboard:1": {"9": 10.0},  # not rebuilt
+        "bancho:leaderboard-rebuild:0": {"8": 1.0},  # interrupted rebuild
+    }
+
+    rows = [
+        {"id": 1, "mode": 0, "pp": 200.0, "country": "ca"},
+        {"id": 2, "mode": 0, "pp": 150.0, "country": "us"},
+        {"id": 3, "mode": 0, "pp": 300.0, "country": "ca"},
+        {"id": 3, "mode": 4, "pp": 400.0, "country": "ca"},
+        {"id": 4, "mode": 1, "pp": 25.0, "country": "ca"},
+    ]
+
+    counts = await build_leaderboards(redis, stats_rows(rows), modes=[0, 4])
+    assert counts == {0: 3, 4: 1}
+
+    assert redis.data == {
+        "bancho:leaderboard:0": {"1": 200.0, "2": 150.0, "3": 300.0},
+        "bancho:leaderboard:0:ca": {"1": 200.0, "3": 300.0},
+        "bancho:leaderboard:0:us": {"2": 150.0},
+        "bancho:leaderboard:4": {"3": 400.0},
+        "bancho:leaderboard:4:ca": {"3": 400.0},
+        "bancho:leaderboard:1": {"9": 10.0},
+    }
+
+    # clearing the interrupted rebuild, 2 batches & the swap
+    assert redis.round_trips == 4
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import app.state
+from app.caching import BeatmapCache
+from app.constants.gamemodes import GameMode
+from app.constants.mods import Mods
+from app.objects.beatmap import Beatmap
+from app.objects.beatmap import BeatmapSet
+from app.objects.channel import Channel
+from app.objects.collections import Players
+from app.objects.match import Match
+from app.objects.match import MatchTeamTypes
+from app.objects.match import MatchWinConditions
+from app.objects.match import Slot
+from app.objects.match import SlotStatus
+from tests.unit.factories import make_player
+from tests.unit.factories import make_score
+
+MAP_MD5 = "eb786491aa73d30f9288a66f774621d7"
+
+
+@pytest.fixture
+def bmap(monkeypatch: pytest.MonkeyPatch) -> Beatmap:
+    bmap_set = BeatmapSet(id=1, last_osuapi_check=datetime.now())
+    bmap = Beatmap(map_set=bmap_set, md5=MAP_MD5, id=1, total_length=60)
+    bmap_set.maps.append(bmap)
+
+    monkeypatch.setattr(app.state.cache, "beatmaps", BeatmapCache(max_bytes=2**20))
+    app.state.cache.beatmaps.add_set(bmap_set)
+    return bmap
+
+
+@pytest.fixture
+def match(monkeypatch: pytest.MonkeyPatch) -> Match:
+    players = Players()
+    for player_id, name in ((3, "cmyui"), (4, "rapha"), (5, "lenforiee")):
+        player = make_player(player_id, name)
+        players.append(player)
+
+    monkeypatch.setattr(app.state.sessions, "players", players)
+
+    match = Match(
+        id=1,
+        name="test match",
+        password="",
+        has_public_history=False,
+        map_name="test map",
+        map_id=1,
+        map_md5=MAP_MD5,
+        host_id=3,
+        mode=GameMode.VANILLA_OSU,
+        mods=Mods.NOMOD,
+        win_condition=MatchWinConditions.score,
+        team_type=MatchTeamTypes.head_to_head,
+        freemods=False,
+        seed=0,
+        chat_channel=Channel(name="#multi_1", topic="", auto_join=False),
+    )
+
+    for slot, player in zip(match.slots, players):
+        slot.player = player
+        slot.status = SlotStatus.complete
+        player.match = match
+
+    return match
+
+
+def was_playing(match: Match) -> list[Slot]:
+    return [s for s in match.slots if s.player is not None]
+
+
+async def test_await_submissions_completes_on_last_score(
+    match: Match,
+    bmap: Beatmap,
+):
+    cmyui, rapha, lenforiee = (s.player for s in was_playing(match))
+    assert cmyui and rapha and lenforiee
+
+    # scores submitted before the match completed are used as-is
+    cmyui.recent_scores[GameMode.VANILLA_OSU] = make_score(cmyui, bmap, 300)
+
+    task = asyncio.create_task(match.await_submissions(was_playing(match)))
+    await asyncio.sleep(0)
+
+    # scores for other maps are ignored
+    other_bmap = Beatmap(map_set=bmap.set, md5="0" * 32)
+    match.submit_score(make_score(rapha, other_bmap, 1_000))
+    match.submit_score(make_score(rapha, bmap, 200))
+    assert not task.done()
+
+    start = asyncio.get_running_loop().time()
+    match.submit_score(make_score(lenforiee, bmap, 100))
+    scores, didnt_submit = await task
+
+    assert asyncio.get_running_loop().time() - start < 0.1
+    assert scores == {cmyui: 300, rapha: 200, lenforiee: 100}
+    assert not didnt_submit
+
+    # the match is no longer awaiting scores
+    match.submit_score(make_score(lenforiee, bmap, 400))
+    assert not match._submissions
+
+
+async def test_await_submissions_timeout(
+    match: Match,
+    bmap: Beatmap,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    cmyui, rapha, lenforiee = (s.player for s in was_playing(match))
+    assert cmyui and rapha and lenforiee
+
+    real_wait_for = asyncio.wait_for
+
+    async def wait_for(fut, timeout):  # type: ignore[no-untyped-def]
+        # one shared deadline for all players
+        assert timeout == 10
+        return await real_wait_for(fut, timeout=0.05)
+
+    monkeypatch.setattr(asyncio, "wait_for", wait_for)
+
+    task = asyncio.create_task(match.await_submissions(was_playing(match)))
+    await asyncio.sleep(0)
+    match.submit_score(make_score(cmyui, bmap, 300))
+
+    scores, didnt_submit = await task
+
+    assert scores == {cmyui: 300}
+    assert didnt_submit == [rapha, lenforiee]
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+
+import pytest
+
+import app.adapters.osu_file_index
+from app.adapters.osu_file_index import OsuFileIndex
+
+
+@pytest.fixture
+def hashed(monkeypatch: pytest.MonkeyPatch) -> list[Path]:
+    hashed: list[Path] = []
+    hash_osu_file = app.adapters.osu_file_index.hash_osu_file
+
+    def counting_hash_osu_file(path: Path) -> str:
+        hashed.append(path)
+        return hash_osu_file(path)
+
+    monkeypatch.setattr(
+        app.adapters.osu_file_index,
+        "hash_osu_file",
+        counting_hash_osu_file,
+    )
+    return hashed
+
+
+def test_md5_only_rehashes_changed_files(tmp_path: Path, hashed: list[Path]):
+    index = OsuFileIndex(directory=tmp_path, path=tmp_path / "osu_files.db")
+
+    file_path = tmp_path / "1.osu"
+    file_path.write_bytes(b"osu file format v14")
+
+    expected_md5 = hashlib.md5(b"osu file format v14").hexdigest()
+    assert index.md5(1) == expected_md5
+    assert index.md5(1) == expected_md5
+    assert len(hashed) == 1
+
+    # persisted across instances
+    index.close()
+    index = OsuFileIndex(directory=tmp_path, path=tmp_path / "osu_files.db")
+    assert index.md5(1) == expected_md5
+    assert len(hashed) == 1
+
+    # changed on disk
+    file_path.write_bytes(b"osu file format v128")
+    os.utime(file_path, ns=(0, 727))
+    assert index.md5(1) == hashlib.md5(b"osu file format v128").hexdigest()
+    assert len(hashed) == 2
+
+    # written through the index
+    index.write(1, b"osu file format v14")
+    assert index.md5(1) == expected_md5
+    assert len(hashed) == 2
+
+    file_path.unlink()
+    assert index.md5(1) is None
+    assert index.md5(2) is None
+
+
+def test_verify(tmp_path: Path, hashed: list[Path]):
+    index = OsuFileIndex(directory=tmp_path, path=tmp_path / "osu_files.db")
+    for beatmap_id in range(1, 6):
+        (tmp_path / f"{beatmap_id}.osu").write_bytes(b"%d" % beatmap_id)
+
+    result = index.verify(max_workers=2)
+    assert (result.files, result.rehashed, result.removed) == (5, 5, 0)
+
+    (tmp_path / "1.osu").unlink()
+    (tmp_path / "2.osu").write_bytes(b"changed")
+    os.utime(tmp_path / "2.osu", ns=(0, 727))
+
+    result = index.verify(max_workers=2)
+    assert (result.files, result.rehashed, result.removed) == (4, 1, 1)
+
+    hashed.clear()
+    assert index.md5(2) == hashlib.md5(b"changed").hexdigest()
+    assert index.md5(5) == hashlib.md5(b"5").hexdigest()
+    assert not hashed
+
+    result = index.verify(max_workers=2, rehash_all=True)
+    assert (result.files, result.rehashed, result.removed) == (4, 4, 0)
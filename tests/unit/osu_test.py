@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from app.api.domains.osu import bancho_to_osuapi_status
+from app.api.domains.osu import osuGetBeatmapInfo
+from app.objects import models
+from app.objects.player import Player
+from app.objects.score import SubmissionStatus
+from app.repositories import maps as maps_repo
+from app.repositories import scores as scores_repo
+from tests.unit.factories import make_player
+
+MAPS: list[dict[str, Any]] = [
+    {
+        "id": map_id,
+        "set_id": map_id // 10,
+        "md5": f"{map_id:032x}",
+        "status": status,
+        "filename": f"Artist - Title (Creator) [Diff {map_id}].osu",
+    }
+    for map_id, status in ((10, 2), (11, 0), (20, 5), (30, 4))
+]
+BEST_SCORES: list[dict[str, Any]] = [
+    {"map_md5": f"{10:032x}", "mode": 0, "grade": "S"},
+    {"map_md5": f"{20:032x}", "mode": 0, "grade": "XH"},
+    {"map_md5": f"{20:032x}", "mode": 1, "grade": "A"},  # not the player's mode
+    {"map_md5": f"{30:032x}", "mode": 0, "grade": "B"},
+]
+
+
+async def fetch_one_map(filename: str) -> dict[str, Any] | None:
+    # (filenames are compared case-insensitively by sql)
+    for bmap in MAPS:
+        if bmap["filename"].lower() == filename.lower():
+            return bmap
+
+    return None
+
+
+async def fetch_many_maps(filenames: list[str]) -> list[dict[str, Any]]:
+    return [
+        bmap for bmap in MAPS if bmap["filename"].lower() in map(str.lower, filenames)
+    ]
+
+
+async def fetch_many_scores(
+    user_id: int,
+    mode: int,
+    status: int,
+    map_md5: str | None = None,
+    map_md5s: list[str] | None = None,
+) -> list[dict[str, Any]]:
+    assert status == SubmissionStatus.BEST
+    map_md5s = [map_md5] if map_md5 is not None else map_md5s
+    assert map_md5s is not None
+
+    return [
+        score
+        for score in BEST_SCORES
+        if score["map_md5"] in map_md5s and score["mode"] == mode
+    ]
+
+
+async def per_filename_handler(player: Player, filenames: list[str]) -> bytes:
+    """The original handler, which queried the maps & scores per filename."""
+    response_lines: list[str] = []
+
+    for idx, map_filename in enumerate(filenames):
+        beatmap = await fetch_one_map(filename=map_filename)
+
+        if not beatmap:
+            continue
+
+        grades = ["N", "N", "N", "N"]
+
+        for score in await fetch_many_scores(
+            map_md5=beatmap["md5"],
+            user_id=player.id,
+            mode=player.status.mode.as_vanilla,
+            status=SubmissionStatus.BEST,
+        ):
+            grades[score["mode"]] = score["grade"]
+
+        response_lines.append(
+            "{i}|{id}|{set_id}|{md5}|{status}|{grades}".format(
+                i=idx,
+                id=beatmap["id"],
+                set_id=beatmap["set_id"],
+                md5=beatmap["md5"],
+                status=bancho_to_osuapi_status(beatmap["status"]),
+                grades="|".join(grades),
+            ),
+        )
+
+    return "\n".join(response_lines).encode()
+
+
+@pytest.fixture
+def player() -> Player:
+    return make_player(3, "Player 3")
+
+
+async def test_get_beatmap_info_matches_per_filename_lookups(
+    monkeypatch: pytest.MonkeyPatch,
+    player: Player,
+):
+    sql_calls: list[str] = []
+
+    async def fetch_maps(**kwargs: Any) -> list[dict[str, Any]]:
+        sql_calls.append("maps")
+        return await fetch_many_maps(**kwargs)
+
+    async def fetch_scores(**kwargs: Any) -> list[dict[str, Any]]:
+        sql_calls.append("scores")
+        return await fetch_many_scores(**kwargs)
+
+    monkeypatch.setattr(maps_repo, "fetch_many", fetch_maps)
+    monkeypatch.setattr(scores_repo, "fetch_many", fetch_scores)
+
+    filenames = [
+        "Artist - Title (Creator) [Diff 20].osu",
+        "Unknown - Map (Creator) [Missing].osu",
+        "ARTIST - title (creator) [diff 10].osu",
+        "Artist - Title (Creator) [Diff 11].osu",  # no best score
+        "Artist - Title (Creator) [Diff 30].osu",
+        "artist - title (creator) [diff 20].osu",  # requested twice
+    ]
+
+    form_data = models.OsuBeatmapRequestForm(Filenames=filenames, Ids=[])
+    response = await osuGetBeatmapInfo(form_data=form_data, player=player)
+
+    assert bytes(response.body) == await per_filename_handler(player, filenames)
+    assert bytes(response.body).decode().splitlines() == [
+        f"0|20|2|{20:032x}|{bancho_to_osuapi_status(5)}|XH|N|N|N",
+        f"2|10|1|{10:032x}|{bancho_to_osuapi_status(2)}|S|N|N|N",
+        f"3|11|1|{11:032x}|{bancho_to_osuapi_status(0)}|N|N|N|N",
+        f"4|30|3|{30:032x}|{bancho_to_osuapi_status(4)}|B|N|N|N",
+        f"5|20|2|{20:032x}|{bancho_to_osuapi_status(5)}|XH|N|N|N",
+    ]
+    assert sql_calls == ["maps", "scores"]
+
+
+async def test_get_beatmap_info_without_known_maps(
+    monkeypatch: pytest.MonkeyPatch,
+    player: Player,
+):
+    async def fetch_scores(**kwargs: Any) -> list[dict[str, Any]]:
+        raise AssertionError("no scores should be fetched without maps")
+
+    monkeypatch.setattr(maps_repo, "fetch_many", fetch_many_maps)
+    monkeypatch.setattr(scores_repo, "fetch_many", fetch_scores)
+
+    filenames = ["Unknown - Map (Creator) [Missing].osu"]
+    form_data = models.OsuBeatmapRequestForm(Filenames=filenames, Ids=[])
+    response = await osuGetBeatmapInfo(form_data=form_data, player=player)
+
+    assert bytes(response.body) == b""
@@ -1,8 +1,21 @@
 from __future__ import annotations
 
+import struct
+
 import pytest
 
 import app.packets
+import app.state
+from app.constants.gamemodes import GameMode
+from app.constants.mods import Mods
+from app.constants.privileges import Privileges
+from app.objects.channel import Channel
+from app.objects.match import Match
+from app.objects.match import MatchTeams
+from app.objects.match import MatchTeamTypes
+from app.objects.match import MatchWinConditions
+from app.objects.match import SlotStatus
+from app.objects.player import Player
 
 
 @pytest.mark.parametrize(
@@ -667,3 +680,264 @@ def test_write_match_abort():
 )
 def test_write_switch_tournament_server(test_input, expected):
     assert app.packets.switch_tournament_server(test_input) == expected
+
+
+@pytest.fixture
+def match():
+    players = [
+        Player(
+            id=user_id,
+            name=f"player {user_id}",
+            priv=Privileges.UNRESTRICTED,
+            pw_bcrypt=None,
+            token=Player.generate_token(),
+        )
+        for user_id in (1001, 1002)
+    ]
+    for player in players:
+        app.state.sessions.players.append(player)
+
+    m = Match(
+        id=3,
+        name="cmyui's game",
+        password="secret",
+        has_public_history=False,
+        map_name="Feryquitous - Arcaea [Future]",
+        map_id=1723723,
+        map_md5="60b725f10c9c85c70d97880dfe8191b3",
+        host_id=1001,
+        mode=GameMode.VANILLA_OSU,
+        mods=Mods.HIDDEN,
+        win_condition=MatchWinConditions.accuracy,
+        team_type=MatchTeamTypes.team_vs,
+        freemods=False,
+        seed=1337,
+        chat_channel=Channel(name="#multi_3", topic="", auto_join=False),
+    )
+    m.slots[0].player = players[0]
+    m.slots[0].status = SlotStatus.ready
+    m.slots[0].team = MatchTeams.red
+    m.slots[0].mods = Mods.HARDROCK
+    m.slots[1].player = players[1]
+    m.slots[1].status = SlotStatus.not_ready
+    m.slots[1].team = MatchTeams.blue
+    m.slots[15].status = SlotStatus.locked
+
+    yield m
+
+    for player in players:
+        app.state.sessions.players.remove(player)
+
+
+@pytest.mark.parametrize(
+    ("freemods", "send_pw", "expected"),
+    [
+        (
+            False,
+            False,
+            b"\x1a\x00\x00\x91\x00\x00\x00\x03\x00\x00\x00\x08\x00\x00\x00\x0b\x0ccmyui's game\x0b\x00\x0b\x1dFeryquitous - Arcaea [Future]KM\x1a\x00\x0b 60b725f10c9c85c70d97880dfe8191b3\x08\x04\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x02\x02\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xe9\x03\x00\x00\xea\x03\x00\x00\xe9\x03\x00\x00\x00\x01\x02\x009\x05\x00\x00",
+        ),
+        (
+            False,
+            True,
+            b"\x1a\x00\x00\x97\x00\x00\x00\x03\x00\x00\x00\x08\x00\x00\x00\x0b\x0ccmyui's game\x0b\x06secret\x0b\x1dFeryquitous - Arcaea [Future]KM\x1a\x00\x0b 60b725f10c9c85c70d97880dfe8191b3\x08\x04\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x02\x02\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xe9\x03\x00\x00\xea\x03\x00\x00\xe9\x03\x00\x00\x00\x01\x02\x009\x05\x00\x00",
+        ),
+        (
+            True,
+            True,
+            b"\x1a\x00\x00\xd7\x00\x00\x00\x03\x00\x00\x00\x08\x00\x00\x00\x0b\x0ccmyui's game\x0b\x06secret\x0b\x1dFeryquitous - Arcaea [Future]KM\x1a\x00\x0b 60b725f10c9c85c70d97880dfe8191b3\x08\x04\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x02\x02\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xe9\x03\x00\x00\xea\x03\x00\x00\xe9\x03\x00\x00\x00\x01\x02\x01\x10\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x009\x05\x00\x00",
+        ),
+    ],
+)
+def test_write_update_match_with_slots(match, freemods, send_pw, expected):
+    match.freemods = freemods
+    assert app.packets.update_match(match, send_pw=send_pw) == expected
+
+
+@pytest.mark.parametrize(
+    ("encoded", "args"),
+    [
+        (
+            app.packets.logout(1001),
+            (
+                app.packets.ServerPackets.USER_LOGOUT,
+                (1001, app.packets.osuTypes.i32),
+                (0, app.packets.osuTypes.u8),
+            ),
+        ),
+        (
+            app.packets.channel_info("#osu", "General discussion.", 1337),
+            (
+                app.packets.ServerPackets.CHANNEL_INFO,
+                (
+                    ("#osu", "General discussion.", 1337),
+                    app.packets.osuTypes.channel,
+                ),
+            ),
+        ),
+        (
+            app.packets.friends_list([1001, 1002, 1003]),
+            (
+                app.packets.ServerPackets.FRIENDS_LIST,
+                ([1001, 1002, 1003], app.packets.osuTypes.i32_list),
+            ),
+        ),
+        (
+            app.packets.spectate_frames(b"\x00\x01\x02\x03"),
+            (
+                app.packets.ServerPackets.SPECTATE_FRAMES,
+                (b"\x00\x01\x02\x03", app.packets.osuTypes.raw),
+            ),
+        ),
+        (
+            app.packets.target_silenced("cmyui"),
+            (
+                app.packets.ServerPackets.TARGET_IS_SILENCED,
+                (("", "", "cmyui", 0), app.packets.osuTypes.message),
+            ),
+        ),
+    ],
+)
+def test_packet_encoders_match_generic_write(encoded, args):
+    assert encoded == app.packets.write(*args)
+
+
+def make_spectate_frames_body(frame_count: int) -> bytes:
+    frames = [
+        app.packets.ReplayFrame(
+            button_state=i % 4,
+            taiko_byte=0,
+            x=float(i),
+            y=float(i * 2),
+            time=i * 16,
+        )
+        for i in range(frame_count)
+    ]
+    score_frame = app.packets.ScoreFrame(
+        time=1234,
+        id=0,
+        num300=300,
+        num100=10,
+        num50=1,
+        num_geki=50,
+        num_katu=5,
+        num_miss=2,
+        total_score=1_000_000,
+        max_combo=400,
+        current_combo=123,
+        perfect=False,
+        current_hp=200,
+        tag_byte=0,
+        score_v2=False,
+    )
+    return b"".join(
+        (
+            struct.pack("<iH", 7, len(frames)),
+            *[app.packets.REPLAYFRAME_FMT.pack(*frame) for frame in frames],
+            struct.pack("<B", app.packets.ReplayAction.Standard),
+            app.packets.write_scoreframe(score_frame),
+            struct.pack("<H", 42),
+        ),
+    )
+
+
+def make_client_packet(packid: app.packets.ClientPackets, body: bytes) -> bytes:
+    return struct.pack("<HxI", packid, len(body)) + body
+
+
+class RawPacket(app.packets.BasePacket):
+    def __init__(self, reader: app.packets.BanchoPacketReader) -> None:
+        self.data = reader.read_raw().tobytes()
+
+    async def handle(self, player: Player) -> None: ...
+
+
+class SpectateFramesPacket(app.packets.BasePacket):
+    def __init__(self, reader: app.packets.BanchoPacketReader) -> None:
+        self.frame_bundle = reader.read_replayframe_bundle()
+
+    async def handle(self, player: Player) -> None: ...
+
+
+class MatchChangeSettingsPacket(app.packets.BasePacket):
+    def __init__(self, reader: app.packets.BanchoPacketReader) -> None:
+        self.match_data = reader.read_match()
+
+    async def handle(self, player: Player) -> None: ...
+
+
+class UnreadPacket(app.packets.BasePacket):
+    def __init__(self, reader: app.packets.BanchoPacketReader) -> None:
+        pass  # leaves its data unread
+
+    async def handle(self, player: Player) -> None: ...
+
+
+def test_read_spectate_frames():
+    body = make_spectate_frames_body(frame_count=20)
+    packet_map: app.packets.PacketMap = {
+        app.packets.ClientPackets.SPECTATE_FRAMES: SpectateFramesPacket,
+    }
+
+    with memoryview(
+        make_client_packet(app.packets.ClientPackets.SPECTATE_FRAMES, body),
+    ) as body_view:
+        (packet,) = app.packets.BanchoPacketReader(body_view, packet_map)
+
+    assert isinstance(packet, SpectateFramesPacket)
+    bundle = packet.frame_bundle
+    assert bundle.extra == 7
+    assert len(bundle.replay_frames) == 20
+    assert bundle.replay_frames[3] == app.packets.ReplayFrame(3, 0, 3.0, 6.0, 48)
+    assert bundle.action == app.packets.ReplayAction.Standard
+    assert bundle.score_frame.total_score == 1_000_000
+    assert bundle.sequence == 42
+    assert bundle.raw_data.tobytes() == body
+
+
+def test_read_match(match):
+    match.freemods = True
+    body = app.packets.write_match(match)
+    packet_map: app.packets.PacketMap = {
+        app.packets.ClientPackets.MATCH_CHANGE_SETTINGS: MatchChangeSettingsPacket,
+    }
+
+    with memoryview(
+        make_client_packet(app.packets.ClientPackets.MATCH_CHANGE_SETTINGS, body),
+    ) as body_view:
+        (packet,) = app.packets.BanchoPacketReader(body_view, packet_map)
+
+    assert isinstance(packet, MatchChangeSettingsPacket)
+    match_data = packet.match_data
+    assert match_data.id == 3
+    assert match_data.name == "cmyui's game"
+    assert match_data.passwd == "secret"
+    assert match_data.map_id == 1723723
+    assert match_data.map_md5 == "60b725f10c9c85c70d97880dfe8191b3"
+    assert match_data.slot_statuses[:2] == [SlotStatus.ready, SlotStatus.not_ready]
+    assert match_data.slot_teams[:2] == [MatchTeams.red, MatchTeams.blue]
+    assert match_data.slot_ids == [1001, 1002]
+    assert match_data.host_id == 1001
+    assert match_data.freemods is True
+    assert match_data.slot_mods[0] == Mods.HARDROCK
+    assert match_data.seed == 1337
+
+
+def test_reader_skips_unhandled_and_unread_data():
+    body = (
+        make_client_packet(app.packets.ClientPackets.PING, b"")
+        + make_client_packet(app.packets.ClientPackets.LOGOUT, b"\x00\x00\x00\x00")
+        + make_client_packet(app.packets.ClientPackets.CHANGE_ACTION, b"\xff" * 5)
+        + make_client_packet(app.packets.ClientPackets.SET_AWAY_MESSAGE, b"abc")
+    )
+    packet_map: app.packets.PacketMap = {
+        app.packets.ClientPackets.CHANGE_ACTION: UnreadPacket,
+        app.packets.ClientPackets.SET_AWAY_MESSAGE: RawPacket,
+    }
+
+    with memoryview(body) as body_view:
+        packets = list(app.packets.BanchoPacketReader(body_view, packet_map))
+
+    assert [type(p) for p in packets] == [UnreadPacket, RawPacket]
+    assert isinstance(packets[1], RawPacket)
+    assert packets[1].data == b"abc"
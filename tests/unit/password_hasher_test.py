@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from ipaddress import IPv4Address
+
+import bcrypt
+import pytest
+
+from app.adapters.password_hasher import PasswordHasher
+from app.adapters.password_hasher import PasswordHasherOverloaded
+
+IP = IPv4Address("127.0.0.1")
+OTHER_IP = IPv4Address("127.0.0.2")
+
+
+async def test_checkpw_and_hashpw():
+    hasher = PasswordHasher(max_workers=2, max_queued=2, max_in_flight_per_ip=2)
+    hashed = bcrypt.hashpw(b"pw_md5", bcrypt.gensalt(rounds=4))
+
+    assert await hasher.checkpw(b"pw_md5", hashed, ip=IP)
+    assert not await hasher.checkpw(b"wrong", hashed, ip=IP)
+
+    new_hash = await hasher.hashpw(b"pw_md5", ip=IP)
+    assert bcrypt.checkpw(b"pw_md5", new_hash)
+    assert hasher.in_flight == 0
+
+    hasher.shutdown()
+
+
+async def test_rejects_past_limits():
+    hasher = PasswordHasher(max_workers=1, max_queued=1, max_in_flight_per_ip=1)
+    release = threading.Event()
+
+    def block() -> bool:
+        return release.wait(timeout=5)
+
+    # one running, one queued (from different ips)
+    running = asyncio.create_task(hasher._run(block, ip=IP))
+    queued = asyncio.create_task(hasher._run(block, ip=OTHER_IP))
+    await asyncio.sleep(0)
+    assert hasher.in_flight == 2
+
+    # the queue is full
+    with pytest.raises(PasswordHasherOverloaded):
+        await hasher.checkpw(b"pw_md5", b"hash", ip=None)
+
+    release.set()
+    assert await running and await queued
+    assert hasher.in_flight == 0
+
+    # the per-ip limit
+    release.clear()
+    running = asyncio.create_task(hasher._run(block, ip=IP))
+    await asyncio.sleep(0)
+
+    with pytest.raises(PasswordHasherOverloaded):
+        await hasher.checkpw(b"pw_md5", b"hash", ip=IP)
+
+    release.set()
+    assert await running
+
+    hasher.shutdown()
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+import app.adapters.performance_calculator
+import app.usecases.performance
+from app.adapters.performance_calculator import PerformanceCalculator
+from app.constants.mods import Mods
+from app.usecases.performance import ScoreParams
+from app.usecases.performance import calculate_performances
+from app.usecases.performance import calculate_performances_cached
+
+SAMPLE_DATA_PATH = Path(__file__).parents[2] / "testing/sample_data"
+OSU_FILE_PATH = str(SAMPLE_DATA_PATH / "vivid_osu_file.osu")
+MAP_MD5 = "eb786491aa73d30f9288a66f774621d7"
+
+SCORES = [
+    ScoreParams(mode=0, mods=int(Mods.HIDDEN), acc=98.5),
+    ScoreParams(mode=0, mods=int(Mods.NIGHTCORE), combo=300, nmiss=2, n300=350),
+    ScoreParams(mode=0, mods=int(Mods.NIGHTCORE), acc=100.0),
+]
+
+
+def test_cached_calculation_matches_uncached():
+    app.usecases.performance._beatmaps.clear()
+    app.usecases.performance._difficulties.clear()
+
+    expected = calculate_performances(OSU_FILE_PATH, SCORES)
+
+    assert calculate_performances_cached(1, MAP_MD5, OSU_FILE_PATH, SCORES) == expected
+    assert len(app.usecases.performance._beatmaps) == 1
+    assert len(app.usecases.performance._difficulties) == 2  # (by mods)
+
+    # the second time around, only the performance step is calculated
+    hits = app.usecases.performance._difficulties.hits
+    assert calculate_performances_cached(1, MAP_MD5, OSU_FILE_PATH, SCORES) == expected
+    assert app.usecases.performance._difficulties.hits == hits + len(SCORES)
+
+
+async def test_performance_calculator(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+):
+    shutil.copy(OSU_FILE_PATH, tmp_path / "1.osu")
+    monkeypatch.setattr(app.adapters.performance_calculator, "BEATMAPS_PATH", tmp_path)
+
+    performance_calculator = PerformanceCalculator(max_workers=1)
+
+    results = await performance_calculator.calculate(1, MAP_MD5, SCORES)
+    assert results == calculate_performances(OSU_FILE_PATH, SCORES)
+
+    performance_calculator.shutdown()
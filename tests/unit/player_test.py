@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import pytest
+
+import app.settings
+from app.objects.collections import Players
+from tests.unit.factories import make_player
+
+
+def test_enqueue_replaces_keyed_packets_in_order():
+    player = make_player(3, "cmyui")
+
+    player.enqueue(b"state 1", key=("match", 1))
+    player.enqueue(b"|join|")
+    player.enqueue(b"state 2", key=("match", 1))
+    player.enqueue(b"|other match|", key=("match", 2))
+    player.enqueue(b"|dispose|")
+
+    # replaced packets are removed, rather than moved
+    assert player.dequeue() == b"|join|state 2|other match||dispose|"
+    assert player.dequeue() is None
+
+    # keys are forgotten once sent
+    player.enqueue(b"state 3", key=("match", 1))
+    assert player.dequeue() == b"state 3"
+
+
+def test_enqueue_drop_policy(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(app.settings, "PACKET_QUEUE_MAX_BYTES", 8)
+    monkeypatch.setattr(app.settings, "PACKET_QUEUE_OVERFLOW_POLICY", "drop")
+    player = make_player(3, "cmyui")
+
+    player.enqueue(b"12345")
+    player.enqueue(b"6789")  # over the limit
+    player.enqueue(b"678")
+
+    # replacing a keyed packet only counts the difference
+    player.enqueue(b"ab", key="k")  # over the limit
+    player.enqueue(b"", key="k")
+
+    assert player.dequeue() == b"12345678"
+    assert not player.packet_queue_overflowed
+
+
+def test_enqueue_disconnect_policy(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(app.settings, "PACKET_QUEUE_MAX_BYTES", 8)
+    monkeypatch.setattr(app.settings, "PACKET_QUEUE_OVERFLOW_POLICY", "disconnect")
+    player = make_player(3, "cmyui")
+
+    player.enqueue(b"12345")
+    player.enqueue(b"6789")
+    player.enqueue(b"0")
+
+    assert player.packet_queue_overflowed
+    assert player.dequeue() is None
+
+
+def test_enqueue_to_bots_is_discarded(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(app.settings, "PACKET_QUEUE_MAX_BYTES", 8)
+    monkeypatch.setattr(app.settings, "PACKET_QUEUE_OVERFLOW_POLICY", "disconnect")
+
+    bot = make_player(1, "BanchoBot", is_bot_client=True)
+    irc_player = make_player(3, "cmyui")
+    irc_player.irc_client = True
+
+    # nothing drains their queues, so a flood of broadcasts mustn't fill them
+    players = Players([bot, irc_player])
+    for _ in range(1000):
+        players.enqueue(b"broadcast")
+
+    assert not bot.packet_queue_overflowed
+    assert not irc_player.packet_queue_overflowed
+    assert bot.dequeue() is None
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import pytest
+
+from app.usecases.stats import calculate_totals
+from app.usecases.stats import calculate_totals_batch
+
+
+def naive_totals(pps: list[float], accs: list[float]) -> tuple[float, int]:
+    # as previously calculated, from rows sorted by pp
+    weighted_acc = sum(acc * 0.95**i for i, acc in enumerate(accs))
+    bonus_acc = 100.0 / (20 * (1 - 0.95 ** len(accs)))
+    acc = (weighted_acc * bonus_acc) / 100
+
+    weighted_pp = sum(pp * 0.95**i for i, pp in enumerate(pps))
+    bonus_pp = 416.6667 * (1 - 0.9994 ** len(pps))
+    pp = round(weighted_pp + bonus_pp)
+
+    return acc, pp
+
+
+def random_scores(rng: random.Random, count: int) -> tuple[list[float], list[float]]:
+    pps = sorted((rng.uniform(0, 800) for _ in range(count)), reverse=True)
+    accs = [rng.uniform(70, 100) for _ in range(count)]
+    return pps, accs
+
+
+@pytest.mark.parametrize("count", [1, 2, 100, 1000, 20_000])
+def test_calculate_totals(count: int):
+    pps, accs = random_scores(random.Random(count), count)
+
+    acc, pp = calculate_totals(pps, accs)
+    expected_acc, expected_pp = naive_totals(pps, accs)
+
+    assert acc == pytest.approx(expected_acc)
+    assert pp == expected_pp
+
+
+def test_calculate_totals_of_top_scores():
+    pps, accs = random_scores(random.Random(727), 2000)
+
+    # scores beyond the top 1000 have no (meaningful) weight
+    acc, pp = calculate_totals(pps[:1000], accs[:1000], count=2000)
+    expected_acc, expected_pp = naive_totals(pps, accs)
+
+    assert acc == pytest.approx(expected_acc)
+    assert pp == expected_pp
+
+
+def test_calculate_totals_without_scores():
+    assert calculate_totals([], []) == (0.0, 0)
+
+
+def test_calculate_totals_batch():
+    rng = random.Random(727)
+    users = [random_scores(rng, rng.randrange(1, 300)) for _ in range(50)]
+
+    offsets = np.cumsum([0] + [len(pps) for pps, _ in users])
+    acc, pp = calculate_totals_batch(
+        np.concatenate([pps for pps, _ in users]),
+        np.concatenate([accs for _, accs in users]),
+        offsets,
+    )
+
+    for i, (pps, accs) in enumerate(users):
+        expected_acc, expected_pp = naive_totals(pps, accs)
+        assert acc[i] == pytest.approx(expected_acc)
+        assert pp[i] == expected_pp
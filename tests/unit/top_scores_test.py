@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+import app.state
+from app.constants.gamemodes import GameMode
+from app.objects.top_scores import TOP_SCORES_SIZE
+from app.objects.top_scores import TopScore
+from app.objects.top_scores import TopScores
+from app.objects.top_scores import reconcile_top_scores
+
+
+def naive_totals(scores: list[TopScore]) -> tuple[float, int]:
+    # as previously calculated on each submission, from all scores
+    best_scores = sorted(scores, key=lambda s: (-s.pp, s.id))
+
+    weighted_acc = sum(row.acc * 0.95**i for i, row in enumerate(best_scores))
+    bonus_acc = 100.0 / (20 * (1 - 0.95 ** len(best_scores)))
+    acc = (weighted_acc * bonus_acc) / 100
+
+    weighted_pp = sum(row.pp * 0.95**i for i, row in enumerate(best_scores))
+    bonus_pp = 416.6667 * (1 - 0.9994 ** len(best_scores))
+    pp = round(weighted_pp + bonus_pp)
+
+    return acc, pp
+
+
+def test_replace_matches_full_recalculation():
+    rng = random.Random(727)
+
+    # {map: best score}
+    best_scores = {
+        map_id: TopScore(id=map_id, pp=rng.uniform(0, 500), acc=rng.uniform(80, 100))
+        for map_id in range(200)
+    }
+    top_scores = TopScores(best_scores.values(), count=len(best_scores))
+
+    next_id = len(best_scores)
+    for _ in range(500):
+        map_id = rng.randrange(250)
+        prev_best = best_scores.get(map_id)
+
+        score = TopScore(id=next_id, pp=rng.uniform(0, 500), acc=rng.uniform(80, 100))
+        next_id += 1
+
+        top_scores.replace(score, prev_best.id if prev_best else None)
+        best_scores[map_id] = score
+
+        assert top_scores.complete
+        assert top_scores.count == len(best_scores)
+        acc, pp = top_scores.totals()
+        expected_acc, expected_pp = naive_totals(list(best_scores.values()))
+        assert acc == pytest.approx(expected_acc)
+        assert pp == expected_pp
+
+
+def test_replace_beyond_top_scores():
+    count = TOP_SCORES_SIZE + 10
+    scores = [TopScore(id=i, pp=float(count - i), acc=99.0) for i in range(count)]
+
+    # only the top scores are kept
+    top_scores = TopScores(scores[:TOP_SCORES_SIZE], count=count)
+    assert top_scores.complete
+
+    # a new score which doesn't make the top
+    top_scores.replace(TopScore(id=count, pp=0.5, acc=99.0), None)
+    assert top_scores.count == count + 1
+    assert top_scores.complete
+
+    # a top score replaced by one which doesn't make the top leaves
+    # a gap, which must be filled from sql
+    top_scores.replace(TopScore(id=count + 1, pp=0.25, acc=99.0), prev_best_id=0)
+    assert top_scores.count == count + 1
+    assert not top_scores.complete
+
+
+async def test_reconcile_top_scores(monkeypatch: pytest.MonkeyPatch):
+    in_sql = {
+        (3, GameMode.VANILLA_OSU): TopScores([TopScore(1, 100.0, 99.0)], count=1),
+        (4, GameMode.VANILLA_OSU): TopScores([TopScore(2, 200.0, 98.0)], count=1),
+    }
+
+    async def from_sql(user_id: int, mode: GameMode) -> TopScores:
+        scores = in_sql[(user_id, mode)]
+        return TopScores(scores._scores, scores.count)
+
+    monkeypatch.setattr(TopScores, "from_sql", from_sql)
+    app.state.cache.top_scores.clear()
+
+    app.state.cache.top_scores[(3, GameMode.VANILLA_OSU)] = await from_sql(
+        3,
+        GameMode.VANILLA_OSU,
+    )
+    # e.g. recalculated in sql since being cached
+    app.state.cache.top_scores[(4, GameMode.VANILLA_OSU)] = TopScores(
+        [TopScore(2, 150.0, 98.0)],
+        count=1,
+    )
+
+    assert await reconcile_top_scores() == 1
+
+    for key, top_scores in in_sql.items():
+        assert app.state.cache.top_scores.peek(key) == top_scores
+
+    app.state.cache.top_scores.clear()
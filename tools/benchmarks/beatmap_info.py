@@ -0,0 +1,192 @@
+#!/usr/bin/env python3.11
+"""\
+Benchmark for /web/osu-getbeatmapinfo.php with 500 filenames, as
+sent by the client when opening song select.
+
+"before" mirrors the original handler: a map query, and a best
+scores query, per filename. "after" runs the current handler, which
+queries all of the maps, and then all of the best scores, at once.
+No database is required: queries are stood in for by in-memory
+lookups, after a sleep of SIMULATED_QUERY_MS per query.
+
+Usage: python tools/benchmarks/beatmap_info.py
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.chdir(ROOT_DIR)
+
+try:
+    from app.api.domains.osu import bancho_to_osuapi_status
+    from app.api.domains.osu import osuGetBeatmapInfo
+    from app.constants.privileges import Privileges
+    from app.objects import models
+    from app.objects.player import Player
+    from app.objects.score import SubmissionStatus
+    from app.repositories import maps as maps_repo
+    from app.repositories import scores as scores_repo
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run with bancho.py's dependencies installed\x1b[m")
+    raise
+
+MAPS = 50_000
+FILENAMES = 500
+UNKNOWN_RATIO = 0.1  # of filenames, for maps not in sql
+PLAYED_RATIO = 0.6  # of maps, which the player has a best score on
+SIMULATED_QUERY_MS = 0.5
+ROUNDS = 5
+
+rng = random.Random(727)
+sql_queries = 0
+
+
+def make_map(map_id: int) -> dict[str, Any]:
+    return {
+        "id": map_id,
+        "set_id": map_id // 4,
+        "md5": f"{map_id:032x}",
+        "status": rng.choice((0, 2, 3, 4, 5)),
+        "filename": f"Artist - Title (Creator) [Diff {map_id}].osu",
+    }
+
+
+MAPS_BY_FILENAME = {
+    bmap["filename"].lower(): bmap for bmap in map(make_map, range(1, MAPS + 1))
+}
+GRADES = ("XH", "X", "SH", "S", "A", "B", "C", "D")
+BEST_SCORES = {
+    bmap["md5"]: {"map_md5": bmap["md5"], "mode": 0, "grade": rng.choice(GRADES)}
+    for bmap in MAPS_BY_FILENAME.values()
+    if rng.random() < PLAYED_RATIO
+}
+
+
+async def query() -> None:
+    global sql_queries
+    sql_queries += 1
+    await asyncio.sleep(SIMULATED_QUERY_MS / 1000)
+
+
+async def fetch_map(filename: str) -> dict[str, Any] | None:
+    await query()
+    return MAPS_BY_FILENAME.get(filename.lower())
+
+
+async def fetch_maps(filenames: list[str]) -> list[dict[str, Any]]:
+    await query()
+    return [
+        MAPS_BY_FILENAME[filename.lower()]
+        for filename in filenames
+        if filename.lower() in MAPS_BY_FILENAME
+    ]
+
+
+async def fetch_best_scores(
+    map_md5: str | None = None,
+    map_md5s: list[str] | None = None,
+    **kwargs: Any,
+) -> list[dict[str, Any]]:
+    assert kwargs["status"] == SubmissionStatus.BEST
+    await query()
+
+    map_md5s = [map_md5] if map_md5 is not None else map_md5s
+    assert map_md5s is not None
+    return [BEST_SCORES[md5] for md5 in map_md5s if md5 in BEST_SCORES]
+
+
+async def handle_before(player: Player, filenames: list[str]) -> bytes:
+    response_lines: list[str] = []
+
+    for idx, map_filename in enumerate(filenames):
+        beatmap = await fetch_map(map_filename)
+
+        if not beatmap:
+            continue
+
+        grades = ["N", "N", "N", "N"]
+
+        for score in await fetch_best_scores(
+            map_md5=beatmap["md5"],
+            user_id=player.id,
+            mode=player.status.mode.as_vanilla,
+            status=SubmissionStatus.BEST,
+        ):
+            grades[score["mode"]] = score["grade"]
+
+        response_lines.append(
+            "{i}|{id}|{set_id}|{md5}|{status}|{grades}".format(
+                i=idx,
+                id=beatmap["id"],
+                set_id=beatmap["set_id"],
+                md5=beatmap["md5"],
+                status=bancho_to_osuapi_status(beatmap["status"]),
+                grades="|".join(grades),
+            ),
+        )
+
+    return "\n".join(response_lines).encode()
+
+
+async def handle_after(player: Player, filenames: list[str]) -> bytes:
+    form_data = models.OsuBeatmapRequestForm(Filenames=filenames, Ids=[])
+    response = await osuGetBeatmapInfo(form_data=form_data, player=player)
+    return bytes(response.body)
+
+
+async def run() -> None:
+    global sql_queries
+
+    maps_repo.fetch_many = fetch_maps  # type: ignore[assignment]
+    scores_repo.fetch_many = fetch_best_scores  # type: ignore[assignment]
+
+    player = Player(
+        id=3,
+        name="Player 3",
+        priv=Privileges.UNRESTRICTED,
+        pw_bcrypt=None,
+        token=Player.generate_token(),
+    )
+
+    filenames = [
+        (
+            f"Unknown - Map ({i}).osu"
+            if rng.random() < UNKNOWN_RATIO
+            else rng.choice(list(MAPS_BY_FILENAME.values()))["filename"]
+        )
+        for i in range(FILENAMES)
+    ]
+
+    # both handlers should produce the same response
+    before = await handle_before(player, filenames)
+    assert await handle_after(player, filenames) == before
+
+    for label, handle in (("before", handle_before), ("after", handle_after)):
+        sql_queries = 0
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            await handle(player, filenames)
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"{label:<8} {elapsed / ROUNDS * 1000:>10.3f} msec/request "
+            f"({sql_queries // ROUNDS} queries; {FILENAMES} filenames, "
+            f"{SIMULATED_QUERY_MS} msec/query)",
+        )
+
+
+def main() -> int:
+    asyncio.run(run())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
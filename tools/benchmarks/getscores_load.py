@@ -0,0 +1,179 @@
+#!/usr/bin/env python3.11
+"""\
+Load benchmark for the beatmap leaderboard cache behind
+/web/osu-osz2-getscores.php.
+
+Replays a mix of getscores requests (zipf-distributed beatmap
+popularity; top/mods/friends/country leaderboards) interleaved
+with best score submissions against the leaderboard cache. No
+database is required: leaderboard loads are stood in for by a
+sleep of SIMULATED_QUERY_MS per query, and the queries issued are
+compared against the 3 per request of the previous uncached path.
+
+Usage: python tools/benchmarks/getscores_load.py
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.chdir(ROOT_DIR)
+
+try:
+    import app.state
+    from app.constants.gamemodes import GameMode
+    from app.objects.leaderboard import Leaderboard
+    from app.objects.leaderboard import LeaderboardKey
+    from app.objects.leaderboard import LeaderboardScore
+    from app.objects.leaderboard import ScoringMetric
+    from app.objects.leaderboard import fetch_leaderboard
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run with bancho.py's dependencies installed\x1b[m")
+    raise
+
+BEATMAPS = 5_000
+USERS = 20_000
+REQUESTS = 20_000
+SUBMISSION_RATIO = 0.05  # submissions per request
+SIMULATED_QUERY_MS = 2.0
+COUNTRIES = ("us", "de", "jp", "ca", "br", "pl", "kr", "fr")
+MODS = (0, 8, 16, 64, 72, 1024)
+
+
+class RequestMix(NamedTuple):
+    leaderboard_type: str  # matches `osu.LeaderboardType`
+    weight: float
+
+
+REQUEST_MIX = (
+    RequestMix("top", 70),
+    RequestMix("mods", 10),
+    RequestMix("friends", 10),
+    RequestMix("country", 10),
+)
+
+rng = random.Random(727)
+next_score_id = 0
+sql_queries = 0
+
+
+def make_score(userid: int, score: float) -> LeaderboardScore:
+    global next_score_id
+    next_score_id += 1
+    return LeaderboardScore(
+        id=next_score_id,
+        score=score,
+        max_combo=500,
+        n50=0,
+        n100=5,
+        n300=495,
+        nmiss=0,
+        nkatu=0,
+        ngeki=0,
+        perfect=0,
+        mods=rng.choice(MODS),
+        time=1700000000 + next_score_id,
+        userid=userid,
+        name=f"user{userid}",
+        country=COUNTRIES[userid % len(COUNTRIES)],
+    )
+
+
+def board_size(rank: int) -> int:
+    # popular maps have (many) more scores
+    return max(5, 20_000 // rank)
+
+
+async def simulated_from_sql(
+    map_md5: str,
+    mode: GameMode,
+    scoring_metric: ScoringMetric,
+) -> Leaderboard:
+    global sql_queries
+    sql_queries += 1
+    await asyncio.sleep(SIMULATED_QUERY_MS / 1000)
+    size = board_size(int(map_md5))
+    users = rng.sample(range(USERS), k=min(size, USERS))
+    return Leaderboard([make_score(u, rng.uniform(0, 1_000_000)) for u in users])
+
+
+def zipf_weights(count: int) -> list[float]:
+    return [1 / rank for rank in range(1, count + 1)]
+
+
+async def serve(
+    map_md5: str,
+    leaderboard_type: str,
+    user_id: int,
+    friends: set[int],
+) -> int:
+    leaderboard = await fetch_leaderboard(map_md5, GameMode.VANILLA_OSU, "score")
+
+    if leaderboard_type == "mods":
+        scores = leaderboard.top(mods=rng.choice(MODS))
+    elif leaderboard_type == "friends":
+        scores = leaderboard.top(user_ids=friends)
+    elif leaderboard_type == "country":
+        scores = leaderboard.top(country=COUNTRIES[user_id % len(COUNTRIES)])
+    else:
+        scores = leaderboard.top()
+
+    personal_best = leaderboard.personal_best(user_id)
+    if personal_best is not None:
+        leaderboard.rank_of(personal_best.score)
+
+    return len(scores)
+
+
+async def run() -> None:
+    Leaderboard.from_sql = simulated_from_sql  # type: ignore[method-assign]
+    app.state.cache.leaderboards.clear()
+
+    maps = [f"{rank:032d}" for rank in range(1, BEATMAPS + 1)]
+    map_weights = zipf_weights(BEATMAPS)
+    types = [mix.leaderboard_type for mix in REQUEST_MIX]
+    type_weights = [mix.weight for mix in REQUEST_MIX]
+
+    requests = rng.choices(maps, weights=map_weights, k=REQUESTS)
+    request_types = rng.choices(types, weights=type_weights, k=REQUESTS)
+    friends = {user_id: set(rng.sample(range(USERS), k=50)) for user_id in range(256)}
+
+    submissions = 0
+    start = time.perf_counter()
+
+    for map_md5, leaderboard_type in zip(requests, request_types):
+        user_id = rng.randrange(256)
+        await serve(map_md5, leaderboard_type, user_id, friends[user_id] | {user_id})
+
+        if rng.random() < SUBMISSION_RATIO:
+            # as `add_submitted_score` does for a cached leaderboard
+            key: LeaderboardKey = (map_md5, GameMode.VANILLA_OSU, "score")
+            if key in app.state.cache.leaderboards:
+                leaderboard = await fetch_leaderboard(*key)
+                leaderboard.add(make_score(user_id, rng.uniform(0, 1_000_000)))
+                submissions += 1
+
+    elapsed = time.perf_counter() - start
+    hit_rate = 1 - sql_queries / REQUESTS
+
+    print(f"{REQUESTS} requests over {BEATMAPS} beatmaps ({submissions} submissions)")
+    print(f"  {'requests/sec':<24} {REQUESTS / elapsed:>12.0f}")
+    print(f"  {'cache hit rate':<24} {hit_rate:>12.2%}")
+    print(f"  {'sql queries (cached)':<24} {sql_queries:>12}")
+    print(f"  {'sql queries (uncached)':<24} {REQUESTS * 3:>12}")
+
+
+def main() -> int:
+    asyncio.run(run())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3.11
+"""\
+Benchmark for building the global & country leaderboards
+in redis from 1M stats rows, as is done at startup.
+
+"before" mirrors the original startup: two ZADD round-trips per row
+(timed on a sample of rows, and extrapolated). "after" runs
+`build_leaderboards` over all rows.
+
+Uses redis database BENCHMARK_DB of the server in REDIS_DSN, which
+is flushed before & after running.
+
+Usage: python tools/benchmarks/leaderboard_rebuild.py
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import time
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.chdir(ROOT_DIR)
+
+try:
+    from redis import asyncio as aioredis
+
+    import app.settings
+    from app.constants.gamemodes import GameMode
+    from app.usecases.leaderboards import build_leaderboards
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run with bancho.py's dependencies installed\x1b[m")
+    raise
+
+BENCHMARK_DB = 15
+STATS_ROWS = 1_000_000
+SAMPLE_ROWS = 20_000  # for the (slow) original calculation
+COUNTRIES = [f"{a}{b}" for a in "abcdefg" for b in "abcdefg"]
+
+
+def make_rows(rng: random.Random) -> list[dict[str, Any]]:
+    modes = list(GameMode)
+    return [
+        {
+            "id": 3 + i // len(modes),
+            "mode": modes[i % len(modes)].value,
+            "pp": rng.uniform(1, 15_000),
+            "country": rng.choice(COUNTRIES),
+        }
+        for i in range(STATS_ROWS)
+    ]
+
+
+async def stream(rows: list[dict[str, Any]]) -> AsyncIterator[dict[str, Any]]:
+    for row in rows:
+        yield row
+
+
+async def build_before(redis: aioredis.Redis, rows: list[dict[str, Any]]) -> None:
+    for row in rows:
+        await redis.zadd(
+            f"bancho:leaderboard:{row['mode']}",
+            {str(row["id"]): row["pp"]},
+        )
+        await redis.zadd(
+            f"bancho:leaderboard:{row['mode']}:{row['country']}",
+            {str(row["id"]): row["pp"]},
+        )
+
+
+async def run() -> int:
+    dsn = urlsplit(app.settings.REDIS_DSN)._replace(path=f"/{BENCHMARK_DB}")
+    redis = aioredis.from_url(dsn.geturl())  # type: ignore[no-untyped-call]
+
+    rows = make_rows(random.Random(727))
+
+    try:
+        await redis.flushdb()
+
+        # before: sampled, & extrapolated to all rows
+        start = time.perf_counter()
+        await build_before(redis, rows[:SAMPLE_ROWS])
+        before = (time.perf_counter() - start) * STATS_ROWS / SAMPLE_ROWS
+
+        await redis.flushdb()
+
+        # after: all rows
+        start = time.perf_counter()
+        await build_leaderboards(redis, stream(rows))
+        after = time.perf_counter() - start
+
+        num_players = await redis.zcard(
+            f"bancho:leaderboard:{GameMode.VANILLA_OSU.value}",
+        )
+        assert num_players == sum(row["mode"] == GameMode.VANILLA_OSU for row in rows)
+    finally:
+        await redis.flushdb()
+        await redis.aclose()
+
+    print(f"{STATS_ROWS} stats rows")
+    print(f"  {'before':<8} {before:>10.2f} sec (extrapolated from {SAMPLE_ROWS})")
+    print(f"  {'after':<8} {after:>10.2f} sec")
+    return 0
+
+
+def main() -> int:
+    return asyncio.run(run())
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3.11
+"""\
+Benchmark for building the presence & stats portion of a login
+response with 5k players online.
+
+"before" encodes every player's USER_PRESENCE & USER_STATS packets
+from scratch (the previous behaviour), while "after" concatenates
+each player's cached packets.
+
+Usage: python tools/benchmarks/login_fanout.py
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.chdir(ROOT_DIR)
+
+try:
+    import app.packets
+    from app.constants.gamemodes import GameMode
+    from app.constants.privileges import Privileges
+    from app.objects.player import ModeData
+    from app.objects.player import Player
+    from app.objects.score import Grade
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run with bancho.py's dependencies installed\x1b[m")
+    raise
+
+ONLINE_PLAYERS = 5_000
+ROUNDS = 20
+
+
+def make_players(count: int) -> list[Player]:
+    players = []
+    for user_id in range(3, count + 3):
+        player = Player(
+            id=user_id,
+            name=f"Player {user_id}",
+            priv=Privileges.UNRESTRICTED,
+            pw_bcrypt=None,
+            token=Player.generate_token(),
+        )
+        player.status.info_text = "Playing some map [Insane]"
+        player.status.map_md5 = "1cf5b2c2edfafd055536d2cefcb89c0e"
+        player.stats[GameMode.VANILLA_OSU] = ModeData(
+            tscore=123_456_789,
+            rscore=12_345_678,
+            pp=user_id % 10_000,
+            acc=98.76,
+            plays=1_234,
+            playtime=123_456,
+            max_combo=1_234,
+            total_hits=123_456,
+            rank=user_id,
+            grades={
+                grade: 0 for grade in (Grade.XH, Grade.X, Grade.SH, Grade.S, Grade.A)
+            },
+        )
+        players.append(player)
+    return players
+
+
+def build_uncached(players: list[Player]) -> bytes:
+    data = bytearray()
+    for o in players:
+        data += app.packets.user_presence(o)
+        data += app.packets.user_stats(o)
+    return bytes(data)
+
+
+def build_cached(players: list[Player]) -> bytes:
+    data = bytearray()
+    for o in players:
+        data += o.presence_packet
+        data += o.stats_packet
+    return bytes(data)
+
+
+def main() -> int:
+    players = make_players(ONLINE_PLAYERS)
+
+    # warm the packet caches (as would happen over normal operation)
+    assert build_cached(players) == build_uncached(players)
+
+    for label, func in (
+        ("before (uncached)", build_uncached),
+        ("after (cached)", build_cached),
+    ):
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            func(players)
+        elapsed = (time.perf_counter() - start) / ROUNDS
+        print(
+            f"{label:<20} {elapsed * 1000:>10.3f} msec/login ({ONLINE_PLAYERS} online)"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
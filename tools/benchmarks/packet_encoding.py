@@ -0,0 +1,205 @@
+#!/usr/bin/env python3.11
+"""\
+Throughput benchmark for server packet encoding.
+
+Compares the precompiled `PacketEncoder`s against the generic
+`app.packets.write` dispatcher (the previous implementation) for
+the USER_STATS, SEND_MESSAGE & UPDATE_MATCH packets.
+
+Usage: python tools/benchmarks/packet_encoding.py
+"""
+from __future__ import annotations
+
+import os
+import struct
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.chdir(ROOT_DIR)
+
+try:
+    import app.packets
+    import app.state
+    from app.constants.gamemodes import GameMode
+    from app.constants.mods import Mods
+    from app.constants.privileges import Privileges
+    from app.objects.channel import Channel
+    from app.objects.match import Match
+    from app.objects.match import MatchTeamTypes
+    from app.objects.match import MatchWinConditions
+    from app.objects.match import SlotStatus
+    from app.objects.player import ModeData
+    from app.objects.player import Player
+    from app.objects.score import Grade
+    from app.packets import ServerPackets
+    from app.packets import osuTypes
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run with bancho.py's dependencies installed\x1b[m")
+    raise
+
+ITERATIONS = 200_000
+
+
+def make_player(user_id: int) -> Player:
+    player = Player(
+        id=user_id,
+        name=f"Player {user_id}",
+        priv=Privileges.UNRESTRICTED,
+        pw_bcrypt=None,
+        token=Player.generate_token(),
+    )
+    player.status.info_text = "Feryquitous - Arcaea [Future]"
+    player.status.map_md5 = "60b725f10c9c85c70d97880dfe8191b3"
+    player.stats[GameMode.VANILLA_OSU] = ModeData(
+        tscore=123_456_789,
+        rscore=12_345_678,
+        pp=4_321,
+        acc=98.76,
+        plays=1_234,
+        playtime=123_456,
+        max_combo=1_234,
+        total_hits=123_456,
+        rank=user_id,
+        grades={grade: 0 for grade in (Grade.XH, Grade.X, Grade.SH, Grade.S, Grade.A)},
+    )
+    return player
+
+
+def make_match(players: list[Player]) -> Match:
+    match = Match(
+        id=1,
+        name="benchmark match",
+        password="",
+        has_public_history=False,
+        map_name="Feryquitous - Arcaea [Future]",
+        map_id=1723723,
+        map_md5="60b725f10c9c85c70d97880dfe8191b3",
+        host_id=players[0].id,
+        mode=GameMode.VANILLA_OSU,
+        mods=Mods.NOMOD,
+        win_condition=MatchWinConditions.score,
+        team_type=MatchTeamTypes.head_to_head,
+        freemods=False,
+        seed=1337,
+        chat_channel=Channel(name="#multi_1", topic="", auto_join=False),
+    )
+    for slot, player in zip(match.slots, players):
+        slot.player = player
+        slot.status = SlotStatus.not_ready
+    return match
+
+
+def legacy_user_stats(player: Player) -> bytes:
+    gm_stats = player.gm_stats
+    return app.packets.write(
+        ServerPackets.USER_STATS,
+        (player.id, osuTypes.i32),
+        (player.status.action, osuTypes.u8),
+        (player.status.info_text, osuTypes.string),
+        (player.status.map_md5, osuTypes.string),
+        (player.status.mods, osuTypes.i32),
+        (player.status.mode.as_vanilla, osuTypes.u8),
+        (player.status.map_id, osuTypes.i32),
+        (gm_stats.rscore, osuTypes.i64),
+        (gm_stats.acc / 100.0, osuTypes.f32),
+        (gm_stats.plays, osuTypes.i32),
+        (gm_stats.tscore, osuTypes.i64),
+        (gm_stats.rank, osuTypes.i32),
+        (gm_stats.pp, osuTypes.u16),
+    )
+
+
+def legacy_send_message(sender: str, msg: str, recipient: str, sender_id: int) -> bytes:
+    return app.packets.write(
+        ServerPackets.SEND_MESSAGE,
+        ((sender, msg, recipient, sender_id), osuTypes.message),
+    )
+
+
+def legacy_write_match(m: Match) -> bytearray:
+    ret = bytearray(struct.pack("<HbbI", m.id, m.in_progress, 0, m.mods))
+    ret += app.packets.write_string(m.name)
+    ret += app.packets.write_string(m.passwd) if m.passwd else b"\x00"
+    ret += app.packets.write_string(m.map_name)
+    ret += m.map_id.to_bytes(4, "little", signed=True)
+    ret += app.packets.write_string(m.map_md5)
+
+    ret.extend([s.status for s in m.slots])
+    ret.extend([s.team for s in m.slots])
+
+    for s in m.slots:
+        if s.status & 0b01111100 != 0:
+            assert s.player is not None
+            ret += s.player.id.to_bytes(4, "little")
+
+    ret += m.host.id.to_bytes(4, "little")
+    ret.extend((m.mode, m.win_condition, m.team_type, m.freemods))
+
+    if m.freemods:
+        for s in m.slots:
+            ret += s.mods.to_bytes(4, "little")
+
+    ret += m.seed.to_bytes(4, "little")
+    return ret
+
+
+def legacy_update_match(match: Match) -> bytes:
+    return app.packets.write(
+        ServerPackets.UPDATE_MATCH,
+        (legacy_write_match(match), osuTypes.raw),
+    )
+
+
+def bench(label: str, func: Callable[[], bytes]) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    elapsed = time.perf_counter() - start
+    packets_per_sec = ITERATIONS / elapsed
+    print(f"  {label:<10} {packets_per_sec:>14,.0f} packets/sec")
+    return packets_per_sec
+
+
+def main() -> int:
+    players = [make_player(user_id) for user_id in range(1001, 1009)]
+    for player in players:
+        app.state.sessions.players.append(player)
+
+    match = make_match(players)
+    message = ("cmyui", "woah woah crazy!!", "#osu", 1001)
+
+    cases: list[tuple[str, Callable[[], bytes], Callable[[], bytes]]] = [
+        (
+            "user_stats",
+            lambda: legacy_user_stats(players[0]),
+            lambda: app.packets.user_stats(players[0]),
+        ),
+        (
+            "send_message",
+            lambda: legacy_send_message(*message),
+            lambda: app.packets.send_message(*message),
+        ),
+        (
+            "update_match",
+            lambda: legacy_update_match(match),
+            lambda: app.packets.update_match(match),
+        ),
+    ]
+
+    for name, legacy, compiled in cases:
+        assert legacy() == compiled()
+
+        print(f"{name}:")
+        before = bench("write()", legacy)
+        after = bench("encoder", compiled)
+        print(f"  {'speedup':<10} {after / before:>14.2f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3.11
+"""\
+Throughput benchmark for parsing client packets.
+
+Parses recorded-style SPECTATE_FRAMES (a 20 frame bundle, as sent
+by a spectated osu! client) & MATCH_CHANGE_SETTINGS (a full lobby
+with freemods) bodies with the offset-based `BanchoPacketReader`,
+and with a copy of the previous reader which re-sliced its
+memoryview on every read.
+
+Usage: python tools/benchmarks/packet_reading.py
+"""
+from __future__ import annotations
+
+import os
+import struct
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import cast
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.chdir(ROOT_DIR)
+
+try:
+    import app.packets
+    from app.objects.player import Player
+    from app.packets import SCOREFRAME_FMT
+    from app.packets import BanchoPacketReader
+    from app.packets import BasePacket
+    from app.packets import ClientPackets
+    from app.packets import MultiplayerMatch
+    from app.packets import PacketMap
+    from app.packets import ReplayAction
+    from app.packets import ReplayFrame
+    from app.packets import ReplayFrameBundle
+    from app.packets import ScoreFrame
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run with bancho.py's dependencies installed\x1b[m")
+    raise
+
+ITERATIONS = 50_000
+FRAMES_PER_BUNDLE = 20
+
+
+class LegacyPacketReader:
+    """The previous reader, which re-sliced `body_view` on every read."""
+
+    def __init__(self, body_view: memoryview) -> None:
+        self.body_view = body_view
+        self.current_len = 0
+
+    def read_header(self) -> None:
+        _, self.current_len = struct.unpack("<HxI", self.body_view[:7])
+        self.body_view = self.body_view[7:]
+
+    def read_i8(self) -> int:
+        val = self.body_view[0]
+        self.body_view = self.body_view[1:]
+        return val - 256 if val > 127 else val
+
+    def read_u8(self) -> int:
+        val = self.body_view[0]
+        self.body_view = self.body_view[1:]
+        return val
+
+    def read_i16(self) -> int:
+        val = int.from_bytes(self.body_view[:2], "little", signed=True)
+        self.body_view = self.body_view[2:]
+        return val
+
+    def read_u16(self) -> int:
+        val = int.from_bytes(self.body_view[:2], "little", signed=False)
+        self.body_view = self.body_view[2:]
+        return val
+
+    def read_i32(self) -> int:
+        val = int.from_bytes(self.body_view[:4], "little", signed=True)
+        self.body_view = self.body_view[4:]
+        return val
+
+    def read_f32(self) -> float:
+        (val,) = struct.unpack_from("<f", self.body_view[:4])
+        self.body_view = self.body_view[4:]
+        return cast(float, val)
+
+    def read_string(self) -> str:
+        exists = self.body_view[0] == 0x0B
+        self.body_view = self.body_view[1:]
+
+        if not exists:
+            return ""
+
+        length = shift = 0
+
+        while True:
+            byte = self.body_view[0]
+            self.body_view = self.body_view[1:]
+
+            length |= (byte & 0x7F) << shift
+            if (byte & 0x80) == 0:
+                break
+
+            shift += 7
+
+        val = self.body_view[:length].tobytes().decode()
+        self.body_view = self.body_view[length:]
+        return val
+
+    def read_match(self) -> MultiplayerMatch:
+        match = MultiplayerMatch(
+            id=self.read_i16(),
+            in_progress=self.read_i8() == 1,
+            powerplay=self.read_i8(),
+            mods=self.read_i32(),
+            name=self.read_string(),
+            passwd=self.read_string(),
+            map_name=self.read_string(),
+            map_id=self.read_i32(),
+            map_md5=self.read_string(),
+            slot_statuses=[self.read_i8() for _ in range(16)],
+            slot_teams=[self.read_i8() for _ in range(16)],
+        )
+
+        for status in match.slot_statuses:
+            if status & 124 != 0:
+                match.slot_ids.append(self.read_i32())
+
+        match.host_id = self.read_i32()
+        match.mode = self.read_i8()
+        match.win_condition = self.read_i8()
+        match.team_type = self.read_i8()
+        match.freemods = self.read_i8() == 1
+
+        if match.freemods:
+            match.slot_mods = [self.read_i32() for _ in range(16)]
+
+        match.seed = self.read_i32()
+
+        return match
+
+    def read_scoreframe(self) -> ScoreFrame:
+        sf = ScoreFrame(*SCOREFRAME_FMT.unpack_from(self.body_view[:29]))
+        self.body_view = self.body_view[29:]
+        return sf
+
+    def read_replayframe(self) -> ReplayFrame:
+        return ReplayFrame(
+            button_state=self.read_u8(),
+            taiko_byte=self.read_u8(),
+            x=self.read_f32(),
+            y=self.read_f32(),
+            time=self.read_i32(),
+        )
+
+    def read_replayframe_bundle(self) -> ReplayFrameBundle:
+        raw_data = self.body_view[: self.current_len]
+
+        extra = self.read_i32()
+        framecount = self.read_u16()
+        frames = [self.read_replayframe() for _ in range(framecount)]
+        action = ReplayAction(self.read_u8())
+        scoreframe = self.read_scoreframe()
+        sequence = self.read_u16()
+
+        return ReplayFrameBundle(frames, scoreframe, action, extra, sequence, raw_data)
+
+
+class SpectateFrames(BasePacket):
+    def __init__(self, reader: BanchoPacketReader) -> None:
+        self.frame_bundle = reader.read_replayframe_bundle()
+
+    async def handle(self, player: Player) -> None: ...
+
+
+class MatchChangeSettings(BasePacket):
+    def __init__(self, reader: BanchoPacketReader) -> None:
+        self.match_data = reader.read_match()
+
+    async def handle(self, player: Player) -> None: ...
+
+
+PACKET_MAP: PacketMap = {
+    ClientPackets.SPECTATE_FRAMES: SpectateFrames,
+    ClientPackets.MATCH_CHANGE_SETTINGS: MatchChangeSettings,
+}
+
+
+def make_packet(packid: ClientPackets, body: bytes) -> bytes:
+    return struct.pack("<HxI", packid, len(body)) + body
+
+
+def make_spectate_frames() -> bytes:
+    frames = b"".join(
+        app.packets.REPLAYFRAME_FMT.pack(i % 4, 0, 256.0 + i, 192.0 - i, i * 16)
+        for i in range(FRAMES_PER_BUNDLE)
+    )
+    score_frame = SCOREFRAME_FMT.pack(
+        *(1234, 0, 300, 10, 1, 50, 5, 2, 1_000_000, 400, 123, False, 200, 0, False),
+    )
+    body = (
+        struct.pack("<iH", 0, FRAMES_PER_BUNDLE)
+        + frames
+        + struct.pack("<B", ReplayAction.Standard)
+        + score_frame
+        + struct.pack("<H", 42)
+    )
+    return make_packet(ClientPackets.SPECTATE_FRAMES, body)
+
+
+def make_match_change_settings() -> bytes:
+    body = b"".join(
+        (
+            struct.pack("<hbbi", 1, 0, 0, 0),
+            app.packets.write_string("benchmark match"),
+            app.packets.write_string("password"),
+            app.packets.write_string("Feryquitous - Arcaea [Future]"),
+            struct.pack("<i", 1723723),
+            app.packets.write_string("60b725f10c9c85c70d97880dfe8191b3"),
+            struct.pack("<16b", *[4] * 16),  # not_ready
+            struct.pack("<16b", *[0] * 16),  # neutral
+            struct.pack("<16i", *range(1001, 1017)),
+            struct.pack("<ibbbb", 1001, 0, 0, 0, 1),
+            struct.pack("<16i", *[0] * 16),
+            struct.pack("<i", 1337),
+        ),
+    )
+    return make_packet(ClientPackets.MATCH_CHANGE_SETTINGS, body)
+
+
+def read_legacy(data: bytes) -> object:
+    with memoryview(data) as body_view:
+        reader = LegacyPacketReader(body_view)
+        reader.read_header()
+        if data[0] == ClientPackets.SPECTATE_FRAMES:
+            return reader.read_replayframe_bundle()
+        else:
+            return reader.read_match()
+
+
+def read_offset(data: bytes) -> object:
+    with memoryview(data) as body_view:
+        (packet,) = BanchoPacketReader(body_view, PACKET_MAP)
+        if isinstance(packet, SpectateFrames):
+            return packet.frame_bundle
+        else:
+            assert isinstance(packet, MatchChangeSettings)
+            return packet.match_data
+
+
+def bench(label: str, func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    elapsed = time.perf_counter() - start
+    packets_per_sec = ITERATIONS / elapsed
+    print(f"  {label:<10} {packets_per_sec:>14,.0f} packets/sec")
+    return packets_per_sec
+
+
+def main() -> int:
+    for name, data in (
+        ("SPECTATE_FRAMES", make_spectate_frames()),
+        ("MATCH_CHANGE_SETTINGS", make_match_change_settings()),
+    ):
+        # compare everything but the raw data memoryview
+        legacy_result, offset_result = read_legacy(data), read_offset(data)
+        if isinstance(offset_result, ReplayFrameBundle):
+            assert isinstance(legacy_result, ReplayFrameBundle)
+            assert legacy_result[:5] == offset_result[:5]
+        else:
+            assert legacy_result == offset_result
+
+        print(f"{name} ({len(data)} bytes):")
+        before = bench("legacy", lambda: read_legacy(data))
+        after = bench("offset", lambda: read_offset(data))
+        print(f"  {'speedup':<10} {after / before:>14.2f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3.11
+"""\
+Microbenchmark for `Players.get` lookups.
+
+Compares the indexed lookups against a linear scan over the
+list of online players (the previous implementation), with
+10k and 100k simulated sessions.
+
+Usage: python tools/benchmarks/players_lookup.py
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import random
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.chdir(ROOT_DIR)
+
+try:
+    from app.constants.privileges import Privileges
+    from app.objects.collections import Players
+    from app.objects.player import Player
+    from app.utils import make_safe_name
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run with bancho.py's dependencies installed\x1b[m")
+    raise
+
+SESSION_COUNTS = (10_000, 100_000)
+LOOKUPS = 10_000
+
+
+def make_players(count: int) -> Players:
+    players = Players()
+    for user_id in range(3, count + 3):
+        players.append(
+            Player(
+                id=user_id,
+                name=f"Player {user_id}",
+                priv=Privileges.UNRESTRICTED,
+                pw_bcrypt=None,
+                token=Player.generate_token(),
+            ),
+        )
+    return players
+
+
+def linear_get(
+    players: Players,
+    token: str | None = None,
+    id: int | None = None,
+    name: str | None = None,
+) -> Player | None:
+    for player in players:
+        if token is not None:
+            if player.token == token:
+                return player
+        elif id is not None:
+            if player.id == id:
+                return player
+        elif name is not None:
+            if player.safe_name == make_safe_name(name):
+                return player
+
+    return None
+
+
+def bench(label: str, lookups: int, func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    for _ in range(lookups):
+        func()
+    elapsed = time.perf_counter() - start
+    per_lookup_us = elapsed / lookups * 1_000_000
+    print(f"  {label:<24} {per_lookup_us:>12.3f} usec/lookup")
+    return per_lookup_us
+
+
+def main() -> int:
+    for count in SESSION_COUNTS:
+        players = make_players(count)
+        targets = random.choices(players, k=LOOKUPS)
+        it = itertools.cycle(targets)
+
+        print(f"{count} sessions:")
+        bench(
+            "indexed get(token=...)",
+            LOOKUPS,
+            lambda: players.get(token=next(it).token),
+        )
+        bench("indexed get(id=...)", LOOKUPS, lambda: players.get(id=next(it).id))
+        bench(
+            "indexed get(name=...)",
+            LOOKUPS // 10,
+            lambda: players.get(name=next(it).name),
+        )
+
+        # the linear scan is far slower; sample fewer lookups
+        linear_lookups = max(1, LOOKUPS * 1000 // count // 10)
+        bench(
+            "linear get(token=...)",
+            linear_lookups,
+            lambda: linear_get(players, token=next(it).token),
+        )
+        bench(
+            "linear get(id=...)",
+            linear_lookups,
+            lambda: linear_get(players, id=next(it).id),
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3.11
+"""\
+Benchmark for calculating all users' total (weighted) pp & accuracy,
+as a full stats recalculation does; with 100k users of 1000 scores.
+
+"before" mirrors the original calculation: a python generator over
+each user's rows (timed on a sample of users, and extrapolated).
+"after" runs `calculate_totals_batch` over the users' scores as one
+ragged array, in batches of BATCH_USERS users to bound memory use.
+
+Usage: python tools/benchmarks/stats_aggregation.py
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.chdir(ROOT_DIR)
+
+try:
+    import numpy as np
+
+    from app.usecases.stats import calculate_totals_batch
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run with bancho.py's dependencies installed\x1b[m")
+    raise
+
+USERS = 100_000
+SCORES_PER_USER = 1000
+BATCH_USERS = 10_000
+SAMPLE_USERS = 500  # for the (slow) original calculation
+
+
+def calculate_before(best_scores: list[dict[str, float]]) -> tuple[float, int]:
+    weighted_acc = sum(row["acc"] * 0.95**i for i, row in enumerate(best_scores))
+    bonus_acc = 100.0 / (20 * (1 - 0.95 ** len(best_scores)))
+    acc = (weighted_acc * bonus_acc) / 100
+
+    weighted_pp = sum(row["pp"] * 0.95**i for i, row in enumerate(best_scores))
+    bonus_pp = 416.6667 * (1 - 0.9994 ** len(best_scores))
+    pp = round(weighted_pp + bonus_pp)
+
+    return acc, pp
+
+
+def make_batch(
+    rng: np.random.Generator,
+    num_users: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    pps = -np.sort(-rng.uniform(0, 800, size=(num_users, SCORES_PER_USER)), axis=1)
+    accs = rng.uniform(70, 100, size=(num_users, SCORES_PER_USER))
+    offsets = np.arange(num_users + 1, dtype=np.int64) * SCORES_PER_USER
+    return pps.ravel(), accs.ravel(), offsets
+
+
+def main() -> int:
+    rng = np.random.default_rng(727)
+
+    # before: sampled, & extrapolated to all users
+    pps, accs, offsets = make_batch(rng, SAMPLE_USERS)
+    rows = [
+        [
+            {"pp": pp, "acc": acc}
+            for pp, acc in zip(
+                pps[offsets[i] : offsets[i + 1]].tolist(),
+                accs[offsets[i] : offsets[i + 1]].tolist(),
+            )
+        ]
+        for i in range(SAMPLE_USERS)
+    ]
+
+    start = time.perf_counter()
+    expected = [calculate_before(user_rows) for user_rows in rows]
+    before = (time.perf_counter() - start) * USERS / SAMPLE_USERS
+
+    # both calculations should produce the same totals
+    acc, pp = calculate_totals_batch(pps, accs, offsets)
+    assert np.allclose(acc, [acc for acc, _ in expected])
+    assert (pp == [pp for _, pp in expected]).all()
+
+    # after: all users
+    after = 0.0
+    for _ in range(USERS // BATCH_USERS):
+        pps, accs, offsets = make_batch(rng, BATCH_USERS)
+
+        start = time.perf_counter()
+        calculate_totals_batch(pps, accs, offsets)
+        after += time.perf_counter() - start
+
+    print(f"{USERS} users x {SCORES_PER_USER} scores")
+    print(f"  {'before':<8} {before:>10.2f} sec (extrapolated from {SAMPLE_USERS})")
+    print(f"  {'after':<8} {after:>10.2f} sec")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
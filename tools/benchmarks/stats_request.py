@@ -0,0 +1,136 @@
+#!/usr/bin/env python3.11
+"""\
+Benchmark for handling a USER_STATS_REQUEST of 256 ids with 10k
+players online.
+
+"before" mirrors the original handler: filtering the requested ids
+against a list of online ids, a linear scan per lookup, encoding each
+packet from scratch, and enqueueing them one by one. "after" runs the
+current handler, which looks players up in the id index and enqueues
+one buffer of their cached packets.
+
+Usage: python tools/benchmarks/stats_request.py
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import time
+from collections.abc import Sequence
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+os.chdir(ROOT_DIR)
+
+try:
+    import app.packets
+    import app.state
+    from app.api.domains.cho import StatsRequest
+    from app.constants.gamemodes import GameMode
+    from app.constants.privileges import Privileges
+    from app.objects.collections import Players
+    from app.objects.player import ModeData
+    from app.objects.player import Player
+    from app.objects.score import Grade
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run with bancho.py's dependencies installed\x1b[m")
+    raise
+
+ONLINE_PLAYERS = 10_000
+REQUESTED_IDS = 256
+ROUNDS = 50
+
+
+def make_player(user_id: int) -> Player:
+    player = Player(
+        id=user_id,
+        name=f"Player {user_id}",
+        priv=Privileges.UNRESTRICTED,
+        pw_bcrypt=None,
+        token=Player.generate_token(),
+    )
+    player.stats[GameMode.VANILLA_OSU] = ModeData(
+        tscore=123_456_789,
+        rscore=12_345_678,
+        pp=user_id % 10_000,
+        acc=98.76,
+        plays=1_234,
+        playtime=123_456,
+        max_combo=1_234,
+        total_hits=123_456,
+        rank=user_id,
+        grades={grade: 0 for grade in (Grade.XH, Grade.X, Grade.SH, Grade.S, Grade.A)},
+    )
+    return player
+
+
+def handle_before(
+    players: Players,
+    player: Player,
+    user_ids: Sequence[int],
+) -> None:
+    unrestricted_ids = [p.id for p in players.unrestricted]
+
+    def is_online(o: int) -> bool:
+        return o in unrestricted_ids and o != player.id
+
+    for online in filter(is_online, user_ids):
+        target = next((p for p in players if p.id == online), None)
+        if target:
+            player.enqueue(app.packets.user_stats(target))
+
+
+async def run() -> None:
+    players = Players()
+    for user_id in range(3, ONLINE_PLAYERS + 3):
+        players.append(make_player(user_id))
+
+    app.state.sessions.players = players
+    app.state.sessions.bot = players[0]
+
+    requester = players[-1]
+    # (the bot's stats status is random; leave it out)
+    # (as read from the packet)
+    user_ids = tuple(
+        random.sample(
+            list(players.ids - {app.state.sessions.bot.id}),
+            k=REQUESTED_IDS,
+        ),
+    )
+
+    packet = StatsRequest.__new__(StatsRequest)
+    packet.user_ids = user_ids
+
+    # both handlers should produce the same packets
+    handle_before(players, requester, user_ids)
+    before = requester.dequeue()
+    await packet.handle(requester)
+    assert requester.dequeue() == before
+
+    for label in ("before", "after"):
+        elapsed = 0.0
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            if label == "before":
+                handle_before(players, requester, user_ids)
+            else:
+                await packet.handle(requester)
+            elapsed += time.perf_counter() - start
+            requester.dequeue()
+
+        print(
+            f"{label:<8} {elapsed / ROUNDS * 1000:>10.3f} msec/request "
+            f"({REQUESTED_IDS} ids, {ONLINE_PLAYERS} online)",
+        )
+
+
+def main() -> int:
+    asyncio.run(run())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
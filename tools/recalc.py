@@ -3,151 +3,251 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import itertools
+import json
 import math
+import multiprocessing
 import os
 import sys
+import time
+from array import array
+from collections.abc import AsyncIterator
 from collections.abc import Awaitable
-from collections.abc import Iterator
 from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from dataclasses import field
 from pathlib import Path
 from typing import Any
-from typing import TypeVar
 from datetime import datetime
 import jinja2
 
-import databases
-from akatsuki_pp_py import Beatmap
-from akatsuki_pp_py import Calculator
+import numpy as np
 from redis import asyncio as aioredis
+from sqlalchemy import case
+from sqlalchemy import update
 
-sys.path.insert(0, os.path.abspath(os.pardir))
-os.chdir(os.path.abspath(os.pardir))
+# (absolute, as worker processes re-import this module from the root)
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+os.chdir(ROOT_DIR)
 
 from app.usecases.rx_performance import calculate_rx_performance
 
 try:
     import app.settings
     import app.state.services
+    from app.adapters.database import Database
     from app.constants.gamemodes import GameMode
     from app.constants.mods import Mods
-    from app.constants.privileges import Privileges
     from app.objects.beatmap import ensure_osu_file_is_available
+    from app.repositories.scores import ScoresTable
+    from app.usecases.leaderboards import rebuild_leaderboards
+    from app.usecases.performance import PerformanceResult
+    from app.usecases.performance import ScoreParams
+    from app.usecases.performance import calculate_performances_cached
+    from app.usecases.stats import calculate_totals_batch
 except ModuleNotFoundError:
     print("\x1b[;91mMust run from tools/ directory\x1b[m")
     raise
 
-T = TypeVar("T")
-
 debug_mode_enabled = True
 
 DEBUG = True
 
 BEATMAPS_PATH = Path.cwd() / ".data/osu"
+CHECKPOINT_PATH = Path.cwd() / ".data/recalc_checkpoint.json"
+
+# the amount of scores' pp written per update query
+UPDATE_BATCH_SIZE = 1000
+
+# seconds the score stream may sit unread (the server's net_write_timeout),
+# while its reader is blocked waiting on the workers
+STREAM_WRITE_TIMEOUT = 60 * 60
 
 
 @dataclass
 class Context:
-    database: databases.Database
+    database: Database
     redis: aioredis.Redis
-    beatmaps: dict[int, Beatmap] = field(default_factory=dict)
+    executor: ProcessPoolExecutor
+    workers: int
     pp_changes: list[dict[str, Any]] = field(default_factory=list)  # Для хранения изменений PP
 
 
-def divide_chunks(values: list[T], n: int) -> Iterator[list[T]]:
-    for i in range(0, len(values), n):
-        yield values[i : i + n]
+@dataclass
+class MapScores:
+    map_id: int
+    map_md5: str
+    map_max_combo: int
+    scores: list[dict[str, Any]] = field(default_factory=list)
+
+
+def _score_params(score: dict[str, Any]) -> ScoreParams:
+    return ScoreParams(
+        mode=GameMode(score["mode"]).as_vanilla,
+        mods=score["mods"],
+        combo=score["max_combo"],
+        ngeki=score["ngeki"],  # Mania 320s
+        n300=score["n300"],
+        nkatu=score["nkatu"],  # Mania 200s, Catch tiny droplets
+        n100=score["n100"],
+        n50=score["n50"],
+        nmiss=score["nmiss"],
+    )
+
 
-async def recalculate_score(
+def _new_pp(
     score: dict[str, Any],
-    beatmap_path: Path,
-    ctx: Context,
-) -> None:
-    try:
-        beatmap = ctx.beatmaps.get(score["map_id"])
-        if beatmap is None:
-            beatmap = Beatmap(path=str(beatmap_path))
-            ctx.beatmaps[score["map_id"]] = beatmap
-
-        calculator = Calculator(
-            mode=GameMode(score["mode"]).as_vanilla,
-            mods=score["mods"],
-            combo=score["max_combo"],
-            n_geki=score["ngeki"],  # Mania 320s
-            n300=score["n300"],
-            n_katu=score["nkatu"],  # Mania 200s, Catch tiny droplets
-            n100=score["n100"],
-            n50=score["n50"],
-            n_misses=score["nmiss"],
+    result: PerformanceResult,
+    map_max_combo: int,
+) -> float:
+    new_pp = result["performance"]["pp"]
+
+    # Используем наш RX калькулятор для режима relax
+    if score["mode"] == 4:  # rx!std
+        new_pp = calculate_rx_performance(
+            base_pp=new_pp,
+            max_combo=score["max_combo"],
+            map_max_combo=map_max_combo,
+            stars=result["difficulty"]["stars"],
+            aim_stars=result["difficulty"]["aim"],
+            speed_stars=result["difficulty"]["speed"],
+            nmiss=score["nmiss"],
         )
-        # Получаем max_combo карты из базы данных
-        map_info = await ctx.database.fetch_one(
-            "SELECT max_combo FROM maps WHERE id = :map_id",
-            {"map_id": score["map_id"]},
+
+    if math.isnan(new_pp) or math.isinf(new_pp):
+        new_pp = 0.0
+
+    return new_pp
+
+
+def recalculate_map_scores(
+    map_id: int,
+    map_md5: str,
+    map_max_combo: int,
+    osu_file_path: str,
+    scores: list[dict[str, Any]],
+) -> list[float | None]:
+    """\
+    Calculate new pp for a beatmap's scores; run in a worker process.
+
+    Scores which fail to calculate are logged & skipped (None).
+    """
+    results: list[PerformanceResult | None]
+    try:
+        results = list(
+            calculate_performances_cached(
+                map_id,
+                map_md5,
+                osu_file_path,
+                [_score_params(score) for score in scores],
+            ),
         )
-        map_max_combo = map_info["max_combo"] if map_info else score["max_combo"]
-        
-        attrs = calculator.performance(beatmap)
-        
-        new_pp: float
-        # Используем наш RX калькулятор для режима relax
-        if score["mode"] == 4:  # rx!std
-            new_pp = calculate_rx_performance(
-                base_pp=attrs.pp,
-                max_combo=score["max_combo"],
-                map_max_combo=map_max_combo,
-                stars=attrs.difficulty.stars,
-                aim_stars=attrs.difficulty.aim,
-                speed_stars=attrs.difficulty.speed,
-                nmiss=score["nmiss"],
-            )
-        else:
-            new_pp = attrs.pp
-            
-        if math.isnan(new_pp) or math.isinf(new_pp):
-            new_pp = 0.0
+    except Exception:
+        # calculate them one at a time, to skip only those which fail
+        results = []
+        for score in scores:
+            try:
+                [result] = calculate_performances_cached(
+                    map_id,
+                    map_md5,
+                    osu_file_path,
+                    [_score_params(score)],
+                )
+            except Exception as e:
+                print(f"Failed to recalculate score ID {score['id']}: {e}")
+                result = None
+
+            results.append(result)
+
+    new_pps: list[float | None] = []
+    for score, result in zip(scores, results):
+        new_pp = None
+        if result is not None:
+            try:
+                new_pp = _new_pp(score, result, map_max_combo)
+            except Exception as e:
+                print(f"Failed to recalculate score ID {score['id']}: {e}")
+
+        new_pps.append(new_pp)
+
+    return new_pps
+
+
+async def fetch_map_scores(
+    mode: GameMode,
+    after_map_id: int,
+    ctx: Context,
+) -> AsyncIterator[MapScores]:
+    """Stream a mode's best scores, grouped by beatmap (in order of map id)."""
+    rows = ctx.database.fetch_stream(
+        """\
+        SELECT scores.id, scores.mode, scores.mods, scores.pp, scores.max_combo,
+          scores.ngeki, scores.n300, scores.nkatu, scores.n100, scores.n50, scores.nmiss,
+          maps.id AS `map_id`, maps.md5 AS `map_md5`, maps.max_combo AS `map_max_combo`
+        FROM scores
+        INNER JOIN maps ON scores.map_md5 = maps.md5
+        WHERE scores.status = 2
+          AND scores.mode = :mode
+          AND maps.id > :after_map_id
+        ORDER BY maps.id
+        """,
+        {"mode": mode, "after_map_id": after_map_id},
+        write_timeout=STREAM_WRITE_TIMEOUT,
+    )
+
+    group: MapScores | None = None
+    async for row in rows:
+        if group is None or row["map_id"] != group.map_id:
+            if group is not None:
+                yield group
+
+            group = MapScores(row["map_id"], row["map_md5"], row["map_max_combo"])
 
+        group.scores.append(row)
+
+    if group is not None:
+        yield group
+
+
+async def update_score_pps(new_pps: dict[int, float], ctx: Context) -> None:
+    for i in range(0, len(new_pps), UPDATE_BATCH_SIZE):
+        batch = dict(itertools.islice(new_pps.items(), i, i + UPDATE_BATCH_SIZE))
         await ctx.database.execute(
-            "UPDATE scores SET pp = :new_pp WHERE id = :id",
-            {"new_pp": new_pp, "id": score["id"]},
+            update(ScoresTable)
+            .where(ScoresTable.id.in_(batch))
+            .values(pp=case(batch, value=ScoresTable.id, else_=ScoresTable.pp)),
         )
 
-        if debug_mode_enabled:
-            print(
-                f"Recalculated score ID {score['id']} ({score['pp']:.3f}pp -> {new_pp:.3f}pp)",
-            )
-            
-    except Exception as e:
-        # Log the error and continue processing other scores
-        print(f"Failed to recalculate score ID {score['id']}: {e}")
 
+def load_checkpoints() -> dict[str, int]:
+    if not CHECKPOINT_PATH.exists():
+        return {}
 
-async def process_score_chunk(
-    chunk: list[dict[str, Any]],
-    ctx: Context,
-) -> None:
-    tasks: list[Awaitable[None]] = []
-    for score in chunk:
-        osu_file_available = await ensure_osu_file_is_available(
-            score["map_id"],
-            expected_md5=score["map_md5"],
-        )
-        if osu_file_available:
-            tasks.append(
-                recalculate_score(
-                    score,
-                    BEATMAPS_PATH / f"{score['map_id']}.osu",
-                    ctx,
-                ),
-            )
+    checkpoints = json.loads(CHECKPOINT_PATH.read_text())
+    if not isinstance(checkpoints, dict):
+        raise ValueError(f"Malformed checkpoint file: {CHECKPOINT_PATH}")
 
-    await asyncio.gather(*tasks)
+    # {mode: last recalculated map id, ...}
+    return {str(mode): int(map_id) for mode, map_id in checkpoints.items()}
+
+
+def save_checkpoint(mode: GameMode, map_id: int) -> None:
+    checkpoints = load_checkpoints()
+    checkpoints[str(mode.value)] = map_id
+
+    # write & rename, so an interrupted run can't leave a partial file
+    tmp_path = CHECKPOINT_PATH.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(checkpoints))
+    tmp_path.replace(CHECKPOINT_PATH)
 
 
 async def recalculate_user(
     id: int,
     game_mode: GameMode,
+    acc: float,
+    pp: int,
     ctx: Context,
 ) -> None:
     # Получаем старое значение PP
@@ -157,29 +257,6 @@ async def recalculate_user(
     )
     old_pp = old_stats["pp"] if old_stats else 0
 
-    best_scores = await ctx.database.fetch_all(
-        "SELECT s.pp, s.acc FROM scores s "
-        "INNER JOIN maps m ON s.map_md5 = m.md5 "
-        "WHERE s.userid = :user_id AND s.mode = :mode "
-        "AND s.status = 2 AND m.status IN (2, 3) "  # ranked, approved
-        "ORDER BY s.pp DESC",
-        {"user_id": id, "mode": game_mode},
-    )
-
-    total_scores = len(best_scores)
-    if not total_scores:
-        return
-
-    # calculate new total weighted accuracy
-    weighted_acc = sum(row["acc"] * 0.95**i for i, row in enumerate(best_scores))
-    bonus_acc = 100.0 / (20 * (1 - 0.95**total_scores))
-    acc = (weighted_acc * bonus_acc) / 100
-
-    # calculate new total weighted pp
-    weighted_pp = sum(row["pp"] * 0.95**i for i, row in enumerate(best_scores))
-    bonus_pp = 416.6667 * (1 - 0.9994**total_scores)
-    pp = round(weighted_pp + bonus_pp)
-
     # Получаем имя пользователя
     user_info = await ctx.database.fetch_one(
         "SELECT name FROM users WHERE id = :id",
@@ -204,69 +281,147 @@ async def recalculate_user(
         {"pp": pp, "acc": acc, "id": id, "mode": game_mode},
     )
 
-    user_info = await ctx.database.fetch_one(
-        "SELECT country, priv FROM users WHERE id = :id",
-        {"id": id},
-    )
-    if user_info is None:
-        raise Exception(f"Unknown user ID {id}?")
-
-    if user_info["priv"] & Privileges.UNRESTRICTED:
-        await ctx.redis.zadd(
-            f"bancho:leaderboard:{game_mode.value}",
-            {str(id): pp},
-        )
-
-        await ctx.redis.zadd(
-            f"bancho:leaderboard:{game_mode.value}:{user_info['country']}",
-            {str(id): pp},
-        )
-        
     if debug_mode_enabled:
         print(f"Recalculated user ID {id} ({pp:.3f}pp, {acc:.3f}%)")
 
 async def process_user_chunk(
-    chunk: list[int],
+    chunk: list[tuple[int, float, int]],
     game_mode: GameMode,
     ctx: Context,
 ) -> None:
     tasks: list[Awaitable[None]] = []
-    for id in chunk:
-        tasks.append(recalculate_user(id, game_mode, ctx))
+    for id, acc, pp in chunk:
+        tasks.append(recalculate_user(id, game_mode, acc, pp, ctx))
 
     await asyncio.gather(*tasks)
 
 
 async def recalculate_mode_users(mode: GameMode, ctx: Context) -> None:
-    user_ids = [
-        row["id"] for row in await ctx.database.fetch_all("SELECT id FROM users")
-    ]
-
-    for id_chunk in divide_chunks(user_ids, 100):
-        await process_user_chunk(id_chunk, mode, ctx)
-
-
-async def recalculate_mode_scores(mode: GameMode, ctx: Context) -> None:
-    scores = [
-        dict(row)
-        for row in await ctx.database.fetch_all(
-            """\
-            SELECT scores.id, scores.mode, scores.mods, scores.map_md5,
-              scores.pp, scores.acc, scores.max_combo,
-              scores.ngeki, scores.n300, scores.nkatu, scores.n100, scores.n50, scores.nmiss,
-              maps.id as `map_id`
-            FROM scores
-            INNER JOIN maps ON scores.map_md5 = maps.md5
-            WHERE scores.status = 2
-              AND scores.mode = :mode
-            ORDER BY scores.pp DESC
-            """,
-            {"mode": mode},
+    # load all users' best scores (sorted by pp) into one ragged
+    # array, and calculate their total acc & pp all at once
+    user_ids = array("q")
+    offsets = array("q")
+    pps = array("d")
+    accs = array("d")
+
+    rows = ctx.database.fetch_stream(
+        "SELECT s.userid, s.pp, s.acc FROM scores s "
+        "INNER JOIN maps m ON s.map_md5 = m.md5 "
+        "WHERE s.mode = :mode "
+        "AND s.status = 2 AND m.status IN (2, 3) "  # ranked, approved
+        "ORDER BY s.userid, s.pp DESC",
+        {"mode": mode},
+    )
+    async for row in rows:
+        if not user_ids or row["userid"] != user_ids[-1]:
+            user_ids.append(row["userid"])
+            offsets.append(len(pps))
+
+        pps.append(row["pp"])
+        accs.append(row["acc"])
+
+    offsets.append(len(pps))
+
+    total_accs, total_pps = calculate_totals_batch(
+        np.frombuffer(pps, dtype=np.float64),
+        np.frombuffer(accs, dtype=np.float64),
+        np.frombuffer(offsets, dtype=np.int64),
+    )
+
+    users = list(zip(user_ids, total_accs.tolist(), total_pps.tolist()))
+    for i in range(0, len(users), 100):
+        await process_user_chunk(users[i : i + 100], mode, ctx)
+
+    # replace the mode's leaderboards with the recalculated stats
+    await rebuild_leaderboards(ctx.database, ctx.redis, [mode])
+
+
+async def recalculate_mode_scores(
+    mode: GameMode,
+    ctx: Context,
+    after_map_id: int = 0,
+) -> None:
+    loop = asyncio.get_running_loop()
+    max_pending = ctx.workers * 2
+
+    # {calculation: map group}, for the maps being calculated
+    pending: dict[asyncio.Future[list[float | None]], MapScores] = {}
+    new_pps: dict[int, float] = {}  # {score id: pp}, yet to be written
+    last_map_id = after_map_id
+    num_recalculated = 0
+
+    async def collect(return_when: str) -> None:
+        nonlocal num_recalculated
+
+        done, _ = await asyncio.wait(pending, return_when=return_when)
+        for future in done:
+            group = pending.pop(future)
+            try:
+                group_pps = future.result()
+            except Exception as e:
+                # Log the error and continue processing other maps
+                print(f"Failed to recalculate scores on map ID {group.map_id}: {e}")
+                continue
+
+            for score, new_pp in zip(group.scores, group_pps):
+                if new_pp is None:
+                    continue  # failed; logged by the worker
+
+                new_pps[score["id"]] = new_pp
+                num_recalculated += 1
+
+                if debug_mode_enabled:
+                    print(
+                        f"Recalculated score ID {score['id']} ({score['pp']:.3f}pp -> {new_pp:.3f}pp)",
+                    )
+
+    async def flush() -> None:
+        await update_score_pps(new_pps, ctx)
+        new_pps.clear()
+
+        # all maps before the earliest still being calculated are done
+        if pending:
+            save_checkpoint(mode, min(g.map_id for g in pending.values()) - 1)
+        else:
+            save_checkpoint(mode, last_map_id)
+
+    start_time = time.perf_counter()
+
+    async for group in fetch_map_scores(mode, after_map_id, ctx):
+        osu_file_available = await ensure_osu_file_is_available(
+            group.map_id,
+            expected_md5=group.map_md5,
         )
-    ]
+        if osu_file_available:
+            if len(pending) >= max_pending:
+                await collect(asyncio.FIRST_COMPLETED)
+
+                if len(new_pps) >= UPDATE_BATCH_SIZE:
+                    await flush()
+
+            future = loop.run_in_executor(
+                ctx.executor,
+                recalculate_map_scores,
+                group.map_id,
+                group.map_md5,
+                group.map_max_combo,
+                str(BEATMAPS_PATH / f"{group.map_id}.osu"),
+                group.scores,
+            )
+            pending[future] = group
+
+        last_map_id = group.map_id
+
+    if pending:
+        await collect(asyncio.ALL_COMPLETED)
+
+    await flush()
 
-    for score_chunk in divide_chunks(scores, 100):
-        await process_score_chunk(score_chunk, ctx)
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"Recalculated {num_recalculated} {mode!r} scores in {elapsed:.2f}s "
+        f"({num_recalculated / elapsed:.2f} scores/sec)",
+    )
 
 
 def generate_report(pp_changes: list[dict[str, Any]], mode: int) -> None:
@@ -333,6 +488,18 @@ async def main(argv: Sequence[str] | None = None) -> int:
         help="Disable recalculating user stats",
         action="store_true",
     )
+    parser.add_argument(
+        "--resume",
+        help="Resume recalculating scores from the last run's checkpoint",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="The amount of worker processes to calculate with",
+        type=int,
+        default=os.cpu_count() or 1,
+    )
     parser.add_argument(
         "--no-report",
         help="Disable generating HTML report",
@@ -353,18 +520,26 @@ async def main(argv: Sequence[str] | None = None) -> int:
     global debug_mode_enabled
     debug_mode_enabled = args.debug
 
-    db = databases.Database(app.settings.DB_DSN)
+    db = Database(app.settings.DB_DSN)
     await db.connect()
 
     redis = await aioredis.from_url(app.settings.REDIS_DSN)  # type: ignore[no-untyped-call]
 
-    ctx = Context(db, redis)
+    # spawn, rather than fork the event loop & its connections
+    executor = ProcessPoolExecutor(
+        max_workers=args.jobs,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+    ctx = Context(db, redis, executor, args.jobs)
+
+    checkpoints = load_checkpoints() if args.resume else {}
 
     for mode in args.mode:
         mode = GameMode(int(mode))
 
         if not args.no_scores:
-            await recalculate_mode_scores(mode, ctx)
+            await recalculate_mode_scores(mode, ctx, checkpoints.get(str(mode.value), 0))
 
         if not args.no_stats:
             await recalculate_mode_users(mode, ctx)
@@ -374,6 +549,8 @@ async def main(argv: Sequence[str] | None = None) -> int:
         for mode in map(int, args.mode):
             generate_report(ctx.pp_changes, mode)
 
+    executor.shutdown()
+
     await app.state.services.http_client.aclose()
     await db.disconnect()
     await redis.aclose()
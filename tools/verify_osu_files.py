@@ -0,0 +1,63 @@
+#!/usr/bin/env python3.11
+"""\
+Bring the md5 index of the .osu files in .data/osu up to date, hashing
+any files which are new or have changed (by size or modification time)
+since they were indexed, and removing the entries of deleted files.
+
+Usage: python verify_osu_files.py [--rehash-all] [-j JOBS]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from collections.abc import Sequence
+
+sys.path.insert(0, os.path.abspath(os.pardir))
+os.chdir(os.path.abspath(os.pardir))
+
+try:
+    import app.state.services
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run from tools/ directory\x1b[m")
+    raise
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    argv = argv if argv is not None else sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="Verify & rebuild the md5 index of .osu files",
+    )
+    parser.add_argument(
+        "--rehash-all",
+        help="Rehash all files, rather than only new or changed ones",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="The amount of threads to hash files with",
+        type=int,
+        default=os.cpu_count() or 1,
+    )
+    args = parser.parse_args(argv)
+
+    osu_file_index = app.state.services.osu_file_index
+
+    start_time = time.perf_counter()
+    result = osu_file_index.verify(max_workers=args.jobs, rehash_all=args.rehash_all)
+    elapsed = time.perf_counter() - start_time
+
+    osu_file_index.close()
+
+    print(
+        f"Verified {result.files} .osu files in {elapsed:.2f}s "
+        f"({result.rehashed} hashed, {result.removed} removed from the index)",
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())